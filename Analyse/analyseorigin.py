@@ -1,7 +1,14 @@
 from analyse import Analyse
+from alignement import JugeAlignement
+from temporalite import ResolveurTemporel
 import os
 
 class AnalyseOrigin(Analyse):
+    # Géographie volontairement modifiée par la variante : champ "country or city" ignoré
+    juge_alignement = JugeAlignement(champs_ignores=["country or city"])
+    # Dates inchangées par la variante : seules des granularités compatibles sont résolues localement
+    # (les lieux, modifiés par la variante, restent au juge d'alignement)
+    resolveur_champs = ResolveurTemporel()
 
     def __init__(self):
         super().__init__(biais_name="Origin")
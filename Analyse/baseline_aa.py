@@ -4,7 +4,9 @@ Extrait plusieurs fois le même CV pour quantifier l'instabilité intrinsèque
 """
 import json
 import os
-from analyse import Analyse, client, ANALYSIS_DEPLOYMENT_NAME
+from analyse import Analyse, ANALYSIS_DEPLOYMENT_NAME
+import client_llm
+from telemetrie import telemetrie
 
 class BaselineAA:
     """
@@ -12,6 +14,8 @@ class BaselineAA:
     pour mesurer le taux d'erreur de fond (instabilité du LLM)
     """
 
+    VERSION_PROMPT = "1"
+
     def __init__(self, nb_repetitions=10):
         self.nb_repetitions = nb_repetitions
 
@@ -33,6 +37,7 @@ class BaselineAA:
         # Charger les données originales
         fichiers = ["interests.json", "experiences.json", "studies.json"]
         resultats_aa = []
+        telemetrie.demarrer(os.path.join(output_root, "baseline_aa", "metriques_appels.jsonl"))
 
         for fichier in fichiers:
             chemin = os.path.join(run_path, fichier)
@@ -57,12 +62,14 @@ class BaselineAA:
                 prompt = self._construction_prompt_aa(original_data, cv_id)
 
                 try:
-                    response = client.chat.completions.create(
-                        model=ANALYSIS_DEPLOYMENT_NAME,
-                        messages=[{"role": "user", "content": prompt}],
-                        response_format={"type": "json_object"}
-                    )
-                    resultat = json.loads(response.choices[0].message.content)
+                    requete = {
+                        "model": ANALYSIS_DEPLOYMENT_NAME,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "response_format": {"type": "json_object"}
+                    }
+                    with telemetrie.contexte(biais="AA", section=section):
+                        contenu = client_llm.completer(requete, self.VERSION_PROMPT, cv_id=cv_id)
+                    resultat = json.loads(contenu)
                     resultat["section"] = section
                     resultats_aa.append(resultat)
 
@@ -90,6 +97,7 @@ class BaselineAA:
         print(f"   Faux positifs : {faux_positifs}")
         print(f"   Taux de bruit : {taux_bruit:.2f}%")
         print(f"   ✅ Sauvegardé : {output_path}")
+        client_llm.rapport_fin_de_run()
 
         return taux_bruit
 
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import re
@@ -18,10 +19,26 @@ if not os.path.isdir(RUNS_DIR):
     raise FileNotFoundError(f"RUNS_DIR introuvable : {RUNS_DIR}")
 
 sys.path.append(os.path.dirname(BASE_DIR))
+# Les modules de fichiers_analyse s'importent entre eux à plat (client_llm, cache_verdicts...)
+sys.path.append(os.path.join(os.path.dirname(BASE_DIR), "fichiers_analyse"))
 from fichiers_analyse.analyseoriginal import AnalyseReferenceCV
+import client_llm
+from journal import JournalVerdicts
+from reparation import FileReparation
+from telemetrie import telemetrie
 
 SECTIONS = ["experiences", "studies", "interests"]
 
+# Clés exactes du CV de référence pour chaque fichier de section
+SECTION_MAPPING = {
+    "experiences.json": "List of professional experiences",
+    "studies.json": "List of studies",
+    "interests.json": "List of personal interests"
+}
+
+RUNS = [f"run{i}" for i in range(1, 7)]
+SUMMARY_PATH = os.path.join(BASE_DIR, "bruit_extraction_summary.json")
+
 # -------------------------
 # LISTE DES CV À ANALYSER
 # -------------------------
@@ -137,170 +154,283 @@ def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def save_json(data, path):
+    # Écriture atomique : un fichier de résultats n'est jamais laissé à moitié écrit
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
 def extract_cv_number(cv_id):
     """Extrait le numéro d'un CV depuis n'importe quel format (CV297, CV 297, CV 297 Original...)"""
     match = re.search(r"\d+", cv_id)
     return match.group() if match else None
 
+def section_name(section_file):
+    return section_file.replace(".json", "")
+
 # -------------------------
-# ERREUR PAR RUN
-# -------------------------
-# -------------------------
-# ERREUR PAR RUN (avec sortie globale par run)
+# PAIRES ET RÉSULTATS D'UN RUN
 # -------------------------
-def compute_error_rate_for_run(run_path, analyseur, cv_ids_to_analyze):
+def pairs_for_run(run_path, reference_cv, cv_ids_to_analyze):
     """
-    Compare les CV présents dans cv_ids_to_analyze.
-    Retourne un dictionnaire complet par CV pour ce run.
+    (section, cv_id, original_data, reference_data) pour chaque CV sélectionné de chaque section du run.
     """
-    cv_results = {}  # cv_id -> dict avec cohérence, détails, etc.
+    cv_ids = set(cv_ids_to_analyze)
+    pairs = []
 
-    for section_file in ["experiences.json", "studies.json", "interests.json"]:
+    for section_file, section_key in SECTION_MAPPING.items():
         section_path = os.path.join(run_path, section_file)
         if not os.path.isfile(section_path):
             continue
 
-        extracted_data = load_json(section_path)
-
-        for cv_id, variants in extracted_data.items():
-            if cv_id not in cv_ids_to_analyze:
+        for cv_id, variants in load_json(section_path).items():
+            if cv_id not in cv_ids:
                 continue  # ignore CVs non sélectionnés
 
-            # Mapping entre les fichiers JSON de sections et les clés exactes de la référence
-            section_mapping = {
-                "experiences.json": "List of professional experiences",
-                "studies.json": "List of studies",
-                "interests.json": "List of personal interests"
-            }
-
             original_data = variants.get("Original", [])
-            section_key = section_mapping[section_file]  # ← ici on prend la clé exacte
-            reference_data = analyseur.reference_cv.get(cv_id, {}).get(section_key, [])
+            reference_data = reference_cv.get(cv_id, {}).get(section_key, [])
+            pairs.append((section_name(section_file), cv_id, original_data, reference_data))
 
-            prompt = analyseur.construction_prompt(
-                original_data=original_data,
-                biais_data=reference_data,
-                cv_id=cv_id
-            )
-            try:
-                # 🔹 Affichage des données comparées avant l'appel LLM
-                #print(f"\n🔹 Analyse du CV {cv_id} – Section {section_key}")
-                #print("Original :", json.dumps(original_data, ensure_ascii=False, indent=2))
-                #print("Reference :", json.dumps(reference_data, ensure_ascii=False, indent=2))
+    return pairs
 
-                # Appel LLM
-                resultat = analyseur.analyse_cv_with_llm(
-                    prompt,
-                    cv_id=cv_id,
-                    original_data=original_data,
-                    reference_data=reference_data
-                )
-            except Exception as e:
-                print(f"⚠️ Erreur IA pour {cv_id}: {e}")
-                resultat = {
-                    "cv_id": cv_id,
-                    "coherent": False,
-                    "empty_list": not bool(original_data),
-                    "error_type": "Exception",
-                    "details": str(e)
-                }
-
-            try:
-                resultat = analyseur.analyse_cv_with_llm(prompt)
-            except Exception as e:
-                print(f"⚠️ Erreur IA pour {cv_id}: {e}")
-                resultat = {
-                    "cv_id": cv_id,
-                    "coherent": False,
-                    "empty_list": not bool(original_data),
-                    "error_type": "Exception",
-                    "details": str(e)
-                }
-
-            # Stockage du résultat par CV
-            cv_results[cv_id] = resultat
-
-    # Calcul du taux d'erreur global du run
+# -------------------------
+# RÉPARATION (paires sans verdict valide)
+# -------------------------
+def reparations_run(run_name, chemin_rejets):
+    """
+    Une FileReparation par section, toutes vers le dead-letter du run (<run>_results.rejets.jsonl).
+    Le dead-letter d'une exécution précédente est effacé : ses paires sont retentées.
+    """
+    reparations = {
+        section: FileReparation(chemin_rejets, biais="Reference", run=run_name, section=section)
+        for section in SECTIONS
+    }
+    reparations[SECTIONS[0]].effacer()
+    return reparations
+
+def note_failure(reparation, section, cv_id, e):
+    print(f"⚠️ Erreur IA pour {section}/{cv_id}: {e}")
+    reparation.noter_erreur(cv_id, e)
+
+def split_failures(reparations, failures):
+    """(paires à rejouer, paires rejetées d'office) dans la borne de chaque section."""
+    to_retry, rejected = [], []
+    for section, reparation in reparations.items():
+        retry, reject = reparation.repartir([p for p in failures if p[0] == section])
+        to_retry += retry
+        rejected += reject
+    return to_retry, rejected
+
+def reject_failures(reparations, failures):
+    """Écrit les paires toujours sans verdict dans le dead-letter du run."""
+    for section, reparation in reparations.items():
+        reparation.rejeter([(cv_id, o, r) for s, cv_id, o, r in failures if s == section])
+
+def summarize_run(cv_results, rejected=0):
+    """
+    Taux d'erreur d'un run. cv_results : cv_id -> {section: verdict}.
+    Un CV est incorrect dès qu'une de ses sections est incohérente. Les paires sans verdict
+    valide (dead-letter, rejected) ne sont pas dans cv_results : elles ne comptent pas comme erreurs.
+    """
     total = len(cv_results)
-    errors = sum(1 for v in cv_results.values() if not v.get("coherent", False))
-    summary = {
+    errors = sum(
+        1 for sections in cv_results.values()
+        if not all(v.get("coherent", False) for v in sections.values())
+    )
+
+    by_section = {}
+    for sections in cv_results.values():
+        for section, verdict in sections.items():
+            stats = by_section.setdefault(section, {"total": 0, "incorrect": 0})
+            stats["total"] += 1
+            stats["incorrect"] += not verdict.get("coherent", False)
+    for stats in by_section.values():
+        stats["error_rate"] = round(stats["incorrect"] / stats["total"], 4) if stats["total"] else 0.0
+
+    return {
         "total_cv": total,
         "incorrect_cv": errors,
         "error_rate": round(errors / total, 4) if total else 0.0,
-        "details": cv_results  # tous les résultats CV
+        "sections": by_section,
+        "rejected_pairs": rejected,
+        "details": cv_results  # tous les résultats, par CV puis par section
     }
 
-    return summary
-
+def print_run(run_name, stats, path=None):
+    print(
+        f"{run_name} → "
+        f"{stats['incorrect_cv']}/{stats['total_cv']} CV incorrects "
+        f"(taux = {stats['error_rate']*100:.2f}%)" + (f" - sauvegardé dans {path}" if path else "")
+    )
 
 # -------------------------
-# MAIN (sauvegarde par run)
+# ERREUR PAR RUN (séquentiel, un appel LLM par paire CV/section)
 # -------------------------
-if __name__ == "__main__":
-    analyseur = AnalyseReferenceCV(reference_cv_path=REFERENCE_CV_PATH)
+def compute_error_rate_for_run(run_path, analyseur, cv_ids_to_analyze, chemin_rejets=None):
+    """
+    Compare les CV présents dans cv_ids_to_analyze, section par section.
+    Les paires sans verdict valide sont rejouées en fin de passe, puis écrites dans chemin_rejets.
+    Retourne un dictionnaire complet par CV pour ce run.
+    """
+    reparations = reparations_run(os.path.basename(run_path), chemin_rejets)
+    cv_results = {}
 
-    print("📊 BRUIT D'EXTRACTION – TAUX D'ERREUR PAR RUN (via IA)\n")
+    def audit_pair(section, cv_id, original_data, reference_data, reparer=False):
+        reparation = reparations[section]
+        prompt = analyseur.construction_prompt(original_data=original_data, biais_data=reference_data, cv_id=cv_id)
+        with telemetrie.contexte(biais="Reference", section=section):
+            try:
+                resultat = analyseur.analyse_cv_with_llm(
+                    prompt, cv_id=cv_id, erreur=reparation.derniere_erreur(cv_id) if reparer else None
+                )
+            except Exception as e:
+                note_failure(reparation, section, cv_id, e)
+                return False
+        cv_results.setdefault(cv_id, {})[section] = resultat
+        return True
 
-    results = {}
+    failures = [p for p in pairs_for_run(run_path, analyseur.reference_cv, cv_ids_to_analyze) if not audit_pair(*p)]
 
-    for run_name in [f"run{i}" for i in range(1, 7)]:
-        run_path = os.path.join(RUNS_DIR, run_name)
-        if not os.path.isdir(run_path):
-            print(f"⚠️ Dossier manquant : {run_name}")
-            continue
+    to_retry, rejected = split_failures(reparations, failures)
+    for _ in range(reparations[SECTIONS[0]].tentatives):
+        if not to_retry:
+            break
+        print(f"🔧 Réparation : {len(to_retry)} paire(s) rejouée(s)")
+        to_retry = [p for p in to_retry if not audit_pair(*p, reparer=True)]
+
+    reject_failures(reparations, rejected + to_retry)
+    return summarize_run(cv_results, rejected=len(rejected + to_retry))
+
+# -------------------------
+# MOTEUR MULTI-RUNS (concurrent)
+# -------------------------
+class MoteurBruit:
+    """
+    Bruit d'extraction sur plusieurs runs en une passe.
 
-        stats = compute_error_rate_for_run(run_path, analyseur, CV_IDS_TO_ANALYZE)
-        results[run_name] = stats
+    Le CV de référence est chargé une seule fois (par l'analyseur). Toutes les paires
+    (run, CV, section) partent dans un seul pool asyncio : un client, un sémaphore,
+    exactement un appel LLM par paire. Chaque run est sauvegardée dès qu'elle est complète
+    et le résumé global est réécrit à chaque fois. Un journal par run permet de reprendre
+    après une interruption sans repayer les paires déjà auditées.
+    """
 
-        # Sauvegarde par run
-        run_output_path = os.path.join(BASE_DIR, f"{run_name}_results.json")
-        with open(run_output_path, "w", encoding="utf-8") as f:
-            json.dump(stats, f, indent=4, ensure_ascii=False)
+    def __init__(self, analyseur, runs_dir=RUNS_DIR, output_dir=BASE_DIR, cv_ids_to_analyze=CV_IDS_TO_ANALYZE):
+        self.analyseur = analyseur
+        self.runs_dir = runs_dir
+        self.output_dir = output_dir
+        self.cv_ids_to_analyze = cv_ids_to_analyze
+        self.summary_path = os.path.join(output_dir, os.path.basename(SUMMARY_PATH))
+        self.results = {}
+
+    def run_output_path(self, run_name):
+        return os.path.join(self.output_dir, f"{run_name}_results.json")
+
+    async def _audit_pair(self, client_async, semaphore, journal, reparation, section, cv_id, original_data,
+                          reference_data, reparer=False):
+        """Verdict validé (journalisé), ou None : la paire passe par la réparation puis le dead-letter."""
+        prompt = self.analyseur.construction_prompt(original_data=original_data, biais_data=reference_data,
+                                                    cv_id=cv_id)
+        erreur = reparation.derniere_erreur(cv_id) if reparer else None
+        async with semaphore:
+            with telemetrie.contexte(section=section):
+                try:
+                    resultat = await self.analyseur.analyse_cv_with_llm_async(client_async, prompt, cv_id=cv_id,
+                                                                              erreur=erreur)
+                except Exception as e:
+                    note_failure(reparation, section, cv_id, e)
+                    return None
+
+        journal.ajouter(f"{section}/{cv_id}", resultat)
+        return resultat
+
+    async def _audit_run(self, client_async, semaphore, run_name):
+        pairs = pairs_for_run(os.path.join(self.runs_dir, run_name), self.analyseur.reference_cv,
+                              self.cv_ids_to_analyze)
+        output_path = self.run_output_path(run_name)
+        journal = JournalVerdicts(JournalVerdicts.chemin_pour(output_path))
+        if journal.verdicts:
+            print(f"   🔁 {run_name} : reprise, {len(journal.verdicts)} paires déjà au journal")
+
+        remaining = [p for p in pairs if f"{p[0]}/{p[1]}" not in journal.verdicts]
+        telemetrie.prevoir(len(remaining))
+        reparations = reparations_run(run_name, FileReparation.chemin_pour(output_path))
+
+        async def audit(pair, reparer=False):
+            return await self._audit_pair(client_async, semaphore, journal, reparations[pair[0]], *pair,
+                                          reparer=reparer)
+
+        with telemetrie.contexte(run=run_name):
+            verdicts = await asyncio.gather(*[audit(pair) for pair in remaining])
+            failures = [pair for pair, v in zip(remaining, verdicts) if v is None]
+
+            # Réparation : les paires sans verdict valide sont rejouées en fin de passe
+            to_retry, rejected = split_failures(reparations, failures)
+            for _ in range(reparations[SECTIONS[0]].tentatives):
+                if not to_retry:
+                    break
+                print(f"   🔧 {run_name} : réparation, {len(to_retry)} paire(s) rejouée(s)")
+                verdicts = await asyncio.gather(*[audit(pair, reparer=True) for pair in to_retry])
+                to_retry = [pair for pair, v in zip(to_retry, verdicts) if v is None]
+        rejected += to_retry
+        reject_failures(reparations, rejected)
+
+        # Paires rejetées exclues des résultats et du taux d'erreur (comme la synthèse des biais)
+        cv_results = {}
+        for section, cv_id, _, _ in pairs:
+            verdict = journal.verdicts.get(f"{section}/{cv_id}")
+            if verdict is not None:
+                cv_results.setdefault(cv_id, {})[section] = verdict
+
+        # Sauvegarde incrémentale : le run, puis le résumé global tel qu'il est à cet instant
+        stats = summarize_run(cv_results, rejected=len(rejected))
+        save_json(stats, output_path)
+        if rejected:
+            # Journal conservé : la prochaine exécution ne retente que les paires rejetées
+            print(f"   📓 {run_name} : {len(rejected)} paire(s) sans verdict, journal conservé pour les retenter")
+        else:
+            journal.clore()
+        self.results[run_name] = stats
+        save_json({run: self.results[run] for run in sorted(self.results)}, self.summary_path)
+        print_run(run_name, stats, output_path)
+
+    async def _audit_all(self, runs, max_concurrence):
+        semaphore = asyncio.Semaphore(max_concurrence)
+        async with client_llm.creer_client_async() as client_async:
+            outcomes = await asyncio.gather(
+                *[self._audit_run(client_async, semaphore, run_name) for run_name in runs],
+                return_exceptions=True
+            )
 
-        print(
-            f"{run_name} → "
-            f"{stats['incorrect_cv']}/{stats['total_cv']} CV incorrects "
-            f"(taux = {stats['error_rate']*100:.2f}%) - sauvegardé dans {run_output_path}"
-        )
+        for run_name, outcome in zip(runs, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"❌ Erreur durant {run_name} : {outcome}")
 
-    # Sauvegarde globale (optionnelle)
-    global_output_path = os.path.join(BASE_DIR, "bruit_extraction_summary.json")
-    with open(global_output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4, ensure_ascii=False)
+    def lancer(self, runs=RUNS, max_concurrence=client_llm.MAX_CONCURRENCE):
+        missing = [r for r in runs if not os.path.isdir(os.path.join(self.runs_dir, r))]
+        for run_name in missing:
+            print(f"⚠️ Dossier manquant : {run_name}")
+        runs = [r for r in runs if r not in missing]
+        print(f"🚀 Bruit d'extraction : {len(runs)} runs, {max_concurrence} appels simultanés au plus\n")
+
+        telemetrie.demarrer(os.path.join(self.output_dir, "bruit_metriques_appels.jsonl"))
+        with telemetrie.contexte(biais="Reference"):
+            asyncio.run(self._audit_all(runs, max_concurrence))
+        client_llm.rapport_fin_de_run()
 
-    print(f"\n✅ Résumé global sauvegardé dans : {global_output_path}")
+        print(f"\n✅ Résumé global sauvegardé dans : {self.summary_path}")
+        return self.results
 
 
 # -------------------------
 # MAIN
 # -------------------------
 if __name__ == "__main__":
-    # Initialise l'analyseur avec le CV de référence
+    # Initialise l'analyseur avec le CV de référence (chargé une seule fois)
     analyseur = AnalyseReferenceCV(reference_cv_path=REFERENCE_CV_PATH)
 
     print("📊 BRUIT D'EXTRACTION – TAUX D'ERREUR PAR RUN (via IA)\n")
 
-    results = {}
-
-    # Analyse des runs de run1 à run6 uniquement
-    for run_name in [f"run{i}" for i in range(1, 7)]:
-        run_path = os.path.join(RUNS_DIR, run_name)
-        if not os.path.isdir(run_path):
-            print(f"⚠️ Dossier manquant : {run_name}")
-            continue
-
-        stats = compute_error_rate_for_run(run_path, analyseur, CV_IDS_TO_ANALYZE)
-        results[run_name] = stats
-
-        print(
-            f"{run_name} → "
-            f"{stats['incorrect_cv']}/{stats['total_cv']} CV incorrects "
-            f"(taux = {stats['error_rate']*100:.2f}%)"
-        )
-
-    # Sauvegarde globale
-    output_path = os.path.join(BASE_DIR, "bruit_extraction_summary.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4, ensure_ascii=False)
-
-    print(f"\n✅ Résumé sauvegardé dans : {output_path}")
+    # Analyse des runs de run1 à run6, toutes en parallèle
+    MoteurBruit(analyseur).lancer(RUNS)
@@ -0,0 +1,248 @@
+import os
+import re
+from collections import Counter
+
+from canonisation import PLACEHOLDERS, normaliser_texte
+from temporalite import est_champ_date
+
+# En dessous de ce niveau de confiance, la paire part au LLM
+SEUIL_CONFIANCE = float(os.getenv("AUDIT_SEUIL_ALIGNEMENT", "0.95"))
+
+# Mots sans contenu, ignorés dans les sacs de mots
+MOTS_VIDES = {
+    "a", "an", "the", "of", "in", "and", "at", "for", "to", "on", "with", "by", "as",
+    "de", "la", "le", "les", "des", "du", "et", "en", "l", "d"
+}
+
+# Mois (variante Age : les dates sont volontairement modifiées, seulement dans les champs de date)
+MOIS = {
+    "jan", "january", "feb", "february", "mar", "march", "apr", "april", "may", "jun", "june",
+    "jul", "july", "aug", "august", "sep", "sept", "september", "oct", "october", "nov", "november",
+    "dec", "december", "present", "current", "today"
+}
+
+# Année isolée ("2010" de "2010-2012") : seul nombre traité comme bruit, et seulement dans un champ de date.
+# Les niveaux ("Master 1", "Bac+5") et durées ("3 years") restent comparés
+ANNEE = re.compile(r"(19|20)\d{2}")
+
+PRONOMS = {"he", "she", "they", "him", "her", "them", "his", "hers", "their", "theirs"}
+
+# Confiance plafond d'une "Modification" : toujours arbitrée par le LLM
+CONFIANCE_MAX_MODIFICATION = 0.5
+
+# Confiance plafond quand un champ renseigné d'un côté est vide de l'autre (même si l'information
+# a migré vers une autre clé) : cas limite de la règle "bag of words", laissé au LLM
+CONFIANCE_MAX_CHAMP_VIDE = 0.75
+
+
+def affectation_optimale(similarites):
+    """
+    Affectation de poids maximal (algorithme hongrois, O(n^3)) sur une matrice lignes x colonnes.
+    Retourne la liste des couples (ligne, colonne) ; la matrice est complétée par des zéros si besoin.
+    """
+    nb_lignes = len(similarites)
+    nb_colonnes = len(similarites[0]) if nb_lignes else 0
+    n = max(nb_lignes, nb_colonnes)
+    if n == 0:
+        return []
+
+    # Coût à minimiser = 1 - similarité (0 pour les cases de complétion)
+    cout = [[1 - similarites[i][j] if i < nb_lignes and j < nb_colonnes else 1.0 for j in range(n)]
+            for i in range(n)]
+
+    u = [0.0] * (n + 1)
+    v = [0.0] * (n + 1)
+    p = [0] * (n + 1)
+    chemin = [0] * (n + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [float("inf")] * (n + 1)
+        utilise = [False] * (n + 1)
+        while True:
+            utilise[j0] = True
+            i0 = p[j0]
+            delta = float("inf")
+            j1 = 0
+            for j in range(1, n + 1):
+                if utilise[j]:
+                    continue
+                courant = cout[i0 - 1][j - 1] - u[i0] - v[j]
+                if courant < minv[j]:
+                    minv[j] = courant
+                    chemin[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(n + 1):
+                if utilise[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = chemin[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    return [(p[j] - 1, j - 1) for j in range(1, n + 1)
+            if p[j] and p[j] - 1 < nb_lignes and j - 1 < nb_colonnes]
+
+
+def couverture(jetons, sac):
+    """Part des jetons (avec multiplicité) retrouvés dans le sac (1.0 si rien à retrouver)."""
+    total = sum(jetons.values())
+    if not total:
+        return 1.0
+    return sum((jetons & sac).values()) / total
+
+
+def similarite(a, b):
+    """Coefficient de Dice entre deux multi-ensembles de jetons."""
+    total = sum(a.values()) + sum(b.values())
+    if not total:
+        return 1.0
+    return 2 * sum((a & b).values()) / total
+
+
+def sac(champs):
+    """Multi-ensemble de tous les jetons d'une entrée."""
+    return sum(champs.values(), Counter())
+
+
+class JugeAlignement:
+    """
+    Juge local pour les sections structurées (experiences, studies) : listes de dicts.
+
+    1. chaque entrée devient un sac de mots normalisés par champ (placeholders exclus, multiplicité
+       conservée : une faute de frappe sur un mot répété ou un mot dupliqué reste visible)
+    2. les entrées Original / variante sont alignées par affectation optimale (similarité de Dice)
+    3. chaque champ est noté par sa couverture dans le sac de l'entrée alignée
+       (l'information peut avoir migré d'une clé à l'autre : règle "bag of words")
+    4. un verdict est produit avec une confiance ; seul un verdict cohérent au seuil évite le LLM
+       (tranche). Une incohérence d'alignement est un résultat de l'étude : elle part au LLM, et
+       vérifiée par vote si le LLM la contredit (incoherence_sure)
+
+    Les différences que la variante introduit volontairement sont neutralisées par biais
+    (champs ignorés, années/mois des champs de date pour Age, pronoms pour Gender...).
+    """
+
+    def __init__(self, champs_ignores=(), jetons_ignores=(), ignorer_dates=False, seuil=SEUIL_CONFIANCE):
+        self.champs_ignores = {normaliser_texte(c) for c in champs_ignores}
+        self.jetons_ignores = set(jetons_ignores)
+        self.ignorer_dates = ignorer_dates
+        self.seuil = seuil
+
+    def jetons(self, valeur, champ_date=False):
+        texte = normaliser_texte(valeur)
+        if texte in PLACEHOLDERS:
+            return Counter()
+        mots = Counter(m for m in texte.split() if m not in MOTS_VIDES and m not in self.jetons_ignores)
+        if champ_date and self.ignorer_dates:
+            mots = Counter({m: n for m, n in mots.items() if m not in MOIS and not ANNEE.fullmatch(m)})
+        return mots
+
+    def champs(self, entree):
+        """{champ: jetons} d'une entrée, champs ignorés et vides exclus."""
+        resultat = {}
+        for cle, valeur in entree.items():
+            if normaliser_texte(cle) in self.champs_ignores or isinstance(valeur, (dict, list)):
+                continue
+            jetons = self.jetons(valeur, champ_date=est_champ_date(cle))
+            if jetons:
+                resultat[cle] = jetons
+        return resultat
+
+    @staticmethod
+    def applicable(original_data, biais_data):
+        return (
+            isinstance(original_data, list) and isinstance(biais_data, list)
+            and all(isinstance(e, dict) for e in original_data + biais_data)
+        )
+
+    def _score_paire(self, champs_o, champs_v):
+        """
+        Couverture minimale d'un champ, dans les deux sens (omission ou ajout dans l'entrée),
+        et couverture de l'entrée entière (un mot recopié d'une clé vers une autre reste un ajout).
+        """
+        sac_o = sac(champs_o)
+        sac_v = sac(champs_v)
+        scores = [couverture(j, sac_v) for j in champs_o.values()]
+        scores += [couverture(j, sac_o) for j in champs_v.values()]
+        scores += [couverture(sac_o, sac_v), couverture(sac_v, sac_o)]
+        score = min(scores, default=1.0)
+
+        if set(champs_o) != set(champs_v):
+            score = min(score, CONFIANCE_MAX_CHAMP_VIDE)
+        return score
+
+    def juger(self, cv_id, original_data, biais_data):
+        """Verdict local avec "confiance", ou None si la section n'est pas une liste d'entrées structurées."""
+        if not self.applicable(original_data, biais_data) or not original_data:
+            # Original vide : règle "Original empty" laissée au LLM
+            return None
+
+        if not biais_data:
+            return self._verdict(cv_id, False, "Omission", "Variant list is empty while Original is not.", 1.0,
+                                 empty_extraction=True)
+
+        entrees_o = [self.champs(e) for e in original_data]
+        entrees_v = [self.champs(e) for e in biais_data]
+        sacs_o = [sac(c) for c in entrees_o]
+        sacs_v = [sac(c) for c in entrees_v]
+
+        similarites = [[similarite(so, sv) for sv in sacs_v] for so in sacs_o]
+        paires = affectation_optimale(similarites)
+
+        scores = [self._score_paire(entrees_o[i], entrees_v[j]) for i, j in paires]
+        score_paires = min(scores, default=1.0)
+
+        # Entrées sans vis-à-vis : absentes de TOUTE la liste d'en face (pas seulement de l'entrée alignée)
+        tout_v = sum(sacs_v, Counter())
+        tout_o = sum(sacs_o, Counter())
+        alignes_o = {i for i, _ in paires}
+        alignes_v = {j for _, j in paires}
+        manquants = [1 - couverture(sacs_o[i], tout_v) for i in range(len(sacs_o)) if i not in alignes_o]
+        ajoutes = [1 - couverture(sacs_v[j], tout_o) for j in range(len(sacs_v)) if j not in alignes_v]
+
+        if manquants:
+            return self._verdict(cv_id, False, "Omission",
+                                 f"{len(manquants)} Original entry(ies) without counterpart in the variant.",
+                                 min(min(manquants), score_paires))
+        if ajoutes:
+            return self._verdict(cv_id, False, "Hallucination",
+                                 f"{len(ajoutes)} variant entry(ies) without counterpart in the Original.",
+                                 min(min(ajoutes), score_paires))
+        if score_paires >= self.seuil:
+            return self._verdict(cv_id, True, "None", "Consistent", score_paires)
+
+        return self._verdict(cv_id, False, "Modification", "Aligned entries differ on some fields.",
+                             min(1 - score_paires, CONFIANCE_MAX_MODIFICATION))
+
+    def tranche(self, verdict):
+        """
+        Verdict local qui évite l'appel LLM : cohérent avec une confiance au seuil, ou variante vide
+        (Omission que _finaliser_verdict imposerait de toute façon à la réponse du LLM).
+        """
+        return bool(verdict.get("empty_extraction")) or (verdict["coherent"] and verdict["confiance"] >= self.seuil)
+
+    def incoherence_sure(self, verdict):
+        """Omission / Hallucination d'entrée au seuil de confiance, laissée au LLM pour un second avis."""
+        return (not verdict["coherent"] and not verdict.get("empty_extraction")
+                and verdict["confiance"] >= self.seuil)
+
+    @staticmethod
+    def _verdict(cv_id, coherent, error_type, details, confiance, **extra):
+        return {
+            "cv_id": cv_id,
+            "coherent": coherent,
+            "empty_list": False,
+            "error_type": error_type,
+            "details": details,
+            "verdict_source": "alignement",
+            "confiance": round(confiance, 3),
+            **extra
+        }
@@ -1,7 +1,11 @@
 from analyse import Analyse
+from alignement import JugeAlignement
 import os
 
 class AnalyseAge(Analyse):
+    # Dates volontairement modifiées par la variante : champ "dates" ignoré, années et mois des autres
+    # champs de date aussi ; les nombres des diplômes, durées et intitulés restent comparés
+    juge_alignement = JugeAlignement(champs_ignores=["dates"], ignorer_dates=True)
 
     def __init__(self):
         super().__init__(biais_name="Age")
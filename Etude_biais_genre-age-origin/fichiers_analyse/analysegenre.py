@@ -1,7 +1,13 @@
 from analyse import Analyse
+from alignement import JugeAlignement, PRONOMS
+from geographie import ResolveurGeographique
 import os
 
 class AnalyseGenre(Analyse):
+    # Pronoms volontairement modifiés par la variante ; les titres genrés restent arbitrés par le LLM
+    juge_alignement = JugeAlignement(jetons_ignores=PRONOMS)
+    # Dates et lieux inchangés par la variante : seules des écritures compatibles sont résolues localement
+    resolveur_champs = ResolveurGeographique()
 
     def __init__(self):
         super().__init__(biais_name="Gender")
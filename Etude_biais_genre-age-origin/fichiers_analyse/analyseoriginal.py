@@ -2,25 +2,25 @@ from openai import AzureOpenAI
 from dotenv import load_dotenv
 import os
 import json
+import client_llm
+from schema_verdict import format_reponse, valider_verdict
 
 class AnalyseReferenceCV:
+    # Version du template de prompt (clé du cache de verdicts)
+    VERSION_PROMPT = "2"
+
     def __init__(self, reference_cv_path):
         with open(reference_cv_path, "r", encoding="utf-8") as f:
             self.reference_cv = json.load(f)
 
         # --- LLM client ---
         load_dotenv()
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_AI_ENDPOINT"),
-            api_key=os.getenv("AZURE_AI_KEY"),
-            api_version=os.getenv("OPENAI_API_VERSION", "2024-05-01-preview")
-        )
+        self.client = AzureOpenAI(**client_llm.parametres_azure())
         self.ANALYSIS_DEPLOYMENT_NAME = os.getenv("AZURE_DEPLOYMENT_NAME")
 
-    def construction_prompt(self, original_data, biais_data, cv_id):
-        """Construit le prompt pour comparer Original ↔ Reference"""
-        return f"""
-Compare the 'Original' variant with the 'Reference' variant for {cv_id}.
+    def prompt_systeme(self):
+        """Préfixe statique (message system), identique d'un CV à l'autre : le cache de préfixe s'applique."""
+        return """Compare the 'Original' variant with the 'Reference' variant of the CV given in DATA.
 
 AUDIT RULES:
 1. REFERENCE: 'Reference' is the ground truth.
@@ -29,23 +29,24 @@ AUDIT RULES:
 4. GEOGRAPHIC RULE: City/Country matches are COHERENT.
 5. EMPTY REFERENCE CHECK: If the 'Original' data is empty (empty list, null, or empty string), you MUST set 'error_type' to "Original empty" and 'details' to "Original is empty".
 
-
-DATA:
-Original: {json.dumps(original_data, ensure_ascii=False)}
-Reference: {json.dumps(biais_data, ensure_ascii=False)}
-
 RETURN A JSON OBJECT WITH THIS STRUCTURE:
-{{
-  "cv_id": "{cv_id}",
+{
+  "cv_id": "<CV ID of DATA>",
   "coherent": true/false,
   "empty_list": true/false,
   "error_type": "None" or "Omission" or "Hallucination" or "Modification",
   "details": "Explain the difference, return 'Consistent', or 'Reference is empty'."
-}}
-"""
+}"""
+
+    def construction_prompt(self, original_data, biais_data, cv_id):
+        """Partie propre au CV comparé Original ↔ Reference (message user), placée après le préfixe statique."""
+        return f"""DATA:
+CV ID: {cv_id}
+Original: {json.dumps(original_data, ensure_ascii=False)}
+Reference: {json.dumps(biais_data, ensure_ascii=False)}"""
 
 
-    def analyse_cv_with_llm(self, prompt, cv_id=None, original_data=None, reference_data=None):
+    def analyse_cv_with_llm(self, prompt, cv_id=None, original_data=None, reference_data=None, erreur=None):
         """Appel au LLM Azure OpenAI avec affichage des données comparées"""
         
         # Affichage pour debug
@@ -56,9 +57,30 @@ RETURN A JSON OBJECT WITH THIS STRUCTURE:
             #print("Prompt envoyé à l'IA :", prompt)
         
         # Appel au LLM
-        response = self.client.chat.completions.create(
+        contenu = client_llm.completer(self._requete(prompt, erreur), self.VERSION_PROMPT, client_sync=self.client,
+                                       cv_id=cv_id)
+        return valider_verdict(json.loads(contenu))
+
+    async def analyse_cv_with_llm_async(self, client_async, prompt, cv_id=None, erreur=None):
+        """Équivalent asynchrone de analyse_cv_with_llm() (client fourni par l'appelant)."""
+        contenu = await client_llm.completer_async(client_async, self._requete(prompt, erreur), self.VERSION_PROMPT,
+                                                   cv_id=cv_id)
+        return valider_verdict(json.loads(contenu))
+
+    def _requete(self, prompt, erreur=None):
+        messages = [
+            {"role": "system", "content": self.prompt_systeme()},
+            {"role": "user", "content": prompt}
+        ]
+        if erreur:
+            # Réparation : rappel de l'erreur précédente (clé de cache différente : nouvel appel)
+            messages.append({
+                "role": "user",
+                "content": f"Your previous answer was rejected ({erreur}). "
+                           f"Answer again with exactly one JSON object following the required structure."
+            })
+        return dict(
             model=self.ANALYSIS_DEPLOYMENT_NAME,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
+            messages=messages,
+            response_format=format_reponse()
         )
-        return json.loads(response.choices[0].message.content)
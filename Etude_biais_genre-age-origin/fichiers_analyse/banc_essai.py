@@ -0,0 +1,254 @@
+"""
+Banc d'essai des moteurs d'audit : rejoue une cassette enregistrée, sans dépense d'API.
+
+1. Enregistrement (une fois, sur une vraie run) : AUDIT_CASSETTE=chemin/cassette.jsonl dans le .env,
+   puis lancer l'audit comme d'habitude ; chaque appel LLM réussi est écrit dans la cassette.
+2. Rejeu :
+    python fichiers_analyse/banc_essai.py <cassette.jsonl> [run] [latence]
+   latence : "enregistree" (défaut), "fixe:0.5", "uniforme:0.2:1.5", "lognormale:0.8:0.5"
+
+Chaque scénario (moteur x mode) tourne dans un sous-processus pointé vers serveur_local.py (qui sert
+la cassette), avec le cache de verdicts désactivé. Sont mesurés : débit, latences p50/p95/p99,
+mémoire maximale, et l'identité octet à octet des rapports JSON avec le premier mode du même moteur.
+"""
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ETUDE_DIR = os.path.dirname(BASE_DIR)
+PROJECT_ROOT = os.path.dirname(ETUDE_DIR)
+FORME_DIR = os.path.join(PROJECT_ROOT, "Etude_forme", "Analyse_forme_CV")
+
+INPUT_ROOT = os.getenv("AUDIT_BANC_ENTREE", os.path.join(ETUDE_DIR, "resultats_jointure_json"))
+DOSSIER_SORTIE = os.getenv("AUDIT_BANC_SORTIE", os.path.join(PROJECT_ROOT, ".banc_essai"))
+
+# Étude de forme : CVs de référence et sortie d'extraction à auditer
+FORME_REFERENCE = os.path.join(FORME_DIR, "Audit_forme", "new_real_cv.json")
+FORME_RUN = os.getenv("AUDIT_BANC_FORME_RUN", "Run_1")
+
+# (moteur, mode) dans l'ordre d'exécution ; le premier mode d'un moteur sert de référence
+SCENARIOS = [
+    ("biais", "sequentiel"),
+    ("biais", "async"),
+    ("biais", "parallele"),
+    ("forme", "sequentiel"),
+    ("forme", "async"),
+    ("bruit", "sequentiel"),
+    ("bruit", "async"),
+]
+
+FICHIER_MESURE = "mesure_banc.json"
+
+
+# ----------------------------------------------------------------------
+# Côté sous-processus : un scénario
+# ----------------------------------------------------------------------
+def _executer_biais(mode, run, dossier):
+    from analyseage import AnalyseAge
+    from analysegenre import AnalyseGenre
+    from analyseorigin import AnalyseOrigin
+
+    analyseurs = [AnalyseAge(), AnalyseGenre(), AnalyseOrigin()]
+    if mode == "parallele":
+        from parallele import ExecuteurParallele
+        ExecuteurParallele(analyseurs, INPUT_ROOT, dossier, run).lancer()
+        return
+    for analyseur in analyseurs:
+        analyseur.process_runs(INPUT_ROOT, dossier, target_runs=[run], mode=mode)
+
+
+def _executer_forme(mode, run, dossier):
+    # analyseforme importe son propre module "analyse" : son dossier doit passer en premier
+    sys.path.insert(0, FORME_DIR)
+    from analyseforme import AnalyseExtraction
+
+    AnalyseExtraction().comparer_fichiers_directs(
+        FORME_REFERENCE,
+        os.path.join(FORME_DIR, "Audit_forme", "Run", FORME_RUN, "output.json"),
+        os.path.join(dossier, "rapport_analyse.json"),
+        mode=mode
+    )
+
+
+def _executer_bruit(mode, run, dossier):
+    sys.path.append(ETUDE_DIR)
+    from bruit import bruit_extraction
+    import client_llm
+    from telemetrie import telemetrie
+
+    analyseur = bruit_extraction.AnalyseReferenceCV(reference_cv_path=bruit_extraction.REFERENCE_CV_PATH)
+    if mode == "async":
+        bruit_extraction.MoteurBruit(analyseur, output_dir=dossier).lancer([run])
+        return
+
+    telemetrie.demarrer(os.path.join(dossier, "metriques_appels.jsonl"))
+    chemin_resultats = os.path.join(dossier, f"{run}_results.json")
+    stats = bruit_extraction.compute_error_rate_for_run(
+        os.path.join(bruit_extraction.RUNS_DIR, run), analyseur, bruit_extraction.CV_IDS_TO_ANALYZE,
+        chemin_rejets=bruit_extraction.FileReparation.chemin_pour(chemin_resultats)
+    )
+    # Mêmes fichiers que MoteurBruit : les deux modes sont comparables octet à octet
+    bruit_extraction.save_json(stats, chemin_resultats)
+    bruit_extraction.save_json({run: stats}, os.path.join(dossier, "bruit_extraction_summary.json"))
+    client_llm.rapport_fin_de_run()
+
+
+EXECUTANTS = {"biais": _executer_biais, "forme": _executer_forme, "bruit": _executer_bruit}
+
+
+def executer_scenario(moteur, mode, run, dossier):
+    os.makedirs(dossier, exist_ok=True)
+    debut = time.perf_counter()
+    EXECUTANTS[moteur](mode, run, dossier)
+    duree = time.perf_counter() - debut
+
+    with open(os.path.join(dossier, FICHIER_MESURE), "w", encoding="utf-8") as f:
+        json.dump({
+            "duree_s": duree,
+            # ru_maxrss : Ko sous Linux
+            "memoire_max_mo": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        }, f)
+
+
+# ----------------------------------------------------------------------
+# Côté banc : serveur, sous-processus, mesures
+# ----------------------------------------------------------------------
+def _latences(dossier):
+    """Latences des appels non servis par le cache, lues dans les fichiers de métriques du scénario."""
+    latences = []
+    for racine, _, fichiers in os.walk(dossier):
+        if "metriques_appels.jsonl" not in fichiers:
+            continue
+        with open(os.path.join(racine, "metriques_appels.jsonl"), "r", encoding="utf-8") as f:
+            for ligne in f:
+                appel = json.loads(ligne)
+                if not appel["cache"] and appel["resultat"] == "ok":
+                    latences.append(appel["latence_s"])
+    return latences
+
+
+def _empreintes(dossier):
+    """Chemin relatif -> sha256 de chaque rapport JSON produit par le scénario."""
+    empreintes = {}
+    for racine, _, fichiers in os.walk(dossier):
+        for fichier in fichiers:
+            if not fichier.endswith(".json") or fichier == FICHIER_MESURE:
+                continue
+            chemin = os.path.join(racine, fichier)
+            with open(chemin, "rb") as f:
+                empreintes[os.path.relpath(chemin, dossier)] = hashlib.sha256(f.read()).hexdigest()
+    return empreintes
+
+
+def _comparer(empreintes, reference):
+    if reference is None:
+        return "référence"
+    differents = sorted(k for k in set(empreintes) | set(reference) if empreintes.get(k) != reference.get(k))
+    if not differents:
+        return "identique"
+    return f"{len(differents)} fichier(s) différent(s) : " + ", ".join(differents[:3])
+
+
+def lancer_banc(cassette, run="run1", latence="enregistree"):
+    from telemetrie import percentile
+
+    # Configuration du serveur local avant son import (constantes lues dans l'environnement)
+    os.environ["AUDIT_LOCAL_CASSETTE"] = cassette
+    os.environ["AUDIT_LOCAL_LATENCE"] = latence
+    import serveur_local
+
+    serveur, url = serveur_local.demarrer_en_arriere_plan()
+    dossier_banc = os.path.join(DOSSIER_SORTIE, time.strftime("%Y%m%d_%H%M%S"))
+    print(f"🧪 Banc d'essai : {len(serveur_local.etat.cassette)} réponses de {cassette}, latence {latence}")
+    print(f"   Serveur local : {url} | Sorties : {dossier_banc}\n")
+
+    env = {
+        **os.environ,
+        "AUDIT_SERVEUR_LOCAL": url,
+        "AUDIT_CACHE_PATH": "",
+        "AZURE_DEPLOYMENT_NAME": os.getenv("AZURE_DEPLOYMENT_NAME") or "banc-essai",
+        "PYTHONUNBUFFERED": "1"
+    }
+    # Le rejeu ne doit pas réenregistrer la cassette
+    env.pop("AUDIT_CASSETTE", None)
+
+    resultats = []
+    references = {}
+    for moteur, mode in SCENARIOS:
+        dossier = os.path.join(dossier_banc, f"{moteur}_{mode}")
+        os.makedirs(dossier, exist_ok=True)
+        print(f"   ▶️  {moteur} / {mode} ...", flush=True)
+
+        avant = dict(serveur_local.etat.stats)
+        with open(os.path.join(dossier, "sortie.log"), "w", encoding="utf-8") as log:
+            retour = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--scenario", moteur, mode, run, dossier],
+                env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+        apres = serveur_local.etat.stats
+
+        chemin_mesure = os.path.join(dossier, FICHIER_MESURE)
+        if retour.returncode != 0 or not os.path.exists(chemin_mesure):
+            print(f"      ❌ Échec (code {retour.returncode}), voir {os.path.join(dossier, 'sortie.log')}")
+            resultats.append({"moteur": moteur, "mode": mode, "echec": True})
+            continue
+
+        with open(chemin_mesure, "r", encoding="utf-8") as f:
+            mesure = json.load(f)
+        latences = _latences(dossier)
+        empreintes = _empreintes(dossier)
+        resultats.append({
+            "moteur": moteur,
+            "mode": mode,
+            "duree_s": round(mesure["duree_s"], 3),
+            "appels": len(latences),
+            "appels_par_s": round(len(latences) / mesure["duree_s"], 2) if mesure["duree_s"] else 0.0,
+            "p50_s": round(percentile(latences, 50), 3),
+            "p95_s": round(percentile(latences, 95), 3),
+            "p99_s": round(percentile(latences, 99), 3),
+            "memoire_max_mo": round(mesure["memoire_max_mo"], 1),
+            "hors_cassette": apres["hors_cassette"] - avant["hors_cassette"],
+            "sorties": _comparer(empreintes, references.get(moteur))
+        })
+        references.setdefault(moteur, empreintes)
+
+    serveur.shutdown()
+    afficher_resultats(resultats)
+
+    chemin_resultats = os.path.join(dossier_banc, "resultats.json")
+    with open(chemin_resultats, "w", encoding="utf-8") as f:
+        json.dump({"cassette": cassette, "run": run, "latence": latence, "scenarios": resultats},
+                  f, indent=4, ensure_ascii=False)
+    print(f"\n💾 Résultats : {chemin_resultats}")
+    return resultats
+
+
+def afficher_resultats(resultats):
+    header = (f"   {'Moteur':<6} | {'Mode':<10} | {'Durée (s)':>9} | {'Appels':>6} | {'Appels/s':>8} | "
+              f"{'p50 (s)':>7} | {'p95 (s)':>7} | {'p99 (s)':>7} | {'Mém (Mo)':>8} | {'Hors K7':>7} | Sorties")
+    print("\n📊 Banc d'essai")
+    print(header)
+    print("   " + "-" * (len(header) - 3))
+    for r in resultats:
+        if r.get("echec"):
+            print(f"   {r['moteur']:<6} | {r['mode']:<10} | échec")
+            continue
+        print(
+            f"   {r['moteur']:<6} | {r['mode']:<10} | {r['duree_s']:>9.2f} | {r['appels']:>6} | "
+            f"{r['appels_par_s']:>8.2f} | {r['p50_s']:>7.3f} | {r['p95_s']:>7.3f} | {r['p99_s']:>7.3f} | "
+            f"{r['memoire_max_mo']:>8.1f} | {r['hors_cassette']:>7} | {r['sorties']}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--scenario":
+        executer_scenario(*sys.argv[2:6])
+    elif len(sys.argv) > 1:
+        lancer_banc(*sys.argv[1:4])
+    else:
+        print(__doc__)
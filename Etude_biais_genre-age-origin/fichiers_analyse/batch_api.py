@@ -0,0 +1,245 @@
+import json
+import os
+import time
+
+import client_llm
+from moteur import iterer_sections
+from reparation import FileReparation
+
+# Azure : "/chat/completions" ; OpenAI : "/v1/chat/completions"
+ENDPOINT_BATCH = os.getenv("AUDIT_BATCH_ENDPOINT", "/chat/completions")
+STATUTS_FINAUX = {"completed", "failed", "expired", "cancelled"}
+SEPARATEUR = "::"
+
+
+class ExecuteurBatch:
+    """
+    Audit différé d'une run via l'API Batch (fichier JSONL, tarif et quotas "batch").
+
+    1. preparer() : rend tous les prompts (biais x section x CV) dans batch/requetes.jsonl
+    2. soumettre() : upload du fichier + création du batch (état sauvé dans batch/etat_batch.json)
+    3. attendre()  : polling jusqu'à un statut final
+    4. ingerer()   : reconstruit Rapport_<biais>/audit_<biais>_<section>.json comme en mode direct
+
+    lancer() enchaîne les étapes et reprend un batch déjà soumis si l'état existe.
+    """
+
+    def __init__(self, analyseurs, input_root, output_root, run, client=None):
+        self.analyseurs = analyseurs
+        self.client = client or client_llm.client
+        self.run = run
+        self.run_input_path = os.path.join(input_root, run)
+        self.run_output_path = os.path.join(output_root, run)
+        self.dossier_batch = os.path.join(self.run_output_path, "batch")
+        self.chemin_requetes = os.path.join(self.dossier_batch, "requetes.jsonl")
+        self.chemin_etat = os.path.join(self.dossier_batch, "etat_batch.json")
+
+    # ------------------------------------------------------------------
+    # Données
+    # ------------------------------------------------------------------
+    def _sections(self):
+        return iterer_sections(self.analyseurs, self.run_input_path)
+
+    @staticmethod
+    def _custom_id(analyseur, section, cv_id):
+        return SEPARATEUR.join([analyseur.biais_name, section, cv_id])
+
+    def _charger_etat(self):
+        if not os.path.exists(self.chemin_etat):
+            return {}
+        with open(self.chemin_etat, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _sauver_etat(self, etat):
+        os.makedirs(self.dossier_batch, exist_ok=True)
+        with open(self.chemin_etat, "w", encoding="utf-8") as f:
+            json.dump(etat, f, indent=4, ensure_ascii=False)
+
+    # ------------------------------------------------------------------
+    # Étapes
+    # ------------------------------------------------------------------
+    def preparer(self):
+        """Écrit le fichier JSONL des requêtes restantes (hors résolutions locales et cache)."""
+        os.makedirs(self.dossier_batch, exist_ok=True)
+
+        nb_requetes = 0
+        nb_locaux = 0
+        nb_cache = 0
+
+        with open(self.chemin_requetes, "w", encoding="utf-8") as f:
+            for analyseur, section, paires in self._sections():
+                _, a_envoyer = analyseur._resoudre_localement(paires)
+                nb_locaux += len(paires) - len(a_envoyer)
+
+                for cv_id, original_data, biais_data in a_envoyer:
+                    requete = analyseur._requete(original_data, biais_data, cv_id)
+                    if client_llm.lire_cache(requete, analyseur.VERSION_PROMPT) is not None:
+                        nb_cache += 1
+                        continue
+
+                    ligne = {
+                        "custom_id": self._custom_id(analyseur, section, cv_id),
+                        "method": "POST",
+                        "url": ENDPOINT_BATCH,
+                        "body": requete
+                    }
+                    f.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+                    nb_requetes += 1
+
+        print(f"   📝 {nb_requetes} requêtes -> {self.chemin_requetes} "
+              f"({nb_locaux} résolues localement, {nb_cache} déjà en cache)")
+        return nb_requetes
+
+    def soumettre(self):
+        with open(self.chemin_requetes, "rb") as f:
+            fichier = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=fichier.id,
+            endpoint=ENDPOINT_BATCH,
+            completion_window="24h"
+        )
+        self._sauver_etat({
+            "run": self.run,
+            "batch_id": batch.id,
+            "input_file_id": fichier.id,
+            "soumis_le": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "statut": batch.status
+        })
+        print(f"   📤 Batch soumis : {batch.id} (statut : {batch.status})")
+        return batch.id
+
+    def attendre(self, batch_id, intervalle=60):
+        """Interroge le batch jusqu'à un statut final (Ctrl-C : l'état reste sur disque)."""
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            compteurs = getattr(batch, "request_counts", None)
+            avancement = f" {compteurs.completed}/{compteurs.total}" if compteurs else ""
+            print(f"   ⏳ Batch {batch_id} : {batch.status}{avancement}")
+
+            if batch.status in STATUTS_FINAUX:
+                return batch
+            time.sleep(intervalle)
+
+    def _lire_sorties(self, batch):
+        """custom_id -> contenu de la réponse, pour les requêtes réussies."""
+        reponses = {}
+        if not getattr(batch, "output_file_id", None):
+            return reponses
+
+        texte = self.client.files.content(batch.output_file_id).text
+        for ligne in texte.splitlines():
+            if not ligne.strip():
+                continue
+            sortie = json.loads(ligne)
+            response = sortie.get("response") or {}
+            if sortie.get("error") or response.get("status_code") != 200:
+                continue
+            try:
+                reponses[sortie["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                continue
+        return reponses
+
+    def ingerer(self, batch, completer_manquants=True):
+        """
+        Reconstruit les rapports d'audit à partir du fichier de sortie du batch.
+        Les requêtes absentes ou en erreur sont rejouées en appel direct si completer_manquants.
+        """
+        reponses = self._lire_sorties(batch)
+        print(f"   📥 {len(reponses)} réponses récupérées du batch {batch.id}")
+
+        for analyseur, section, paires in self._sections():
+            output_path = analyseur.chemin_rapport(self.run_output_path, section)
+            reparation = FileReparation(FileReparation.chemin_pour(output_path),
+                                        biais=analyseur.biais_name, section=section)
+            reparation.effacer()
+
+            verdicts, a_envoyer = analyseur._resoudre_localement(paires)
+            manquants = []
+
+            for cv_id, original_data, biais_data in a_envoyer:
+                requete = analyseur._requete(original_data, biais_data, cv_id)
+                contenu = reponses.get(self._custom_id(analyseur, section, cv_id))
+
+                if contenu is None:
+                    # Requête non soumise car déjà en cache au moment de preparer()
+                    contenu = client_llm.lire_cache(requete, analyseur.VERSION_PROMPT)
+                else:
+                    client_llm.memoriser(requete, analyseur.VERSION_PROMPT, contenu)
+
+                if contenu is None:
+                    manquants.append((cv_id, original_data, biais_data))
+                    continue
+
+                try:
+                    verdicts[cv_id] = analyseur._finaliser_verdict(
+                        analyseur._lire_verdict(contenu), cv_id, original_data, biais_data
+                    )
+                except Exception as e:
+                    # Réponse hors schéma : le CV passe en réparation (appel direct)
+                    print(f"      ❌ Erreur sur {cv_id}: {e}")
+                    reparation.noter_erreur(cv_id, e)
+                    manquants.append((cv_id, original_data, biais_data))
+
+            if manquants:
+                print(f"      ⚠️ {analyseur.biais_name}/{section} : {len(manquants)} CV(s) sans réponse batch valide")
+                if completer_manquants:
+                    verdicts.update(self._completer(analyseur, manquants, reparation))
+                    reparation.rejeter([p for p in manquants if p[0] not in verdicts])
+
+            rapport = [verdicts[cv_id] for cv_id, _, _ in paires if cv_id in verdicts]
+            analyseur._sauvegarder_rapport(rapport, output_path)
+
+        etat = self._charger_etat()
+        etat["statut"] = "ingere"
+        self._sauver_etat(etat)
+
+    @staticmethod
+    def _completer(analyseur, manquants, reparation):
+        """Rejoue en appel direct (avec rappel de l'erreur) les CVs sans réponse batch valide."""
+        verdicts = {}
+        a_rejouer, _ = reparation.repartir(manquants)
+        for _ in range(reparation.tentatives):
+            for cv_id, original_data, biais_data in a_rejouer:
+                resultat = analyseur._auditer_paire(cv_id, original_data, biais_data, reparation,
+                                                    reparer=cv_id in reparation.erreurs)
+                if resultat is not None:
+                    verdicts[cv_id] = resultat
+            a_rejouer = [p for p in a_rejouer if p[0] not in verdicts]
+        return verdicts
+
+    def lancer(self, attendre=True, intervalle=60):
+        """
+        Soumet la run (ou reprend le batch déjà soumis), puis attend et ingère si attendre=True.
+        Sans attente, relancer plus tard reprend automatiquement au polling.
+        """
+        if not client_llm.ANALYSIS_DEPLOYMENT_NAME:
+            raise ValueError("ERREUR: Variable AZURE_ANALYSIS_DEPLOYMENT_NAME manquante.")
+
+        etat = self._charger_etat()
+
+        if etat.get("batch_id") and etat.get("statut") != "ingere":
+            batch_id = etat["batch_id"]
+            print(f"   🔁 Reprise du batch déjà soumis : {batch_id}")
+        else:
+            if self.preparer() == 0:
+                print("   ✅ Rien à soumettre : tout est résolu localement ou en cache.")
+                self.ingerer(_BatchVide())
+                return
+            batch_id = self.soumettre()
+
+        if not attendre:
+            print("   ℹ️  Relancez plus tard pour récupérer les résultats.")
+            return
+
+        batch = self.attendre(batch_id, intervalle=intervalle)
+        if batch.status != "completed":
+            print(f"   ⚠️ Batch terminé avec le statut '{batch.status}' : ingestion des réponses disponibles.")
+        self.ingerer(batch)
+
+
+class _BatchVide:
+    """Batch fictif quand toutes les requêtes sont déjà résolues (local ou cache)."""
+    id = "aucun"
+    output_file_id = None
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class CacheVerdicts:
+    """
+    Cache disque (SQLite) des réponses LLM, adressé par contenu.
+
+    Clé = sha256(deployment, version du template de prompt, prompt rendu, paramètres de génération).
+    Un rerun sur des données inchangées ne repaie donc aucun appel.
+    Éviction : entrées plus vieilles que age_max_jours, puis les moins récemment lues
+    tant que la taille totale dépasse taille_max_mo.
+    """
+
+    def __init__(self, chemin, taille_max_mo=500, age_max_jours=90):
+        self.chemin = chemin
+        self.taille_max = int(taille_max_mo * 1024 * 1024)
+        self.age_max = age_max_jours * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+        self._conn = sqlite3.connect(chemin, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                cle TEXT PRIMARY KEY,
+                contenu TEXT NOT NULL,
+                taille INTEGER NOT NULL,
+                cree_le REAL NOT NULL,
+                lu_le REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self.evincer()
+
+    @staticmethod
+    def cle(requete, version_prompt):
+        """Hash stable d'une requête chat.completions (model, messages, paramètres)."""
+        params = {k: v for k, v in requete.items() if k not in ("model", "messages")}
+        payload = json.dumps({
+            "deployment": requete.get("model"),
+            "version_prompt": version_prompt,
+            "messages": requete.get("messages"),
+            "params": params
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lire(self, cle):
+        with self._lock:
+            ligne = self._conn.execute("SELECT contenu FROM verdicts WHERE cle = ?", (cle,)).fetchone()
+            if ligne is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE verdicts SET lu_le = ? WHERE cle = ?", (time.time(), cle))
+            self._conn.commit()
+            return ligne[0]
+
+    def ecrire(self, cle, contenu):
+        maintenant = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (cle, contenu, taille, cree_le, lu_le) VALUES (?, ?, ?, ?, ?)",
+                (cle, contenu, len(contenu.encode("utf-8")), maintenant, maintenant)
+            )
+            self._conn.commit()
+
+    def supprimer(self, cle):
+        with self._lock:
+            self._conn.execute("DELETE FROM verdicts WHERE cle = ?", (cle,))
+            self._conn.commit()
+
+    def evincer(self):
+        """Supprime les entrées périmées puis les moins récemment lues au-delà de la taille max."""
+        with self._lock:
+            self._conn.execute("DELETE FROM verdicts WHERE cree_le < ?", (time.time() - self.age_max,))
+
+            taille_totale = self._conn.execute("SELECT COALESCE(SUM(taille), 0) FROM verdicts").fetchone()[0]
+            if taille_totale > self.taille_max:
+                a_liberer = taille_totale - self.taille_max
+                cles = []
+                for cle, taille in self._conn.execute("SELECT cle, taille FROM verdicts ORDER BY lu_le ASC"):
+                    if a_liberer <= 0:
+                        break
+                    cles.append((cle,))
+                    a_liberer -= taille
+                self._conn.executemany("DELETE FROM verdicts WHERE cle = ?", cles)
+
+            self._conn.commit()
+
+    def rapport(self, reinitialiser=True):
+        """Affiche le bilan hits/misses depuis le dernier rapport."""
+        total = self.hits + self.misses
+        taux = (self.hits / total * 100) if total else 0.0
+        print(f"   💾 Cache : {self.hits} hits / {self.misses} misses ({taux:.1f}% servis depuis {self.chemin})")
+        if reinitialiser:
+            self.hits = 0
+            self.misses = 0
+        self.evincer()
@@ -0,0 +1,73 @@
+import json
+import re
+import unicodedata
+
+# Valeurs traitées comme absentes (cf. règles "not found" / champs vides du prompt)
+PLACEHOLDERS = {"", "not found", "non trouve", "none", "null", "n a", "na"}
+
+
+def normaliser_texte(texte):
+    """
+    Minuscules, sans accents ni ponctuation, espaces compactés.
+    "+" et "#" collés à un mot sont gardés : "C++", "C#" et "C" restent des compétences distinctes.
+    """
+    texte = unicodedata.normalize("NFKD", str(texte))
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    texte = re.sub(r"[^\w\s+#]|_", " ", texte.lower())
+    texte = re.sub(r"(?<![\w+#])[+#]+", " ", texte)
+    return re.sub(r"\s+", " ", texte).strip()
+
+
+def forme_canonique(valeur):
+    """
+    Forme canonique d'un payload de section (liste de dicts ou de chaînes).
+    - textes normalisés (casse, accents, ponctuation)
+    - placeholders "not found" / null / vides supprimés
+    - ordre des listes ignoré
+    Retourne None si la valeur est vide après nettoyage.
+    """
+    if valeur is None:
+        return None
+
+    if isinstance(valeur, dict):
+        champs = {}
+        for cle, val in valeur.items():
+            val_canon = forme_canonique(val)
+            if val_canon is not None:
+                champs[normaliser_texte(cle)] = val_canon
+        return champs or None
+
+    if isinstance(valeur, (list, tuple)):
+        elements = [forme_canonique(v) for v in valeur]
+        elements = [e for e in elements if e is not None]
+        if not elements:
+            return None
+        # Tri sur la représentation JSON : l'ordre des éléments ne compte pas
+        return sorted(elements, key=lambda e: json.dumps(e, sort_keys=True, ensure_ascii=False))
+
+    if isinstance(valeur, bool):
+        return valeur
+
+    texte = normaliser_texte(valeur)
+    return None if texte in PLACEHOLDERS else texte
+
+
+def payloads_equivalents(original_data, biais_data):
+    """True si les deux payloads sont identiques une fois canonisés (et l'Original non vide)."""
+    original_canon = forme_canonique(original_data)
+    if original_canon is None:
+        # "Original empty" reste une décision du LLM (règle 5 du prompt)
+        return False
+    return original_canon == forme_canonique(biais_data)
+
+
+def verdict_local(cv_id, source, details="Consistent"):
+    """Verdict cohérent produit sans appel LLM, avec sa provenance."""
+    return {
+        "cv_id": cv_id,
+        "coherent": True,
+        "empty_list": False,
+        "error_type": "None",
+        "details": details,
+        "verdict_source": source
+    }
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Enregistrement des appels réels (AUDIT_CASSETTE=chemin.jsonl), rejoués ensuite par serveur_local.py
+CHEMIN_ENREGISTREMENT = os.getenv("AUDIT_CASSETTE")
+
+
+class Cassette:
+    """
+    Paires requête / réponse d'une vraie run d'audit, en JSONL (une ligne par appel réussi).
+
+    Chaque ligne garde la requête, le contenu répondu, la latence de l'appel et l'usage en tokens.
+    Au rejeu, une requête est retrouvée par son empreinte (nom de déploiement exclu) ; si elle
+    a été enregistrée plusieurs fois, les réponses sont rendues à tour de rôle.
+    """
+
+    def __init__(self, chemin, charger=True):
+        self.chemin = chemin
+        self._lock = threading.Lock()
+        self.entrees = {}
+        self._positions = {}
+        if charger and chemin and os.path.exists(chemin):
+            with open(chemin, "r", encoding="utf-8") as f:
+                for ligne in f:
+                    if ligne.strip():
+                        entree = json.loads(ligne)
+                        self.entrees.setdefault(entree["cle"], []).append(entree)
+
+    @staticmethod
+    def cle(requete):
+        """Empreinte d'une requête chat.completions, indépendante du déploiement visé."""
+        payload = json.dumps({k: v for k, v in requete.items() if k != "model"}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return sum(len(e) for e in self.entrees.values())
+
+    def enregistrer(self, requete, contenu, latence, usage):
+        entree = {
+            "cle": self.cle(requete),
+            "horodatage": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "requete": requete,
+            "contenu": contenu,
+            "latence_s": round(latence, 4),
+            "usage": usage
+        }
+        with self._lock, open(self.chemin, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entree, ensure_ascii=False) + "\n")
+
+    def rejouer(self, requete):
+        """Entrée enregistrée pour cette requête, ou None si elle n'a jamais été vue."""
+        cle = self.cle(requete)
+        with self._lock:
+            entrees = self.entrees.get(cle)
+            if not entrees:
+                return None
+            position = self._positions.get(cle, 0)
+            self._positions[cle] = position + 1
+            return entrees[position % len(entrees)]
+
+
+def cassette_enregistrement():
+    """Cassette ouverte en écriture si AUDIT_CASSETTE est défini, sinon None."""
+    if not CHEMIN_ENREGISTREMENT:
+        return None
+    dossier = os.path.dirname(CHEMIN_ENREGISTREMENT)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    return Cassette(CHEMIN_ENREGISTREMENT, charger=False)
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import time
+from dotenv import load_dotenv
+from openai import AzureOpenAI, AsyncAzureOpenAI
+
+from cache_verdicts import CacheVerdicts
+from cassette import cassette_enregistrement
+from limiteur import LimiteurDebit, MAX_TENTATIVES, delai_backoff, delai_retry_after, estimer_tokens, \
+    est_limitation, est_relancable
+from schema_verdict import erreurs_verdict
+from telemetrie import telemetrie
+
+# --- Configuration Azure OpenAI ---
+load_dotenv()
+
+ANALYSIS_DEPLOYMENT_NAME = os.getenv("AZURE_DEPLOYMENT_NAME")
+
+# Bascule vers le serveur local (serveur_local.py) : tests de charge hors ligne, sans quota Azure
+SERVEUR_LOCAL = os.getenv("AUDIT_SERVEUR_LOCAL")
+
+# Nombre maximum de requêtes simultanées en mode async (surchargeable via .env)
+MAX_CONCURRENCE = int(os.getenv("AUDIT_MAX_CONCURRENCE", "16"))
+
+# Limiteur RPM/TPM + concurrence adaptative, commun à tous les analyseurs du processus
+limiteur = LimiteurDebit(concurrence_max=MAX_CONCURRENCE)
+
+# --- Cache disque des verdicts (AUDIT_CACHE_PATH="" pour le désactiver) ---
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CHEMIN_CACHE = os.getenv("AUDIT_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache_audit", "verdicts.sqlite"))
+
+cache = CacheVerdicts(
+    CHEMIN_CACHE,
+    taille_max_mo=float(os.getenv("AUDIT_CACHE_MAX_MO", "500")),
+    age_max_jours=float(os.getenv("AUDIT_CACHE_MAX_JOURS", "90"))
+) if CHEMIN_CACHE else None
+
+
+# --- Enregistrement des appels réels pour le banc d'essai (AUDIT_CASSETTE=chemin.jsonl) ---
+cassette = cassette_enregistrement()
+
+
+def parametres_azure():
+    """Paramètres de connexion communs aux clients synchrone et asynchrone."""
+    return {
+        "azure_endpoint": SERVEUR_LOCAL or os.getenv("AZURE_AI_ENDPOINT"),
+        "api_key": "local" if SERVEUR_LOCAL else os.getenv("AZURE_AI_KEY"),
+        "api_version": os.getenv("OPENAI_API_VERSION", "2024-08-01-preview"),
+        # Les relances sont gérées par completer() (limiteur partagé), pas par le SDK
+        "max_retries": 0
+    }
+
+
+if SERVEUR_LOCAL:
+    print(f"🧪 Appels LLM redirigés vers le serveur local : {SERVEUR_LOCAL}")
+
+client = AzureOpenAI(**parametres_azure())
+
+
+def creer_client_async():
+    """
+    Crée un client asynchrone.
+    Un nouveau client par boucle asyncio : le pool HTTP est lié à la boucle qui l'a créé.
+    """
+    return AsyncAzureOpenAI(**parametres_azure())
+
+
+def reponse_conforme(contenu):
+    """True si le contenu est un verdict, ou un lot {"verdicts": [...]} de verdicts, conforme au schéma."""
+    try:
+        donnees = json.loads(contenu.strip().replace("```json", "").replace("```", ""))
+    except (AttributeError, TypeError, ValueError):
+        return False
+    if isinstance(donnees, dict) and "verdicts" in donnees:
+        items = donnees["verdicts"]
+        return isinstance(items, list) and all(not erreurs_verdict(item) for item in items)
+    return not erreurs_verdict(donnees)
+
+
+def lire_cache(requete, version_prompt):
+    """Contenu déjà payé pour cette requête, ou None (une entrée hors schéma est évincée : l'appel est refait)."""
+    if not cache:
+        return None
+    cle = CacheVerdicts.cle(requete, version_prompt)
+    contenu = cache.lire(cle)
+    if contenu is not None and not reponse_conforme(contenu):
+        cache.supprimer(cle)
+        return None
+    return contenu
+
+
+def memoriser(requete, version_prompt, contenu):
+    """
+    Enregistre une réponse dans le cache.
+    Seules les réponses conformes au schéma du verdict sont conservées : sinon, la même requête
+    resservirait la même réponse rejetée à chaque exécution.
+    """
+    if not cache or not reponse_conforme(contenu):
+        return
+    cache.ecrire(CacheVerdicts.cle(requete, version_prompt), contenu)
+
+
+def _usage(response):
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        # Tokens du préfixe servis par le cache de prompt du fournisseur (facturés moins cher)
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0
+    }
+
+
+def _delai_relance(erreur, tentative):
+    """Délai avant la prochaine tentative, ou None si l'erreur ne se relance pas."""
+    if tentative + 1 >= MAX_TENTATIVES or not est_relancable(erreur):
+        return None
+    retry_after = delai_retry_after(erreur)
+    if est_limitation(erreur):
+        limiteur.signaler_limitation(retry_after)
+    if retry_after is not None:
+        return retry_after
+    return delai_backoff(tentative)
+
+
+def completer(requete, version_prompt, client_sync=None, cv_id=None):
+    """
+    Appel chat.completions synchrone, servi depuis le cache si la même requête a déjà été payée.
+    Passe par le limiteur partagé et relance les 429 / erreurs transitoires (Retry-After ou backoff).
+    Chaque appel est mesuré (telemetrie). Retourne le contenu texte de la réponse.
+    """
+    debut = time.perf_counter()
+    contenu = lire_cache(requete, version_prompt)
+    if contenu is not None:
+        telemetrie.enregistrer(time.perf_counter() - debut, cache=True, cv_id=cv_id)
+        return contenu
+
+    tokens = estimer_tokens(requete)
+    tentative = 0
+    while True:
+        limiteur.acquerir(tokens)
+        debut_tentative = time.perf_counter()
+        try:
+            response = (client_sync or client).chat.completions.create(**requete)
+        except Exception as e:
+            limiteur.liberer(succes=False)
+            delai = _delai_relance(e, tentative)
+            if delai is None:
+                telemetrie.enregistrer(time.perf_counter() - debut, retries=tentative,
+                                       resultat=type(e).__name__, cv_id=cv_id)
+                raise
+            tentative += 1
+            time.sleep(delai)
+            continue
+        limiteur.liberer()
+        break
+
+    usage = _usage(response)
+    telemetrie.enregistrer(time.perf_counter() - debut, retries=tentative, cv_id=cv_id, **usage)
+    contenu = response.choices[0].message.content
+    if cassette is not None:
+        cassette.enregistrer(requete, contenu, time.perf_counter() - debut_tentative, usage)
+
+    memoriser(requete, version_prompt, contenu)
+    return contenu
+
+
+async def completer_async(client_async, requete, version_prompt, cv_id=None):
+    """Équivalent asynchrone de completer()."""
+    debut = time.perf_counter()
+    contenu = lire_cache(requete, version_prompt)
+    if contenu is not None:
+        telemetrie.enregistrer(time.perf_counter() - debut, cache=True, cv_id=cv_id)
+        return contenu
+
+    tokens = estimer_tokens(requete)
+    tentative = 0
+    while True:
+        await limiteur.acquerir_async(tokens)
+        debut_tentative = time.perf_counter()
+        try:
+            response = await client_async.chat.completions.create(**requete)
+        except Exception as e:
+            limiteur.liberer(succes=False)
+            delai = _delai_relance(e, tentative)
+            if delai is None:
+                telemetrie.enregistrer(time.perf_counter() - debut, retries=tentative,
+                                       resultat=type(e).__name__, cv_id=cv_id)
+                raise
+            tentative += 1
+            await asyncio.sleep(delai)
+            continue
+        limiteur.liberer()
+        break
+
+    usage = _usage(response)
+    telemetrie.enregistrer(time.perf_counter() - debut, retries=tentative, cv_id=cv_id, **usage)
+    contenu = response.choices[0].message.content
+    if cassette is not None:
+        cassette.enregistrer(requete, contenu, time.perf_counter() - debut_tentative, usage)
+
+    memoriser(requete, version_prompt, contenu)
+    return contenu
+
+
+def rapport_cache():
+    """Bilan hits/misses du cache, à appeler en fin de run."""
+    if cache:
+        cache.rapport()
+
+
+def rapport_fin_de_run():
+    """Bilans de fin de run : télémétrie (latences, tokens, coût) puis cache."""
+    telemetrie.resume()
+    rapport_cache()
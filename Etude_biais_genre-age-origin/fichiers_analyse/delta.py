@@ -0,0 +1,193 @@
+import difflib
+import json
+import os
+import sys
+
+from alignement import JugeAlignement, affectation_optimale, sac, similarite
+from canonisation import normaliser_texte
+from serialisation import compacter, compter_tokens
+
+# Prompts en mode delta : contexte commun une fois + différences, au lieu des deux payloads complets
+# (0 = les deux payloads en entier)
+DELTA = os.getenv("AUDIT_PROMPT_DELTA", "0") != "0"
+
+# Gain minimal (en caractères) pour écrire un texte modifié en diff de mots plutôt qu'en deux valeurs
+LONGUEUR_MIN_DIFF = 20
+
+# Jetons des entrées (sans champ ni mot ignoré) pour l'alignement Original / variante
+_tokeniseur = JugeAlignement()
+
+
+def legende_delta(libelle_original, libelle_variante):
+    """Explication du format delta, ajoutée au préfixe statique des appels qui contiennent un delta."""
+    return (
+        f"DIFF (instead of both payloads): \"same\"=identical on both sides; \"changed\"="
+        f"field:[{libelle_original},{libelle_variante}] (null=absent) or text with [-removed-][+added+]; "
+        f"\"only_{libelle_original}\"/\"only_{libelle_variante}\"=entries on one side only."
+    )
+
+
+def diff_texte(a, b):
+    """
+    Un texte modifié écrit une seule fois, mots retirés en [-...-] et ajoutés en [+...+],
+    ou None si l'écriture n'est pas plus courte que les deux textes.
+    """
+    mots_a, mots_b = a.split(), b.split()
+    morceaux = []
+    for operation, i1, i2, j1, j2 in difflib.SequenceMatcher(None, mots_a, mots_b, autojunk=False).get_opcodes():
+        if operation == "equal":
+            morceaux.append(" ".join(mots_a[i1:i2]))
+            continue
+        if i2 > i1:
+            morceaux.append(f"[-{' '.join(mots_a[i1:i2])}-]")
+        if j2 > j1:
+            morceaux.append(f"[+{' '.join(mots_b[j1:j2])}+]")
+    texte = " ".join(morceaux)
+    return texte if len(texte) < len(a) + len(b) - LONGUEUR_MIN_DIFF else None
+
+
+def _egaux(a, b):
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return a == b
+    return normaliser_texte(a) == normaliser_texte(b)
+
+
+def _delta_entree(entree_o, entree_v):
+    """Entrées alignées : champs communs une fois, champs différents en [original, variante]."""
+    communs, differents = {}, {}
+    for cle in list(entree_o) + [c for c in entree_v if c not in entree_o]:
+        valeur_o, valeur_v = entree_o.get(cle), entree_v.get(cle)
+        if valeur_o is not None and valeur_v is not None and _egaux(valeur_o, valeur_v):
+            communs[cle] = valeur_o
+        elif isinstance(valeur_o, str) and isinstance(valeur_v, str) and diff_texte(valeur_o, valeur_v):
+            differents[cle] = diff_texte(valeur_o, valeur_v)
+        else:
+            differents[cle] = [valeur_o, valeur_v]
+    delta = {}
+    if communs:
+        delta["same"] = communs
+    if differents:
+        delta["changed"] = differents
+    return delta
+
+
+def _delta_entrees(liste_o, liste_v, libelle_o, libelle_v):
+    """Listes de dicts : alignement optimal (Dice sur les sacs de mots), puis delta par entrée."""
+    sacs_o = [sac(_tokeniseur.champs(e)) for e in liste_o]
+    sacs_v = [sac(_tokeniseur.champs(e)) for e in liste_v]
+    similarites = [[similarite(so, sv) for sv in sacs_v] for so in sacs_o]
+    paires = [(i, j) for i, j in affectation_optimale(similarites) if similarites[i][j] > 0]
+
+    identiques, alignees = [], []
+    for i, j in sorted(paires):
+        delta = _delta_entree(liste_o[i], liste_v[j])
+        if "changed" in delta:
+            alignees.append(delta)
+        else:
+            identiques.append(delta.get("same", {}))
+
+    alignes_o = {i for i, _ in paires}
+    alignes_v = {j for _, j in paires}
+    resultat = {}
+    if identiques:
+        resultat["same"] = identiques
+    if alignees:
+        resultat["aligned"] = alignees
+    seuls_o = [e for i, e in enumerate(liste_o) if i not in alignes_o]
+    seuls_v = [e for j, e in enumerate(liste_v) if j not in alignes_v]
+    if seuls_o:
+        resultat[f"only_{libelle_o}"] = seuls_o
+    if seuls_v:
+        resultat[f"only_{libelle_v}"] = seuls_v
+    return resultat
+
+
+def _delta_valeurs(liste_o, liste_v, libelle_o, libelle_v):
+    """Listes de textes : éléments communs une fois (comparaison normalisée, multiplicité gardée)."""
+    restants = list(liste_v)
+    communs, seuls_o = [], []
+    for element in liste_o:
+        trouve = next((k for k, e in enumerate(restants) if _egaux(element, e)), None)
+        if trouve is None:
+            seuls_o.append(element)
+        else:
+            communs.append(element)
+            restants.pop(trouve)
+    resultat = {}
+    if communs:
+        resultat["same"] = communs
+    if seuls_o:
+        resultat[f"only_{libelle_o}"] = seuls_o
+    if restants:
+        resultat[f"only_{libelle_v}"] = restants
+    return resultat
+
+
+def delta_structurel(original, variante, libelle_o="Original", libelle_v="Variant"):
+    """
+    Delta structurel entre deux payloads déjà préparés pour le prompt (compactés ou non).
+
+    - listes de dicts (experiences, studies) : entrées alignées, champs communs une fois,
+      champs différents en [original, variante], entrées sans vis-à-vis à part
+    - listes de textes (interests) : éléments communs une fois, éléments propres à chaque côté
+    - dicts (CV complet de l'audit de format) : delta clé par clé
+    """
+    if isinstance(original, dict) and isinstance(variante, dict):
+        resultat = {}
+        for cle in list(original) + [c for c in variante if c not in original]:
+            resultat[cle] = delta_structurel(original.get(cle), variante.get(cle), libelle_o, libelle_v)
+        return resultat
+
+    if isinstance(original, list) and isinstance(variante, list):
+        if all(isinstance(e, dict) for e in original + variante):
+            return _delta_entrees(original, variante, libelle_o, libelle_v)
+        return _delta_valeurs(original, variante, libelle_o, libelle_v)
+
+    if original is not None and variante is not None and _egaux(original, variante):
+        return {"same": original}
+    return {"changed": [original, variante]}
+
+
+def serialiser_delta(original, variante, libelle_o, libelle_v, compact=True):
+    """
+    Delta sérialisé pour le prompt, ou None quand les deux payloads complets restent préférables :
+    un côté vide (règles "Original empty" / liste vide) ou gain plus petit que la légende du format
+    delta, ajoutée au préfixe de l'appel.
+    """
+    if compact:
+        original, variante = compacter(original), compacter(variante)
+    if not original or not variante:
+        return None
+
+    separateurs = (",", ":") if compact else None
+    texte = json.dumps(delta_structurel(original, variante, libelle_o, libelle_v),
+                       ensure_ascii=False, separators=separateurs)
+    complet = len(json.dumps(original, ensure_ascii=False, separators=separateurs)) \
+        + len(json.dumps(variante, ensure_ascii=False, separators=separateurs))
+    return texte if len(texte) + len(legende_delta(libelle_o, libelle_v)) < complet else None
+
+
+if __name__ == "__main__":
+    # python delta.py <dossier_run> [biais] : tokens des deux payloads complets vs delta, par section
+    if len(sys.argv) < 2:
+        print("Usage : python delta.py <resultats_jointure_json/runX> [Age|Gender|Origin]")
+        sys.exit(1)
+
+    dossier_run = sys.argv[1]
+    biais = sys.argv[2] if len(sys.argv) > 2 else "Gender"
+
+    for fichier in sorted(os.listdir(dossier_run)):
+        if not fichier.endswith(".json"):
+            continue
+        with open(os.path.join(dossier_run, fichier), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        complets = deltas = 0
+        for variantes in data.values():
+            original, variante = variantes.get("Original", []), variantes.get(biais, [])
+            complet = json.dumps(compacter(original) or [], ensure_ascii=False, separators=(",", ":")) \
+                + json.dumps(compacter(variante) or [], ensure_ascii=False, separators=(",", ":"))
+            delta = serialiser_delta(original, variante, "Original", biais)
+            complets += compter_tokens(complet)
+            deltas += compter_tokens(delta if delta is not None else complet)
+        gain = 1 - deltas / complets if complets else 0.0
+        print(f"🔀 {fichier:<20} {complets:>9} -> {deltas:>9} tokens ({gain:.0%} économisés)")
@@ -0,0 +1,133 @@
+import hashlib
+import math
+import os
+import random
+
+# Demi-largeur visée de l'IC à 95 % du taux d'erreur d'une strate (ex: 0.02 = ±2 points).
+# Vide = audit complet (pas d'échantillonnage)
+DEMI_LARGEUR_CIBLE = float(os.getenv("AUDIT_DEMI_LARGEUR_CIBLE") or 0) or None
+
+# Nombre minimal de CVs audités par le LLM avant d'autoriser l'arrêt d'une strate
+TAILLE_MIN = int(os.getenv("AUDIT_ECHANTILLON_MIN", "30"))
+
+# Graine du tirage : même graine -> même ordre (reprise sur journal, comparaison entre runs)
+GRAINE = os.getenv("AUDIT_GRAINE_ECHANTILLON", "0")
+
+# Paramètre z pour un intervalle de confiance à 95%
+Z = 1.96
+
+
+def intervalle_wilson(nb_erreurs, n, z=Z):
+    """
+    Intervalle de Wilson pour un taux d'erreur (même formule que intervalle_wilson.py
+    et AnalyseStatistique.calculer_intervalle_confiance).
+
+    Returns:
+        tuple: (borne_inferieure, borne_superieure) en proportion (0 à 1).
+    """
+    if n == 0:
+        return 0.0, 1.0
+
+    p_hat = nb_erreurs / n
+    denominateur = 1 + (z ** 2) / n
+    centre_ajuste = p_hat + (z ** 2) / (2 * n)
+    racine = math.sqrt((p_hat * (1 - p_hat) / n) + (z ** 2) / (4 * n ** 2))
+
+    return (centre_ajuste - z * racine) / denominateur, (centre_ajuste + z * racine) / denominateur
+
+
+def est_erreur(verdict):
+    return verdict.get("coherent") is False
+
+
+class PlanEchantillonnage:
+    """
+    Échantillonnage séquentiel d'une strate (un biais x une section d'une run).
+
+    Les paires résolues localement sont toutes gardées (recensement, poids 1). Les paires qui
+    partent au LLM sont tirées dans un ordre aléatoire reproductible et auditées par vagues ;
+    après chaque vague, l'intervalle de Wilson du taux d'erreur de la strate est recalculé et
+    l'audit s'arrête dès que sa demi-largeur passe sous la cible.
+
+    Le taux de la strate combine la partie recensée et la partie échantillonnée :
+        taux = (erreurs_locales + N_llm * p_echantillon) / N
+    seule la seconde est incertaine, d'où demi-largeur = (N_llm / N) x demi-largeur de Wilson.
+    Chaque verdict échantillonné porte un poids N_llm / n pour que synthese.py redresse les comptes.
+    """
+
+    def __init__(self, strate, demi_largeur_cible=DEMI_LARGEUR_CIBLE, taille_min=TAILLE_MIN, graine=GRAINE):
+        self.strate = strate
+        self.demi_largeur_cible = demi_largeur_cible
+        self.taille_min = taille_min
+        self.graine = graine
+
+    def melanger(self, paires):
+        """Ordre de tirage des paires, fixé par la graine et la strate."""
+        germe = int(hashlib.sha256(f"{self.graine}|{self.strate}".encode("utf-8")).hexdigest()[:16], 16)
+        ordre = list(paires)
+        random.Random(germe).shuffle(ordre)
+        return ordre
+
+    def bilan(self, locaux, echantillon, population_llm):
+        """
+        Estimation courante pour la strate.
+
+        Args:
+            locaux (list): Verdicts résolus sans LLM (recensés).
+            echantillon (list): Verdicts LLM obtenus sur les paires tirées.
+            population_llm (int): Nombre de paires de la strate qui partent au LLM.
+        """
+        population = len(locaux) + population_llm
+        n = len(echantillon)
+        erreurs = sum(1 for v in echantillon if est_erreur(v))
+        erreurs_locales = sum(1 for v in locaux if est_erreur(v))
+
+        fraction = population_llm / population if population else 0.0
+        if population_llm == 0:
+            bas = haut = 0.0
+        else:
+            bas, haut = intervalle_wilson(erreurs, n)
+
+        return {
+            "population": population,
+            "resolus_localement": len(locaux),
+            "population_llm": population_llm,
+            "echantillon": n,
+            "erreurs_echantillon": erreurs,
+            "taux_estime": (erreurs_locales + population_llm * (erreurs / n if n else 0.0)) / population
+                           if population else 0.0,
+            "ic95": [(erreurs_locales + population_llm * bas) / population if population else 0.0,
+                     (erreurs_locales + population_llm * haut) / population if population else 0.0],
+            "demi_largeur": fraction * (haut - bas) / 2
+        }
+
+    def atteint(self, bilan):
+        """La précision visée est atteinte (et l'échantillon minimal audité)."""
+        minimum = min(self.taille_min, bilan["population_llm"])
+        return bilan["echantillon"] >= minimum and bilan["demi_largeur"] <= self.demi_largeur_cible
+
+    def decrire(self, bilan, arret):
+        """Plan d'échantillonnage recopié dans chaque verdict du rapport."""
+        return {
+            "strate": self.strate,
+            **bilan,
+            "taux_estime": round(bilan["taux_estime"], 6),
+            "ic95": [round(b, 6) for b in bilan["ic95"]],
+            "demi_largeur": round(bilan["demi_largeur"], 6),
+            "demi_largeur_cible": self.demi_largeur_cible,
+            "taille_min": self.taille_min,
+            "graine": self.graine,
+            "arret": arret
+        }
+
+    def ponderer(self, locaux, echantillon, bilan, arret):
+        """Ajoute "poids" et "plan_echantillonnage" aux verdicts gardés dans le rapport."""
+        plan = self.decrire(bilan, arret)
+        poids_echantillon = bilan["population_llm"] / bilan["echantillon"] if bilan["echantillon"] else 0.0
+        for verdict in locaux:
+            verdict["poids"] = 1.0
+            verdict["plan_echantillonnage"] = plan
+        for verdict in echantillon:
+            verdict["poids"] = round(poids_echantillon, 6)
+            verdict["plan_echantillonnage"] = plan
+        return plan
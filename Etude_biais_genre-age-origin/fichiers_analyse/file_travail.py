@@ -0,0 +1,466 @@
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+import client_llm
+from moteur import MODE_ASYNC, iterer_sections
+from reparation import FileReparation
+from risque import scores_risque
+from telemetrie import telemetrie
+from verification import JUGES
+
+# Base SQLite partagée par les travailleurs (main.py : resultats_analyses/file_travail.sqlite par défaut)
+CHEMIN_FILE = os.getenv("AUDIT_FILE_TRAVAIL")
+
+# Durée d'un bail en secondes : un travail réservé par un processus disparu redevient disponible ensuite
+DUREE_BAIL = float(os.getenv("AUDIT_FILE_BAIL", "600"))
+
+# Réservations d'un travail avant de le classer en échec (dead-letter au moment des rapports)
+TENTATIVES_MAX = int(os.getenv("AUDIT_FILE_TENTATIVES", "3"))
+
+# Pause (s) d'un travailleur sans travail disponible alors que d'autres détiennent encore des baux
+ATTENTE = float(os.getenv("AUDIT_FILE_ATTENTE", "15"))
+
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+FAIT = "fait"
+ECHEC = "echec"
+STATUTS = [EN_ATTENTE, EN_COURS, FAIT, ECHEC]
+
+
+class FileTravail:
+    """
+    File de travail durable (SQLite) des audits : une ligne par (analyse, run, section, cv_id).
+
+    - enfiler() est idempotent : relancer la même commande n'ajoute que les travaux absents.
+      Les paires résolues localement sont enregistrées directement comme faites ; les autres
+      portent leur score de risque (risque.py) et sont réservées par risque décroissant.
+    - reserver() attribue un paquet de travaux d'une même section à un travailleur, sous bail
+      (BEGIN IMMEDIATE : deux processus ne reçoivent jamais le même travail). Un bail expiré
+      (processus arrêté, machine perdue) remet ses travaux à disposition des autres.
+    - les verdicts sont écrits dès réception, seulement par le détenteur du bail ; un travail
+      déjà fait n'est jamais réécrit.
+    - materialiser() écrit les rapports habituels des sections terminées.
+
+    Les payloads sont stockés dans la base : un travailleur n'a besoin que du fichier SQLite
+    (disque local ou partage réseau avec verrous fiables ; pas de WAL, incompatible avec plusieurs machines).
+    """
+
+    def __init__(self, chemin, duree_bail=DUREE_BAIL, tentatives_max=TENTATIVES_MAX):
+        self.chemin = chemin
+        self.duree_bail = duree_bail
+        self.tentatives_max = tentatives_max
+        self._lock = threading.Lock()
+
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+
+        # Autocommit : les transactions sont ouvertes explicitement (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(chemin, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS travaux (
+                id INTEGER PRIMARY KEY,
+                analyse TEXT NOT NULL,
+                run TEXT NOT NULL,
+                section TEXT NOT NULL,
+                cv_id TEXT NOT NULL,
+                original TEXT NOT NULL,
+                variante TEXT NOT NULL,
+                contexte TEXT,
+                priorite REAL NOT NULL DEFAULT 0,
+                statut TEXT NOT NULL DEFAULT 'en_attente',
+                tentatives INTEGER NOT NULL DEFAULT 0,
+                travailleur TEXT,
+                bail_jusqu_a REAL,
+                verdict TEXT,
+                erreur TEXT,
+                maj_le REAL,
+                UNIQUE (analyse, run, section, cv_id)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS travaux_statut ON travaux (statut, analyse, priorite)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sections (
+                analyse TEXT NOT NULL,
+                run TEXT NOT NULL,
+                section TEXT NOT NULL,
+                sortie TEXT NOT NULL,
+                materialisee_le REAL,
+                PRIMARY KEY (analyse, run, section)
+            )
+        """)
+
+    def _transaction(self, operations):
+        """Exécute operations(conn) dans une transaction en écriture (verrou pris dès le début)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultat = operations(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return resultat
+
+    # ------------------------------------------------------------------
+    # Producteur
+    # ------------------------------------------------------------------
+    def enfiler(self, analyseur, run, section, paires, sortie, contextes=None):
+        """
+        Ajoute les paires (cv_id, original_data, biais_data) d'une section.
+
+        Args:
+            sortie (str): Dossier où materialiser() écrira le rapport (voir MoteurAudit.chemin_rapport_file).
+            contextes (dict): cv_id -> données recopiées au rapport (ex: reference_used de l'audit de forme).
+
+        Returns:
+            int: Nombre de travaux ajoutés (0 si la section était déjà en file).
+        """
+        contextes = contextes or {}
+        locaux, a_envoyer = analyseur._resoudre_localement(paires)
+        risques = scores_risque(a_envoyer) if analyseur.priorite_risque else {}
+        maintenant = time.time()
+
+        lignes = []
+        for cv_id, original_data, biais_data in paires:
+            verdict = locaux.get(cv_id)
+            lignes.append((
+                analyseur.biais_name, run, section, cv_id,
+                json.dumps(original_data, ensure_ascii=False), json.dumps(biais_data, ensure_ascii=False),
+                json.dumps(contextes[cv_id], ensure_ascii=False) if cv_id in contextes else None,
+                risques.get(cv_id, 0.0),
+                FAIT if verdict is not None else EN_ATTENTE,
+                json.dumps(verdict, ensure_ascii=False) if verdict is not None else None,
+                maintenant
+            ))
+
+        def inserer(conn):
+            avant = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO travaux
+                    (analyse, run, section, cv_id, original, variante, contexte, priorite, statut, verdict, maj_le)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, lignes)
+            ajoutes = conn.total_changes - avant
+            conn.execute("""
+                INSERT INTO sections (analyse, run, section, sortie) VALUES (?, ?, ?, ?)
+                ON CONFLICT (analyse, run, section) DO UPDATE SET sortie = excluded.sortie
+            """, (analyseur.biais_name, run, section, os.path.abspath(sortie)))
+            return ajoutes
+
+        ajoutes = self._transaction(inserer)
+        print(f"   📥 {analyseur.biais_name}/{run}/{section} : {ajoutes} travaux ajoutés "
+              f"({len(paires) - ajoutes} déjà en file, {len(locaux)} résolus localement)")
+        return ajoutes
+
+    # ------------------------------------------------------------------
+    # Travailleurs
+    # ------------------------------------------------------------------
+    def reserver(self, travailleur, analyses, nombre):
+        """
+        Réserve jusqu'à nombre travaux disponibles d'une même section (celle du travail le plus à risque).
+
+        Disponibles : en attente, ou en cours sous un bail expiré. Un bail expiré sans verdict
+        après tentatives_max réservations passe en échec.
+
+        Returns:
+            dict ou None: {"analyse", "run", "section", "travaux": [(id, cv_id, original, variante, verdict)]}
+        """
+        maintenant = time.time()
+        marques = ",".join("?" * len(analyses))
+        disponible = "(statut = ? OR (statut = ? AND bail_jusqu_a < ?))"
+
+        def reserver_paquet(conn):
+            conn.execute(f"""
+                UPDATE travaux SET statut = ?, travailleur = NULL, bail_jusqu_a = NULL, maj_le = ?,
+                                   erreur = COALESCE(erreur, 'bail expiré')
+                WHERE analyse IN ({marques}) AND statut = ? AND bail_jusqu_a < ?
+                      AND verdict IS NULL AND tentatives >= ?
+            """, (ECHEC, maintenant, *analyses, EN_COURS, maintenant, self.tentatives_max))
+
+            tete = conn.execute(f"""
+                SELECT analyse, run, section FROM travaux WHERE analyse IN ({marques}) AND {disponible}
+                ORDER BY priorite DESC, id LIMIT 1
+            """, (*analyses, EN_ATTENTE, EN_COURS, maintenant)).fetchone()
+            if tete is None:
+                return None
+
+            lignes = conn.execute(f"""
+                SELECT id, cv_id, original, variante, verdict FROM travaux
+                WHERE analyse = ? AND run = ? AND section = ? AND {disponible}
+                ORDER BY priorite DESC, id LIMIT ?
+            """, (*tete, EN_ATTENTE, EN_COURS, maintenant, nombre)).fetchall()
+
+            conn.executemany("""
+                UPDATE travaux SET statut = ?, travailleur = ?, bail_jusqu_a = ?, tentatives = tentatives + 1, maj_le = ?
+                WHERE id = ?
+            """, [(EN_COURS, travailleur, maintenant + self.duree_bail, maintenant, ligne[0]) for ligne in lignes])
+
+            return {
+                "analyse": tete[0],
+                "run": tete[1],
+                "section": tete[2],
+                "travaux": [
+                    (id_travail, cv_id, json.loads(original), json.loads(variante),
+                     json.loads(verdict) if verdict else None)
+                    for id_travail, cv_id, original, variante, verdict in lignes
+                ]
+            }
+
+        return self._transaction(reserver_paquet)
+
+    def ecrire_verdict(self, travailleur, id_travail, verdict):
+        """
+        Enregistre (ou remplace, ex: après vérification) le verdict d'un travail réservé et prolonge
+        le bail des autres travaux du paquet. Sans effet si le bail a été repris par un autre travailleur.
+
+        Returns:
+            bool: True si le verdict a été écrit.
+        """
+        maintenant = time.time()
+
+        def ecrire(conn):
+            ecrit = conn.execute("""
+                UPDATE travaux SET verdict = ?, maj_le = ? WHERE id = ? AND statut = ? AND travailleur = ?
+            """, (json.dumps(verdict, ensure_ascii=False), maintenant, id_travail, EN_COURS, travailleur)).rowcount
+            conn.execute("UPDATE travaux SET bail_jusqu_a = ? WHERE statut = ? AND travailleur = ?",
+                         (maintenant + self.duree_bail, EN_COURS, travailleur))
+            return ecrit == 1
+
+        return self._transaction(ecrire)
+
+    def terminer(self, travailleur, ids):
+        """Passe en fait les travaux du paquet qui ont un verdict ; les autres sont relâchés (voir relacher)."""
+        def terminer_paquet(conn):
+            conn.executemany("""
+                UPDATE travaux SET statut = ?, travailleur = NULL, bail_jusqu_a = NULL, maj_le = ?
+                WHERE id = ? AND statut = ? AND travailleur = ? AND verdict IS NOT NULL
+            """, [(FAIT, time.time(), id_travail, EN_COURS, travailleur) for id_travail in ids])
+
+        self._transaction(terminer_paquet)
+
+    def relacher(self, travailleur, ids, erreur, compter=True):
+        """
+        Remet en attente les travaux sans verdict du paquet, ou les classe en échec après tentatives_max.
+        compter=False (arrêt volontaire du travailleur) : la réservation n'est pas comptée comme une tentative.
+        """
+        def relacher_paquet(conn):
+            conn.executemany("""
+                UPDATE travaux SET tentatives = tentatives - ?, travailleur = NULL, bail_jusqu_a = NULL,
+                                   erreur = ?, maj_le = ?
+                WHERE id = ? AND statut = ? AND travailleur = ? AND verdict IS NULL
+            """, [(0 if compter else 1, erreur, time.time(), id_travail, EN_COURS, travailleur) for id_travail in ids])
+            conn.executemany("""
+                UPDATE travaux SET statut = CASE WHEN tentatives >= ? THEN ? ELSE ? END
+                WHERE id = ? AND statut = ? AND travailleur IS NULL
+            """, [(self.tentatives_max, ECHEC, EN_ATTENTE, id_travail, EN_COURS) for id_travail in ids])
+
+        self._transaction(relacher_paquet)
+
+    # ------------------------------------------------------------------
+    # Suivi et rapports
+    # ------------------------------------------------------------------
+    def avancement(self, analyses=None):
+        """Nombre de travaux par statut (toutes analyses si analyses est None)."""
+        requete = "SELECT statut, COUNT(*) FROM travaux"
+        parametres = ()
+        if analyses:
+            requete += f" WHERE analyse IN ({','.join('?' * len(analyses))})"
+            parametres = tuple(analyses)
+        with self._lock:
+            comptes = dict(self._conn.execute(requete + " GROUP BY statut", parametres).fetchall())
+        return {statut: comptes.get(statut, 0) for statut in STATUTS}
+
+    def afficher_avancement(self, analyses=None):
+        etat = self.avancement(analyses)
+        total = sum(etat.values())
+        print(f"   📋 File {self.chemin} : {etat[FAIT]}/{total} faits, {etat[EN_COURS]} en cours, "
+              f"{etat[EN_ATTENTE]} en attente, {etat[ECHEC]} en échec")
+        return etat
+
+    def materialiser(self, analyseurs):
+        """
+        Écrit le rapport de chaque section terminée (aucun travail en attente ni en cours), aux chemins
+        du mode direct ; les travaux en échec vont au dead-letter du rapport. Idempotent (écriture atomique).
+
+        Returns:
+            int: Nombre de rapports écrits.
+        """
+        par_analyse = {a.biais_name: a for a in analyseurs}
+        with self._lock:
+            sections = self._conn.execute("SELECT analyse, run, section, sortie FROM sections ORDER BY rowid").fetchall()
+
+        ecrits = 0
+        for analyse, run, section, sortie in sections:
+            analyseur = par_analyse.get(analyse)
+            if analyseur is None:
+                continue
+            with self._lock:
+                lignes = self._conn.execute("""
+                    SELECT cv_id, original, variante, contexte, statut, verdict, erreur FROM travaux
+                    WHERE analyse = ? AND run = ? AND section = ? ORDER BY id
+                """, (analyse, run, section)).fetchall()
+
+            restants = sum(1 for ligne in lignes if ligne[4] in (EN_ATTENTE, EN_COURS))
+            if restants:
+                print(f"   ⏳ {analyse}/{run}/{section} : {restants} travaux restants, rapport non écrit")
+                continue
+
+            rapport = [json.loads(verdict) for _, _, _, _, statut, verdict, _ in lignes if statut == FAIT]
+            contextes = {cv_id: json.loads(contexte) for cv_id, _, _, contexte, _, _, _ in lignes if contexte}
+            output_path = analyseur.chemin_rapport_file(sortie, section)
+
+            reparation = FileReparation(FileReparation.chemin_pour(output_path), biais=analyse, section=section)
+            reparation.effacer()
+            echecs = [(cv_id, json.loads(o), json.loads(v)) for cv_id, o, v, _, statut, _, _ in lignes if statut == ECHEC]
+            reparation.erreurs.update({cv_id: erreur for cv_id, _, _, _, statut, _, erreur in lignes if statut == ECHEC})
+            reparation.rejeter(echecs)
+
+            print(f"   📊 {analyse}/{run}/{section} -> {output_path}")
+            analyseur.ecrire_rapport_file(rapport, contextes, output_path)
+            self._transaction(lambda conn: conn.execute(
+                "UPDATE sections SET materialisee_le = ? WHERE analyse = ? AND run = ? AND section = ?",
+                (time.time(), analyse, run, section)
+            ))
+            ecrits += 1
+        return ecrits
+
+
+class JournalFile:
+    """
+    Journal d'un paquet réservé, à la place de JournalVerdicts : chaque verdict est écrit dans la file
+    dès réception. Les verdicts déjà écrits (bail repris après un arrêt) ne sont pas refaits.
+    """
+
+    def __init__(self, file, travailleur, paquet):
+        self.file = file
+        self.travailleur = travailleur
+        self.chemin = file.chemin
+        self.ids = {cv_id: id_travail for id_travail, cv_id, _, _, _ in paquet["travaux"]}
+        self.verdicts = {cv_id: verdict for _, cv_id, _, _, verdict in paquet["travaux"] if verdict is not None}
+
+    def ajouter(self, cv_id, verdict):
+        self.verdicts[cv_id] = verdict
+        self.file.ecrire_verdict(self.travailleur, self.ids[cv_id], verdict)
+
+
+class TravailleurFile:
+    """
+    Processus travailleur : réserve des paquets de travaux, les audite avec l'analyseur de leur biais
+    (auditer_paires, mode async), enregistre les verdicts, et recommence jusqu'à épuisement de la file.
+
+    Tant que d'autres travailleurs détiennent des baux, il attend : les travaux d'un bail expiré
+    lui reviennent. Le dernier travailleur à finir écrit les rapports (materialiser).
+    Lancer autant de travailleurs que voulu, sur une ou plusieurs machines, avec le même fichier SQLite.
+    """
+
+    def __init__(self, file, analyseurs, nom=None):
+        self.file = file
+        self.analyseurs = {a.biais_name: a for a in analyseurs}
+        self.nom = nom or f"{socket.gethostname()}-{os.getpid()}"
+
+    def _traiter(self, paquet, max_concurrence, taille_lot, juges):
+        analyseur = self.analyseurs[paquet["analyse"]]
+        paires = [(cv_id, original, variante) for _, cv_id, original, variante, _ in paquet["travaux"]]
+        ids = [id_travail for id_travail, _, _, _, _ in paquet["travaux"]]
+        print(f"   🔧 {self.nom} : {len(paires)} travaux {paquet['analyse']}/{paquet['run']}/{paquet['section']}")
+
+        erreur = "aucun verdict valide"
+        try:
+            analyseur.auditer_paires(
+                paires,
+                mode=MODE_ASYNC,
+                max_concurrence=max_concurrence,
+                taille_lot=taille_lot,
+                journal=JournalFile(self.file, self.nom, paquet),
+                section=paquet["section"],
+                juges=juges
+            )
+        except KeyboardInterrupt:
+            # Arrêt volontaire : le paquet est rendu tout de suite, sans attendre l'expiration du bail
+            self.file.terminer(self.nom, ids)
+            self.file.relacher(self.nom, ids, "travailleur interrompu", compter=False)
+            raise
+        except Exception as e:
+            # Les verdicts déjà écrits sont gardés, le reste du paquet repart en file
+            print(f"   ❌ Erreur sur le paquet : {e}")
+            erreur = f"{type(e).__name__}: {e}"
+
+        self.file.terminer(self.nom, ids)
+        self.file.relacher(self.nom, ids, erreur)
+
+    def lancer(self, max_concurrence=client_llm.MAX_CONCURRENCE, taille_lot=1, juges=JUGES, attente=ATTENTE):
+        """
+        Travaille jusqu'à ce que la file soit vide (aucun travail en attente ni en cours), puis écrit les rapports.
+        Un paquet compte max_concurrence x taille_lot travaux.
+        """
+        if not client_llm.ANALYSIS_DEPLOYMENT_NAME:
+            raise ValueError("ERREUR: Variable AZURE_ANALYSIS_DEPLOYMENT_NAME manquante.")
+
+        analyses = list(self.analyseurs)
+        print(f"🚀 Travailleur {self.nom} ({', '.join(analyses)}) sur {self.file.chemin}")
+        racine, _ = os.path.splitext(self.file.chemin)
+        telemetrie.demarrer(f"{racine}.metriques_{self.nom}.jsonl")
+
+        nombre = max_concurrence * max(1, taille_lot)
+        while True:
+            paquet = self.file.reserver(self.nom, analyses, nombre)
+            if paquet is not None:
+                self._traiter(paquet, max_concurrence, taille_lot, juges)
+                continue
+
+            etat = self.file.afficher_avancement(analyses)
+            if not etat[EN_COURS]:
+                break
+            # Baux détenus par d'autres travailleurs : repris ici s'ils expirent
+            time.sleep(attente)
+
+        client_llm.rapport_fin_de_run()
+        ecrits = self.file.materialiser(self.analyseurs.values())
+        print(f"✅ Travailleur {self.nom} : file épuisée, {ecrits} rapport(s) écrit(s)")
+
+
+def enfiler_runs(file, analyseurs, input_root, output_root, runs):
+    """Met en file toutes les sections de runs pour chaque biais (rapports dans output_root/<run>/Rapport_<biais>)."""
+    ajoutes = 0
+    for run in runs:
+        run_input_path = os.path.join(input_root, run)
+        if not os.path.isdir(run_input_path):
+            print(f"⚠️ Attention : Le dossier demandé '{run}' n'existe pas dans {input_root}.")
+            continue
+        for analyseur, section, paires in iterer_sections(analyseurs, run_input_path):
+            ajoutes += file.enfiler(analyseur, run, section, paires, os.path.join(output_root, run))
+    return ajoutes
+
+
+if __name__ == "__main__":
+    # python file_travail.py <file.sqlite> enfiler <resultats_jointure_json> <resultats_analyses> <run> [run ...]
+    # python file_travail.py <file.sqlite> travailler | materialiser | etat
+    if len(sys.argv) < 3 or sys.argv[2] not in ("enfiler", "travailler", "materialiser", "etat") \
+            or (sys.argv[2] == "enfiler" and len(sys.argv) < 6):
+        print("Usage : python file_travail.py <file.sqlite> enfiler <input_root> <output_root> <run> [run ...]")
+        print("        python file_travail.py <file.sqlite> travailler | materialiser | etat")
+        sys.exit(1)
+
+    from analyseage import AnalyseAge
+    from analysegenre import AnalyseGenre
+    from analyseorigin import AnalyseOrigin
+
+    file = FileTravail(sys.argv[1])
+    analyseurs = [AnalyseAge(), AnalyseGenre(), AnalyseOrigin()]
+    commande = sys.argv[2]
+
+    if commande == "enfiler":
+        enfiler_runs(file, analyseurs, sys.argv[3], sys.argv[4], sys.argv[5:])
+        file.afficher_avancement()
+    elif commande == "travailler":
+        TravailleurFile(file, analyseurs).lancer()
+    elif commande == "materialiser":
+        print(f"✅ {file.materialiser(analyseurs)} rapport(s) écrit(s)")
+    else:
+        file.afficher_avancement()
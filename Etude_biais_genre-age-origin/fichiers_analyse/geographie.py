@@ -0,0 +1,334 @@
+import os
+import sys
+
+from canonisation import PLACEHOLDERS, normaliser_texte
+from temporalite import ResolveurTemporel, est_vide
+
+# Champs de lieu des CVs réécrits sous forme canonique dans les prompts (sous-classes qui l'activent)
+LIEUX_NORMALISES = os.getenv("AUDIT_LIEUX_NORMALISES", "1") != "0"
+
+# Champs de lieu (clés normalisées)
+CHAMPS_LIEU = {"country or city", "city", "country", "location", "lieu", "ville", "pays"}
+
+# Étiquettes sans information de lieu ("City: Lille | Country: France")
+MOTS_ETIQUETTE = {"city", "country", "ville", "pays", "location", "lieu", "region"}
+
+# --- Index géographique embarqué (hors ligne) ---
+
+# Pays : nom affiché -> alias (anglais, français, codes ISO courants)
+PAYS = {
+    "France": ["fr", "fra"],
+    "United Kingdom": ["uk", "gb", "great britain", "england", "scotland", "wales", "royaume uni", "angleterre"],
+    "Ireland": ["ie", "irlande"],
+    "Germany": ["de", "deu", "allemagne", "deutschland"],
+    "Italy": ["ita", "italie", "italia"],
+    "Spain": ["es", "esp", "espagne", "espana"],
+    "Portugal": ["pt"],
+    "Belgium": ["belgique", "belgie"],
+    "Netherlands": ["nl", "the netherlands", "holland", "pays bas"],
+    "Luxembourg": ["lu"],
+    "Switzerland": ["ch", "suisse", "schweiz"],
+    "Austria": ["autriche", "osterreich"],
+    "Denmark": ["dk", "danemark"],
+    "Sweden": ["se", "suede", "sverige"],
+    "Norway": ["norvege", "norge"],
+    "Finland": ["fi", "finlande"],
+    "Poland": ["pl", "pologne", "polska"],
+    "Hungary": ["hu", "hongrie"],
+    "Czech Republic": ["cz", "czechia", "republique tcheque"],
+    "Greece": ["gr", "grece"],
+    "Romania": ["ro", "roumanie"],
+    "Russia": ["ru", "russie", "russian federation"],
+    "Turkey": ["tr", "turquie", "turkiye"],
+    "United States": ["us", "usa", "u s a", "united states of america", "america", "etats unis"],
+    "Canada": [],
+    "Mexico": ["mx", "mexique"],
+    "Brazil": ["br", "bresil", "brasil"],
+    "Argentina": ["ar", "argentine"],
+    "Chile": ["cl", "chili"],
+    "Colombia": ["colombie"],
+    "Peru": ["perou"],
+    "Japan": ["jp", "japon"],
+    "China": ["cn", "chine", "prc"],
+    "Hong Kong": ["hk"],
+    "Taiwan": ["tw"],
+    "South Korea": ["kr", "korea", "republic of korea", "coree du sud", "coree"],
+    "India": ["inde"],
+    "Pakistan": ["pk"],
+    "Bangladesh": ["bd"],
+    "Vietnam": ["vn", "viet nam"],
+    "Thailand": ["th", "thailande"],
+    "Singapore": ["sg", "singapour"],
+    "Malaysia": ["malaisie"],
+    "Indonesia": ["indonesie"],
+    "Philippines": ["ph"],
+    "Australia": ["au", "australie"],
+    "New Zealand": ["nz", "nouvelle zelande"],
+    "Senegal": ["sn"],
+    "Morocco": ["ma", "maroc"],
+    "Algeria": ["dz", "algerie"],
+    "Tunisia": ["tn", "tunisie"],
+    "Egypt": ["eg", "egypte"],
+    "Nigeria": ["ng"],
+    "Ghana": ["gh"],
+    "Ivory Coast": ["ci", "cote d ivoire", "cote divoire"],
+    "Cameroon": ["cm", "cameroun"],
+    "Kenya": ["ke"],
+    "South Africa": ["za", "afrique du sud"],
+    "Lebanon": ["lb", "liban"],
+    "Israel": ["il"],
+    "United Arab Emirates": ["ae", "uae", "emirats arabes unis"],
+    "Saudi Arabia": ["sa", "arabie saoudite"],
+    "Qatar": ["qa"]
+}
+
+# Régions et États : nom -> pays
+REGIONS = {
+    "ile de france": "France", "auvergne rhone alpes": "France", "hauts de france": "France",
+    "provence alpes cote d azur": "France", "paca": "France", "nouvelle aquitaine": "France",
+    "occitanie": "France", "pays de la loire": "France", "bretagne": "France", "brittany": "France",
+    "grand est": "France", "normandie": "France", "normandy": "France",
+    "bourgogne franche comte": "France", "centre val de loire": "France", "corse": "France",
+    "bavaria": "Germany", "bayern": "Germany", "lombardy": "Italy", "lombardia": "Italy",
+    "catalonia": "Spain", "cataluna": "Spain", "quebec": "Canada", "ontario": "Canada",
+    "british columbia": "Canada", "california": "United States",
+    "texas": "United States", "washington state": "United States", "oregon": "United States",
+    "michigan": "United States", "new york state": "United States", "ny": "United States",
+    "maharashtra": "India", "karnataka": "India", "haryana": "India",
+    "new south wales": "Australia", "victoria": "Australia"
+}
+
+# Villes : nom affiché -> (pays, alias)
+VILLES = {
+    # France
+    "Paris": ("France", []), "Lyon": ("France", []), "Marseille": ("France", ["marseilles"]),
+    "Lille": ("France", []), "Grenoble": ("France", []), "Nantes": ("France", []),
+    "Bordeaux": ("France", []), "Toulouse": ("France", []), "Nice": ("France", []),
+    "Strasbourg": ("France", []), "Montpellier": ("France", []), "Rennes": ("France", []),
+    "Reims": ("France", []), "Rouen": ("France", []), "Toulon": ("France", []),
+    "Dijon": ("France", []), "Angers": ("France", []), "Tours": ("France", []),
+    "Clermont-Ferrand": ("France", []), "Saint-Étienne": ("France", []), "Le Havre": ("France", []),
+    "Metz": ("France", []), "Nancy": ("France", []), "Orléans": ("France", []), "Caen": ("France", []),
+    "Brest": ("France", []), "Limoges": ("France", []), "Amiens": ("France", []), "Poitiers": ("France", []),
+    "Pau": ("France", []), "Avignon": ("France", []), "Annecy": ("France", []), "Cergy": ("France", []),
+    "La Défense": ("France", []), "Versailles": ("France", []), "Boulogne-Billancourt": ("France", []),
+    "Neuilly-sur-Seine": ("France", []), "Nanterre": ("France", []), "Saclay": ("France", []),
+    "Jouy-en-Josas": ("France", []), "Sophia Antipolis": ("France", []), "Écully": ("France", ["ecully"]),
+    "Fontainebleau": ("France", []), "Massy": ("France", []), "Courbevoie": ("France", []),
+    # Europe
+    "London": ("United Kingdom", ["londres"]), "Manchester": ("United Kingdom", []),
+    "Edinburgh": ("United Kingdom", ["edimbourg"]), "Birmingham": ("United Kingdom", []),
+    "Cambridge": ("United Kingdom", []), "Oxford": ("United Kingdom", []),
+    "Dublin": ("Ireland", []), "Cork": ("Ireland", []),
+    "Berlin": ("Germany", []), "Munich": ("Germany", ["munchen", "muenchen"]),
+    "Frankfurt": ("Germany", ["francfort", "frankfurt am main"]), "Hamburg": ("Germany", ["hambourg"]),
+    "Cologne": ("Germany", ["koln", "koeln"]), "Stuttgart": ("Germany", []), "Düsseldorf": ("Germany", []),
+    "Walldorf": ("Germany", []), "Wolfsburg": ("Germany", []), "Herzogenaurach": ("Germany", []),
+    "Milan": ("Italy", ["milano"]), "Rome": ("Italy", ["roma"]), "Turin": ("Italy", ["torino"]),
+    "Parma": ("Italy", ["parme"]), "Florence": ("Italy", ["firenze"]), "Naples": ("Italy", ["napoli"]),
+    "Bologna": ("Italy", ["bologne"]), "Venice": ("Italy", ["venise", "venezia"]),
+    "Madrid": ("Spain", []), "Barcelona": ("Spain", ["barcelone"]), "Valencia": ("Spain", []),
+    "Seville": ("Spain", ["sevilla", "seville"]), "Arteixo": ("Spain", []), "Bilbao": ("Spain", []),
+    "Lisbon": ("Portugal", ["lisbonne", "lisboa"]), "Porto": ("Portugal", []),
+    "Brussels": ("Belgium", ["bruxelles", "brussel"]), "Antwerp": ("Belgium", ["anvers", "antwerpen"]),
+    "Liège": ("Belgium", []), "Ghent": ("Belgium", ["gand", "gent"]),
+    "Amsterdam": ("Netherlands", []), "Rotterdam": ("Netherlands", []), "The Hague": ("Netherlands", ["la haye", "den haag"]),
+    "Eindhoven": ("Netherlands", []), "Utrecht": ("Netherlands", []),
+    "Zurich": ("Switzerland", ["zuerich"]), "Geneva": ("Switzerland", ["geneve", "genf"]),
+    "Zug": ("Switzerland", []), "Basel": ("Switzerland", ["bale"]), "Lausanne": ("Switzerland", []),
+    "Bern": ("Switzerland", ["berne"]), "Vevey": ("Switzerland", []),
+    "Vienna": ("Austria", ["vienne", "wien"]), "Salzburg": ("Austria", ["salzbourg"]),
+    "Copenhagen": ("Denmark", ["copenhague", "kobenhavn"]), "Billund": ("Denmark", []),
+    "Stockholm": ("Sweden", []), "Gothenburg": ("Sweden", ["goteborg"]),
+    "Oslo": ("Norway", []), "Stavanger": ("Norway", []), "Helsinki": ("Finland", []),
+    "Warsaw": ("Poland", ["varsovie", "warszawa"]), "Krakow": ("Poland", ["cracovie"]),
+    "Budapest": ("Hungary", []), "Prague": ("Czech Republic", ["praha"]), "Athens": ("Greece", ["athenes"]),
+    "Bucharest": ("Romania", ["bucarest"]), "Moscow": ("Russia", ["moscou", "moskva"]),
+    "Saint Petersburg": ("Russia", ["st petersburg", "saint petersbourg"]), "Istanbul": ("Turkey", []),
+    "Luxembourg": ("Luxembourg", ["luxembourg city", "luxembourg ville"]),
+    # Amériques
+    "New York": ("United States", ["new york city", "nyc", "manhattan"]),
+    "Washington D.C.": ("United States", ["washington d c", "washington dc", "washington"]),
+    "San Francisco": ("United States", []), "Los Angeles": ("United States", []),
+    "Seattle": ("United States", []), "Boston": ("United States", []), "Chicago": ("United States", []),
+    "San Jose": ("United States", []), "Santa Clara": ("United States", []), "Palo Alto": ("United States", []),
+    "Mountain View": ("United States", []), "Cupertino": ("United States", []), "Redmond": ("United States", []),
+    "Beaverton": ("United States", []), "Dearborn": ("United States", []), "Austin": ("United States", []),
+    "Houston": ("United States", []), "Miami": ("United States", []), "Atlanta": ("United States", []),
+    "Toronto": ("Canada", []), "Montreal": ("Canada", ["montreal qc"]), "Ottawa": ("Canada", []),
+    "Vancouver": ("Canada", []), "Quebec City": ("Canada", ["ville de quebec"]),
+    "Mexico City": ("Mexico", ["ciudad de mexico", "cdmx", "mexico df"]),
+    "São Paulo": ("Brazil", ["sao paulo"]), "Rio de Janeiro": ("Brazil", ["rio"]),
+    "Buenos Aires": ("Argentina", []), "Santiago": ("Chile", []), "Bogotá": ("Colombia", []), "Lima": ("Peru", []),
+    # Asie / Océanie
+    "Tokyo": ("Japan", []), "Osaka": ("Japan", []), "Kyoto": ("Japan", []),
+    "Seoul": ("South Korea", []), "Busan": ("South Korea", []),
+    "Shanghai": ("China", []), "Beijing": ("China", ["pekin", "peking"]), "Shenzhen": ("China", []),
+    "Guangzhou": ("China", ["canton"]), "Hangzhou": ("China", []),
+    "Hong Kong": ("Hong Kong", []), "Taipei": ("Taiwan", []), "Singapore": ("Singapore", ["singapour"]),
+    "Mumbai": ("India", ["bombay"]), "Bangalore": ("India", ["bengaluru"]), "Delhi": ("India", []),
+    "New Delhi": ("India", []), "Gurgaon": ("India", ["gurugram"]), "Hyderabad": ("India", []),
+    "Chennai": ("India", ["madras"]), "Pune": ("India", []), "Kolkata": ("India", ["calcutta"]),
+    "Noida": ("India", []), "Karachi": ("Pakistan", []), "Lahore": ("Pakistan", []), "Dhaka": ("Bangladesh", []),
+    "Hanoi": ("Vietnam", ["ha noi"]), "Ho Chi Minh City": ("Vietnam", ["ho chi minh", "saigon"]),
+    "Bangkok": ("Thailand", []), "Kuala Lumpur": ("Malaysia", []), "Jakarta": ("Indonesia", []),
+    "Manila": ("Philippines", ["manille"]),
+    "Sydney": ("Australia", []), "Melbourne": ("Australia", []), "Brisbane": ("Australia", []),
+    "Auckland": ("New Zealand", []),
+    # Afrique / Moyen-Orient
+    "Dakar": ("Senegal", []), "Casablanca": ("Morocco", []), "Rabat": ("Morocco", []), "Marrakech": ("Morocco", ["marrakesh"]),
+    "Algiers": ("Algeria", ["alger"]), "Tunis": ("Tunisia", []), "Cairo": ("Egypt", ["le caire"]),
+    "Lagos": ("Nigeria", []), "Abuja": ("Nigeria", []), "Accra": ("Ghana", []), "Abidjan": ("Ivory Coast", []),
+    "Douala": ("Cameroon", []), "Yaoundé": ("Cameroon", []), "Nairobi": ("Kenya", []),
+    "Johannesburg": ("South Africa", []), "Cape Town": ("South Africa", ["le cap"]),
+    "Beirut": ("Lebanon", ["beyrouth"]), "Tel Aviv": ("Israel", []),
+    "Dubai": ("United Arab Emirates", ["dubaï"]), "Abu Dhabi": ("United Arab Emirates", []),
+    "Riyadh": ("Saudi Arabia", ["riyad"]), "Doha": ("Qatar", [])
+}
+
+
+def _construire_index():
+    """Nom normalisé -> (ville, pays) ; ville None pour un pays ou une région."""
+    index = {}
+    for nom, alias in PAYS.items():
+        for cle in [nom] + alias:
+            index[normaliser_texte(cle)] = (None, nom)
+    for cle, pays in REGIONS.items():
+        index[normaliser_texte(cle)] = (None, pays)
+    # Les villes passent en dernier : "Singapore", "Hong Kong", "Luxembourg" sont des villes
+    for nom, (pays, alias) in VILLES.items():
+        for cle in [nom] + alias:
+            index[normaliser_texte(cle)] = (nom, pays)
+    return index
+
+
+INDEX = _construire_index()
+
+# Nombre maximal de mots d'un nom de l'index (appariement du plus long nom d'abord)
+MOTS_MAX = max(len(cle.split()) for cle in INDEX)
+
+
+class Lieu:
+    """Lieu reconnu : ville (None si seul le pays est connu) et pays."""
+
+    def __init__(self, ville, pays):
+        self.ville = ville
+        self.pays = pays
+
+    def compatible(self, autre):
+        """Même pays, et même ville quand les deux côtés en précisent une ("Paris" == "France")."""
+        if self.pays != autre.pays:
+            return False
+        return self.ville is None or autre.ville is None or self.ville == autre.ville
+
+    @property
+    def texte(self):
+        # La ville suffit : son pays s'en déduit
+        return self.ville or self.pays
+
+    def __repr__(self):
+        return f"Lieu({self.ville}, {self.pays})"
+
+
+def analyser_lieu(valeur):
+    """
+    Expression de lieu d'un CV -> Lieu.
+
+    Reconnaît villes, pays et régions de l'index embarqué, en anglais ou en français, quelle que
+    soit la mise en forme ("Paris", "PARIS, FRANCE", "City: Lille | Country: France",
+    "Grenoble, Auvergne-Rhône-Alpes France").
+
+    Returns:
+        Lieu, None si le lieu est absent ("not found", vide), ou False si un mot n'est pas reconnu
+        ou si les noms se contredisent ("Paris, Canada") : la paire reste alors au LLM.
+    """
+    if valeur is None:
+        return None
+    texte = normaliser_texte(valeur)
+    if texte in PLACEHOLDERS:
+        return None
+
+    mots = texte.split()
+    ville = pays = None
+    i = 0
+    while i < len(mots):
+        # Plus long nom de l'index qui commence à ce mot
+        for taille in range(min(MOTS_MAX, len(mots) - i), 0, -1):
+            entree = INDEX.get(" ".join(mots[i:i + taille]))
+            if entree is not None:
+                break
+        else:
+            if mots[i] not in MOTS_ETIQUETTE:
+                return False
+            i += 1
+            continue
+
+        ville_lue, pays_lu = entree
+        if pays is not None and pays_lu != pays:
+            return False
+        if ville is not None and ville_lue is not None and ville_lue != ville:
+            return False
+        pays = pays_lu
+        ville = ville or ville_lue
+        i += taille
+
+    if pays is None:
+        return False
+    return Lieu(ville, pays)
+
+
+def normaliser_lieu(valeur):
+    """Écriture canonique d'un lieu ("PARIS, FRANCE" -> "Paris"), ou la valeur d'origine."""
+    lieu = analyser_lieu(valeur)
+    return lieu.texte if lieu else valeur
+
+
+def normaliser_lieux(valeur):
+    """Copie d'un payload dont les champs de lieu sont réécrits sous forme canonique."""
+    if isinstance(valeur, dict):
+        return {
+            cle: normaliser_lieu(val) if est_champ_lieu(cle) and isinstance(val, str) else normaliser_lieux(val)
+            for cle, val in valeur.items()
+        }
+    if isinstance(valeur, list):
+        return [normaliser_lieux(v) for v in valeur]
+    return valeur
+
+
+def est_champ_lieu(cle):
+    return normaliser_texte(cle) in CHAMPS_LIEU
+
+
+def lieux_compatibles(lieu_o, lieu_v):
+    if est_vide(lieu_o) and est_vide(lieu_v) or normaliser_texte(lieu_o) == normaliser_texte(lieu_v):
+        return True
+    lieu_o = analyser_lieu(lieu_o)
+    lieu_v = analyser_lieu(lieu_v)
+    if not lieu_o or not lieu_v:
+        return False
+    return lieu_o.compatible(lieu_v)
+
+
+class ResolveurGeographique(ResolveurTemporel):
+    """
+    Verdict local pour les paires dont les seules différences portent sur les dates et les lieux,
+    et sont compatibles (règle GEOGRAPHIC RULE : une ville et son pays sont cohérents,
+    "Lyon, FR" == "France" ; plus la règle des dates de ResolveurTemporel).
+
+    Un lieu absent d'un seul côté, hors de l'index ou contradictoire laisse la paire au LLM.
+    """
+
+    details = "Consistent (only date granularity or location format differs)"
+    source = "geographie"
+
+    def comparateurs(self):
+        return {**super().comparateurs(), **{cle: lieux_compatibles for cle in CHAMPS_LIEU}}
+
+
+if __name__ == "__main__":
+    # python geographie.py "Lyon, FR" "France" : lecture et compatibilité de lieux
+    lieux = [analyser_lieu(valeur) for valeur in sys.argv[1:]]
+    for valeur, lieu in zip(sys.argv[1:], lieux):
+        print(f"📍 {valeur!r:<40} -> {lieu if lieu is not None else 'absent'}")
+    if len(lieux) == 2 and lieux[0] and lieux[1]:
+        print("✅ Compatibles" if lieux[0].compatible(lieux[1]) else "❌ Incompatibles")
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+
+
+class JournalVerdicts:
+    """
+    Journal JSONL des verdicts d'un rapport en cours (une ligne par CV, écrite dès réception).
+
+    Après un crash / Ctrl-C / clé expirée, relancer le même rapport ne retraite
+    que les CVs absents du journal. Le journal est supprimé une fois le rapport final écrit.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._lock = threading.Lock()
+        self.verdicts = self._charger()
+
+    @staticmethod
+    def chemin_pour(output_path):
+        """audit_age_interests.json -> audit_age_interests.journal.jsonl (ignoré par synthese.py)"""
+        racine, _ = os.path.splitext(output_path)
+        return racine + ".journal.jsonl"
+
+    def _tronquer_fin_partielle(self):
+        """
+        Coupe le fichier après la dernière ligne complète : sinon le prochain ajouter() écrirait
+        à la suite du fragment, et ce nouveau verdict serait perdu à son tour.
+        """
+        with open(self.chemin, "rb+") as f:
+            contenu = f.read()
+            if not contenu or contenu.endswith(b"\n"):
+                return
+            f.truncate(contenu.rfind(b"\n") + 1)
+
+    def _charger(self):
+        verdicts = {}
+        if not os.path.exists(self.chemin):
+            return verdicts
+
+        self._tronquer_fin_partielle()
+        with open(self.chemin, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    entree = json.loads(ligne)
+                except ValueError:
+                    # Ligne illisible : le CV sera refait
+                    continue
+                verdicts[entree["cv_id"]] = entree["verdict"]
+        return verdicts
+
+    def ajouter(self, cv_id, verdict):
+        ligne = json.dumps({"cv_id": cv_id, "verdict": verdict}, ensure_ascii=False)
+        with self._lock:
+            self.verdicts[cv_id] = verdict
+            with open(self.chemin, "a", encoding="utf-8") as f:
+                f.write(ligne + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clore(self):
+        """Supprime le journal (à appeler une fois le rapport final sauvegardé)."""
+        with self._lock:
+            if os.path.exists(self.chemin):
+                os.remove(self.chemin)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+# Quotas du déploiement Azure (0 = pas de limite côté client)
+RPM = float(os.getenv("AUDIT_RPM", "0"))
+TPM = float(os.getenv("AUDIT_TPM", "0"))
+
+# Politique de relance
+MAX_TENTATIVES = int(os.getenv("AUDIT_MAX_TENTATIVES", "6"))
+DELAI_BASE = 1.0
+DELAI_MAX = 60.0
+
+# Tokens de réponse comptés d'avance dans le budget TPM (réponse JSON courte)
+TOKENS_REPONSE_ESTIMES = 300
+
+# Codes HTTP pour lesquels une relance a un sens
+CODES_RELANCABLES = {408, 409, 429, 500, 502, 503, 504}
+ERREURS_RELANCABLES = {"APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError"}
+
+
+def estimer_tokens(requete):
+    """Estimation grossière (~4 caractères par token) du coût TPM d'une requête."""
+    texte = json.dumps(requete.get("messages", []), ensure_ascii=False)
+    return len(texte) // 4 + TOKENS_REPONSE_ESTIMES
+
+
+def est_limitation(erreur):
+    return getattr(erreur, "status_code", None) == 429 or type(erreur).__name__ == "RateLimitError"
+
+
+def est_relancable(erreur):
+    return (
+        est_limitation(erreur)
+        or getattr(erreur, "status_code", None) in CODES_RELANCABLES
+        or type(erreur).__name__ in ERREURS_RELANCABLES
+    )
+
+
+def delai_retry_after(erreur):
+    """Délai demandé par le serveur (en-têtes retry-after-ms / retry-after), ou None."""
+    response = getattr(erreur, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def delai_backoff(tentative):
+    """Backoff exponentiel avec jitter complet : uniforme dans [0, base * 2^tentative]."""
+    return random.uniform(0, min(DELAI_MAX, DELAI_BASE * 2 ** tentative))
+
+
+class _Seau:
+    """Seau à jetons : capacité = quota par minute, remplissage continu."""
+
+    def __init__(self, par_minute, maintenant):
+        self.capacite = par_minute
+        self.jetons = par_minute
+        self.dernier = maintenant
+
+    def _remplir(self, maintenant):
+        self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier) * self.capacite / 60)
+        self.dernier = maintenant
+
+    def attente(self, quantite, maintenant):
+        """Secondes à attendre avant de pouvoir consommer quantite (0 si disponible)."""
+        if not self.capacite:
+            return 0.0
+        self._remplir(maintenant)
+        # Une requête plus grosse que le quota entier passe dès que le seau est plein
+        quantite = min(quantite, self.capacite)
+        if self.jetons >= quantite:
+            return 0.0
+        return (quantite - self.jetons) * 60 / self.capacite
+
+    def consommer(self, quantite):
+        if self.capacite:
+            self.jetons -= min(quantite, self.capacite)
+
+
+class LimiteurDebit:
+    """
+    Limiteur partagé par tous les analyseurs du processus (Age, Genre, Origin, Extraction...).
+
+    - deux seaux à jetons : requêtes/minute (RPM) et tokens/minute (TPM, taille estimée du prompt)
+    - pause globale quand le serveur renvoie un Retry-After
+    - concurrence AIMD : divisée par 2 à chaque 429, +1 par "fenêtre" d'appels réussis
+    Utilisable depuis du code synchrone (threads) comme depuis asyncio.
+    horloge : source de temps monotone (remplaçable dans les tests).
+    """
+
+    def __init__(self, rpm=RPM, tpm=TPM, concurrence_max=16, horloge=time.monotonic):
+        self._lock = threading.Lock()
+        self.horloge = horloge
+        self.seau_requetes = _Seau(rpm, horloge())
+        self.seau_tokens = _Seau(tpm, horloge())
+        self.concurrence_max = concurrence_max
+        self.concurrence = float(concurrence_max)
+        self.en_vol = 0
+        self.pause_jusqua = 0.0
+
+    def _reserver(self, tokens):
+        """Réserve une place si possible ; sinon retourne le temps d'attente conseillé."""
+        with self._lock:
+            maintenant = self.horloge()
+            if maintenant < self.pause_jusqua:
+                return self.pause_jusqua - maintenant
+            if self.en_vol >= max(1, int(self.concurrence)):
+                return 0.05
+            attente = max(
+                self.seau_requetes.attente(1, maintenant),
+                self.seau_tokens.attente(tokens, maintenant)
+            )
+            if attente > 0:
+                return attente
+            self.seau_requetes.consommer(1)
+            self.seau_tokens.consommer(tokens)
+            self.en_vol += 1
+            return 0.0
+
+    def acquerir(self, tokens):
+        while True:
+            attente = self._reserver(tokens)
+            if not attente:
+                return
+            time.sleep(attente)
+
+    async def acquerir_async(self, tokens):
+        while True:
+            attente = self._reserver(tokens)
+            if not attente:
+                return
+            await asyncio.sleep(attente)
+
+    def liberer(self, succes=True):
+        with self._lock:
+            self.en_vol -= 1
+            if succes:
+                # Additive increase : +1 après environ "concurrence" succès
+                self.concurrence = min(self.concurrence_max, self.concurrence + 1 / self.concurrence)
+
+    def signaler_limitation(self, retry_after=None):
+        """429 reçu : multiplicative decrease, et pause globale si le serveur l'a demandée."""
+        with self._lock:
+            self.concurrence = max(1.0, self.concurrence / 2)
+            if retry_after:
+                self.pause_jusqua = max(self.pause_jusqua, self.horloge() + retry_after)
@@ -0,0 +1,818 @@
+import asyncio
+import json
+import os
+
+import client_llm
+from canonisation import payloads_equivalents, verdict_local
+from delta import DELTA, legende_delta, serialiser_delta
+from echantillonnage import DEMI_LARGEUR_CIBLE, PlanEchantillonnage
+from journal import JournalVerdicts
+from predicteur import charger_predicteur
+from reparation import FileReparation
+from risque import PRIORITE_RISQUE, ordonner_par_risque
+from serialisation import COMPACT, LEGENDE, compter_tokens, serialiser, utilise_alias
+from schema_verdict import erreurs_verdict, format_reponse, valider_verdict
+from telemetrie import telemetrie
+from geographie import normaliser_lieux
+from temporalite import normaliser_dates
+from verification import JUGES, depouiller, motif_escalade, requete_juge
+from client_llm import ANALYSIS_DEPLOYMENT_NAME, MAX_CONCURRENCE
+
+# Modes d'exécution disponibles pour generer_rapports
+MODE_SEQUENTIEL = "sequentiel"
+MODE_ASYNC = "async"
+MODES = [MODE_SEQUENTIEL, MODE_ASYNC]
+
+
+def iterer_sections(analyseurs, run_input_path):
+    """
+    Itère (analyseur, section, paires) pour plusieurs biais d'une même run.
+    Chaque fichier de section n'est lu qu'une fois, quel que soit le nombre d'analyseurs.
+    """
+    for filename in analyseurs[0].REQUIRED_FILES:
+        chemin = os.path.join(run_input_path, filename)
+        if not os.path.isfile(chemin):
+            print(f"   ⚠️ Manquant : {filename}")
+            continue
+
+        with open(chemin, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        section = filename.replace(".json", "")
+        for analyseur in analyseurs:
+            yield analyseur, section, analyseur._paires_section(data)
+
+
+class MoteurAudit:
+    """
+    Boucle d'audit commune à toutes les classes Analyse :
+    runs -> fichiers de section -> CVs -> appel LLM -> audit_<biais>_<section>.json
+
+    Les sous-classes fournissent `biais_name` et les deux moitiés de chaque prompt :
+    `prompt_systeme` / `prompt_systeme_lot` (règles, sans aucune donnée de CV) et
+    `prompt_donnees` / `prompt_donnees_lot` (données propres aux CVs).
+    """
+    # Version du template de prompt : à incrémenter quand un prompt_* change
+    # (fait partie de la clé du cache de verdicts)
+    VERSION_PROMPT = "2"
+
+    # Paires Original/variante identiques après canonisation : verdict local, sans appel LLM
+    court_circuit_canonique = True
+
+    # Juge local d'alignement champ par champ (sections experiences / studies), None = désactivé.
+    # Seuls les verdicts cohérents dont la confiance atteint juge_alignement.seuil évitent l'appel LLM.
+    juge_alignement = None
+
+    # Paires envoyées au LLM par risque d'incohérence décroissant (risque.py) : une run partielle
+    # (quota épuisé, interruption) a déjà audité la plupart des erreurs. Sans effet sur le rapport.
+    priorite_risque = PRIORITE_RISQUE
+
+    # Résolveur local des paires qui ne diffèrent que par des dates ou des lieux compatibles
+    # (temporalite.ResolveurTemporel, geographie.ResolveurGeographique), None = désactivé
+    resolveur_champs = None
+
+    # Classifieur appris sur les verdicts LLM passés (predicteur.py), None = désactivé. Chargé par
+    # __init__ si AUDIT_PREDICTEUR=1. Dernière étape locale : seules les paires prédites cohérentes
+    # au-dessus de son seuil évitent l'appel LLM
+    predicteur = None
+
+    # Champs de date réécrits sous forme normalisée ("2021-09 to 2022-06") avant d'être mis dans
+    # le prompt : le modèle compare des intervalles déjà alignés
+    dates_normalisees = False
+
+    # Champs de lieu réécrits sous forme canonique ("PARIS, FRANCE" -> "Paris") dans le prompt
+    lieux_normalises = False
+
+    # Payloads écrits en JSON compact (serialisation.py) : champs vides omis, clés aliasées,
+    # légende des alias ajoutée au préfixe statique
+    prompt_compact = COMPACT
+
+    # Mode delta (delta.py) : contexte commun une fois + différences au lieu des deux payloads complets,
+    # schéma du verdict inchangé. libelle_original nomme le côté de référence dans le delta
+    prompt_delta = DELTA
+    libelle_original = "Original"
+
+    # Noms des fichiers attendus
+    REQUIRED_FILES = [
+        "interests.json",
+        "experiences.json",
+        "studies.json"
+    ]
+
+    def __init__(self, biais_name):
+        self.biais_name = biais_name
+        # À l'instanciation et non à l'import : le prédicteur n'agit que si AUDIT_PREDICTEUR=1
+        self.predicteur = charger_predicteur()
+
+    def process_runs(self, input_root="Runs_jointure", output_root="Runs_analyse", target_runs=None,
+                     mode=MODE_SEQUENTIEL, max_concurrence=MAX_CONCURRENCE, taille_lot=1,
+                     demi_largeur_cible=DEMI_LARGEUR_CIBLE, juges=JUGES):
+        """
+        Scanne le dossier input_root et lance l'analyse.
+
+        Args:
+            input_root (str): Dossier source.
+            output_root (str): Dossier de destination.
+            target_runs (list or str): Liste des dossiers à traiter (ex: ["run1", "run3"])
+                                       ou une seule chaine (ex: "run1").
+                                       Si None, traite TOUS les dossiers trouvés.
+            mode (str): "sequentiel" (un appel après l'autre) ou "async" (appels concurrents).
+            max_concurrence (int): Nombre maximum d'appels simultanés en mode "async".
+            taille_lot (int): Nombre de CVs (même biais, même section) regroupés par prompt.
+            demi_largeur_cible (float): Si fourni, échantillonnage séquentiel : chaque section s'arrête
+                                        dès que l'IC à 95 % de son taux d'erreur est à ± cette valeur.
+            juges (int): Nombre total de juges des verdicts vérifiés (1 = un seul appel par paire).
+        """
+        if not os.path.exists(input_root):
+            print(f"❌ Erreur : Le dossier '{input_root}' n'existe pas.")
+            return
+
+        # 1. Récupération de tous les dossiers existants
+        all_available_runs = [d for d in os.listdir(input_root) if os.path.isdir(os.path.join(input_root, d))]
+
+        # 2. Filtrage selon la demande de l'utilisateur
+        runs_to_process = []
+
+        if target_runs:
+            # Si l'utilisateur a passé une seule string (ex: "run1"), on la met dans une liste
+            if isinstance(target_runs, str):
+                target_runs = [target_runs]
+
+            # On ne garde que les runs demandées qui existent vraiment sur le disque
+            for run in target_runs:
+                if run in all_available_runs:
+                    runs_to_process.append(run)
+                else:
+                    print(f"⚠️ Attention : Le dossier demandé '{run}' n'existe pas dans {input_root}.")
+        else:
+            # Si target_runs est None, on prend tout
+            runs_to_process = all_available_runs
+
+        runs_to_process.sort()
+
+        if not runs_to_process:
+            print("❌ Aucune run à traiter.")
+            return
+
+        print(f"🚀 Démarrage de l'analyse '{self.biais_name}' sur {len(runs_to_process)} runs : {runs_to_process}\n")
+
+        for run_folder in runs_to_process:
+            print(f"🔹 Traitement : {run_folder}")
+            telemetrie.demarrer(os.path.join(output_root, run_folder, "metriques_appels.jsonl"))
+
+            run_input_path = os.path.join(input_root, run_folder)
+            dossier_rapport = f"Rapport_{self.biais_name.lower()}"
+            run_output_path = os.path.join(output_root, run_folder, dossier_rapport)
+
+            fichiers_a_traiter = []
+            for filename in self.REQUIRED_FILES:
+                f = os.path.join(run_input_path, filename)
+                if os.path.isfile(f):
+                    fichiers_a_traiter.append(f)
+                else:
+                    print(f"   ⚠️ Manquant : {filename}")
+
+            if fichiers_a_traiter:
+                self.generer_rapports(fichiers_a_traiter, run_output_path,
+                                      mode=mode, max_concurrence=max_concurrence, taille_lot=taille_lot,
+                                      demi_largeur_cible=demi_largeur_cible, juges=juges)
+            else:
+                print("   ❌ Aucun fichier valide trouvé pour cette run.")
+
+            client_llm.rapport_fin_de_run()
+            print(f"   ✅ Fin de {run_folder}\n")
+
+    def generer_rapports(self, fichiers, output_dir, mode=MODE_SEQUENTIEL, max_concurrence=MAX_CONCURRENCE,
+                         taille_lot=1, demi_largeur_cible=DEMI_LARGEUR_CIBLE, juges=JUGES):
+        if not ANALYSIS_DEPLOYMENT_NAME:
+            raise ValueError("ERREUR: Variable AZURE_ANALYSIS_DEPLOYMENT_NAME manquante.")
+
+        # Création récursive du dossier (ex: Runs_analyse/run1/Rapport_age)
+        os.makedirs(output_dir, exist_ok=True)
+
+        for chemin_complet in fichiers:
+            output_path, data = self._preparer_section(chemin_complet, output_dir)
+
+            journal = JournalVerdicts(JournalVerdicts.chemin_pour(output_path))
+            rapport_categorie = self.auditer_paires(
+                self._paires_section(data),
+                mode=mode,
+                max_concurrence=max_concurrence,
+                taille_lot=taille_lot,
+                journal=journal,
+                section=os.path.basename(chemin_complet).replace(".json", ""),
+                chemin_rejets=FileReparation.chemin_pour(output_path),
+                demi_largeur_cible=demi_largeur_cible,
+                juges=juges
+            )
+
+            self._sauvegarder_rapport(rapport_categorie, output_path)
+            journal.clore()
+
+    def auditer_paires(self, paires, mode=MODE_SEQUENTIEL, max_concurrence=MAX_CONCURRENCE, taille_lot=1,
+                       journal=None, section=None, chemin_rejets=None, demi_largeur_cible=None, juges=1):
+        """
+        Audite une liste ordonnée de paires (cv_id, original_data, biais_data).
+
+        Args:
+            mode (str): "sequentiel" ou "async".
+            max_concurrence (int): Nombre maximum d'appels simultanés en mode "async".
+            taille_lot (int): Nombre de CVs regroupés par prompt (1 = un appel par CV).
+                              Les CVs absents de la réponse d'un lot repassent en appel unitaire.
+            journal (JournalVerdicts): Si fourni, chaque verdict y est écrit dès réception
+                                       et les CVs déjà journalisés ne sont pas refaits.
+            section (str): Étiquette de section pour la télémétrie (ex: "interests").
+            chemin_rejets (str): Fichier dead-letter des CVs toujours sans verdict valide après réparation.
+            demi_largeur_cible (float): Si fourni, seul un échantillon aléatoire des paires est audité
+                                        (voir _auditer_echantillon) ; les verdicts portent alors
+                                        "poids" et "plan_echantillonnage".
+            juges (int): Si > 1, les verdicts LLM incohérents (ou pour lesquels le juge local hésitait)
+                         sont soumis à juges - 1 appels indépendants supplémentaires, lancés en
+                         concurrence ; le rapport garde le verdict majoritaire (voir _verifier).
+
+        Returns:
+            list: Les verdicts, dans l'ordre des paires (les CVs en échec sont absents du rapport
+                  et listés dans chemin_rejets).
+        """
+        if mode not in MODES:
+            raise ValueError(f"ERREUR: Mode '{mode}' inconnu (attendus : {MODES}).")
+
+        verdicts, restantes, noter = self._reprendre(paires, journal)
+        reparation = self._file_reparation(chemin_rejets, section)
+
+        with telemetrie.contexte(biais=self.biais_name, section=section):
+            if demi_largeur_cible:
+                plan = PlanEchantillonnage(f"{self.biais_name}/{section}", demi_largeur_cible)
+                return self._auditer_echantillon(paires, verdicts, noter, reparation, plan,
+                                                 mode, max_concurrence, taille_lot, juges)
+            if mode == MODE_ASYNC:
+                asyncio.run(self._auditer_paires_async(restantes, max_concurrence, taille_lot, noter, reparation))
+            else:
+                self._auditer_paires_sync(restantes, taille_lot, noter, reparation)
+            self._verifier(paires, verdicts, noter, juges, max_concurrence)
+
+        return [verdicts[cv_id] for cv_id, _, _ in paires if cv_id in verdicts]
+
+    async def auditer_paires_partage(self, client_async, semaphore, paires, taille_lot=1, journal=None,
+                                     section=None, chemin_rejets=None, juges=1):
+        """
+        Variante coroutine d'auditer_paires() : le client et le sémaphore sont fournis par l'appelant,
+        ce qui permet de faire tourner plusieurs biais / sections dans une même boucle
+        sous une seule limite globale d'appels simultanés.
+        """
+        verdicts, restantes, noter = self._reprendre(paires, journal)
+        reparation = self._file_reparation(chemin_rejets, section)
+
+        with telemetrie.contexte(biais=self.biais_name, section=section):
+            await self._auditer_restantes_async(client_async, semaphore, restantes, taille_lot, noter, reparation)
+            await self._verifier_async(client_async, semaphore, self._candidats_verification(paires, verdicts),
+                                       verdicts, noter, juges)
+
+        return [verdicts[cv_id] for cv_id, _, _ in paires if cv_id in verdicts]
+
+    def _file_reparation(self, chemin_rejets, section):
+        reparation = FileReparation(chemin_rejets, biais=self.biais_name, section=section)
+        # Les rejets d'une exécution précédente sont retentés : ils ne sont pas au journal
+        reparation.effacer()
+        return reparation
+
+    @staticmethod
+    def _reprendre(paires, journal):
+        """Verdicts déjà journalisés, paires restantes, et fonction d'enregistrement des nouveaux verdicts."""
+        verdicts = {}
+        if journal is not None and journal.verdicts:
+            verdicts.update(journal.verdicts)
+            print(f"      🔁 Reprise : {len(journal.verdicts)} verdicts déjà au journal {journal.chemin}")
+
+        restantes = [p for p in paires if p[0] not in verdicts]
+
+        def noter(nouveaux):
+            """Enregistre les verdicts dès leur arrivée (journal sur disque)."""
+            verdicts.update(nouveaux)
+            if journal is not None:
+                for cv_id, verdict in nouveaux.items():
+                    journal.ajouter(cv_id, verdict)
+
+        return verdicts, restantes, noter
+
+    def _auditer_paires_sync(self, paires, taille_lot, noter, reparation):
+        locaux, a_envoyer = self._resoudre_localement(paires)
+        a_envoyer = self._ordonner(a_envoyer)
+        noter(locaux)
+        self._prevoir_appels(a_envoyer, taille_lot)
+        obtenus = set(locaux)
+
+        for lot in self._decouper_lots(a_envoyer, taille_lot):
+            resultat_lot = self._auditer_lot(lot)
+            noter(resultat_lot)
+            obtenus.update(resultat_lot)
+
+        for cv_id, original_data, biais_data in a_envoyer:
+            if cv_id in obtenus:
+                continue
+            resultat = self._auditer_paire(cv_id, original_data, biais_data, reparation)
+            if resultat is not None:
+                noter({cv_id: resultat})
+                obtenus.add(cv_id)
+
+        # Réparation : les CVs sans verdict valide sont rejoués en fin de passe
+        a_rejouer, rejetes = reparation.repartir([p for p in a_envoyer if p[0] not in obtenus])
+        for _ in range(reparation.tentatives):
+            if not a_rejouer:
+                break
+            print(f"      🔧 Réparation : {len(a_rejouer)} CV(s) rejoués")
+            for cv_id, original_data, biais_data in a_rejouer:
+                resultat = self._auditer_paire(cv_id, original_data, biais_data, reparation, reparer=True)
+                if resultat is not None:
+                    noter({cv_id: resultat})
+                    obtenus.add(cv_id)
+            a_rejouer = [p for p in a_rejouer if p[0] not in obtenus]
+
+        reparation.rejeter(rejetes + a_rejouer)
+
+    async def _auditer_paires_async(self, paires, max_concurrence, taille_lot, noter, reparation):
+        semaphore = asyncio.Semaphore(max_concurrence)
+        async with client_llm.creer_client_async() as client_async:
+            await self._auditer_restantes_async(client_async, semaphore, paires, taille_lot, noter, reparation)
+
+    async def _auditer_restantes_async(self, client_async, semaphore, paires, taille_lot, noter, reparation):
+        locaux, a_envoyer = self._resoudre_localement(paires)
+        a_envoyer = self._ordonner(a_envoyer)
+        noter(locaux)
+        self._prevoir_appels(a_envoyer, taille_lot)
+        obtenus = set(locaux)
+
+        async def lot_note(lot):
+            resultat_lot = await self._auditer_lot_async(client_async, semaphore, lot)
+            noter(resultat_lot)
+            obtenus.update(resultat_lot)
+
+        async def paire_notee(cv_id, original_data, biais_data, reparer=False):
+            resultat = await self._auditer_paire_async(client_async, semaphore, cv_id, original_data, biais_data,
+                                                       reparation, reparer=reparer)
+            if resultat is not None:
+                noter({cv_id: resultat})
+                obtenus.add(cv_id)
+
+        await asyncio.gather(*[lot_note(lot) for lot in self._decouper_lots(a_envoyer, taille_lot)])
+
+        restants = [p for p in a_envoyer if p[0] not in obtenus]
+        await asyncio.gather(*[paire_notee(*p) for p in restants])
+
+        # Réparation : les CVs sans verdict valide sont rejoués en fin de passe
+        a_rejouer, rejetes = reparation.repartir([p for p in a_envoyer if p[0] not in obtenus])
+        for _ in range(reparation.tentatives):
+            if not a_rejouer:
+                break
+            print(f"      🔧 Réparation : {len(a_rejouer)} CV(s) rejoués")
+            await asyncio.gather(*[paire_notee(*p, reparer=True) for p in a_rejouer])
+            a_rejouer = [p for p in a_rejouer if p[0] not in obtenus]
+
+        reparation.rejeter(rejetes + a_rejouer)
+
+    def _auditer_echantillon(self, paires, verdicts, noter, reparation, plan, mode, max_concurrence, taille_lot,
+                             juges=1):
+        """
+        Audit par échantillonnage séquentiel d'une section (voir echantillonnage.PlanEchantillonnage).
+
+        Les paires résolues localement sont toutes gardées ; les autres sont tirées dans un ordre
+        aléatoire fixé par la graine et auditées par vagues (taille_lot CVs en séquentiel,
+        max_concurrence x taille_lot en async) jusqu'à ce que l'IC de Wilson de la section soit
+        assez étroit. Une reprise sur journal retrouve le même ordre et ne refait aucun appel.
+        L'arrêt est décidé sur les premiers verdicts ; la vérification (juges > 1) porte ensuite
+        sur les paires gardées et le bilan final est recalculé sur les verdicts majoritaires.
+
+        Returns:
+            list: Verdicts recensés + verdicts de l'échantillon, dans l'ordre des paires.
+        """
+        locaux, _ = self._resoudre_localement([p for p in paires if p[0] not in verdicts])
+        noter(locaux)
+        recenses = [cv_id for cv_id, _, _ in paires if verdicts.get(cv_id, {}).get("verdict_source")]
+        tirage = plan.melanger([p for p in paires if not verdicts.get(p[0], {}).get("verdict_source")])
+        pas = max(1, taille_lot) * (max_concurrence if mode == MODE_ASYNC else 1)
+
+        def echantillon(position):
+            """Verdicts obtenus sur les position premières paires tirées (CVs rejetés exclus)."""
+            return [verdicts[cv_id] for cv_id, _, _ in tirage[:position] if cv_id in verdicts]
+
+        def bilan(position):
+            return plan.bilan([verdicts[cv_id] for cv_id in recenses], echantillon(position), len(tirage))
+
+        suivi = {"position": 0, "bilan": bilan(0)}
+
+        def vagues():
+            """Vagues de paires tirées encore sans verdict ; le bilan est mis à jour après chacune."""
+            while suivi["position"] < len(tirage) and not plan.atteint(suivi["bilan"]):
+                debut = suivi["position"]
+                suivi["position"] = min(debut + pas, len(tirage))
+                vague = [p for p in tirage[debut:suivi["position"]] if p[0] not in verdicts]
+                if vague:
+                    yield vague
+                suivi["bilan"] = bilan(suivi["position"])
+
+        if mode == MODE_ASYNC:
+            asyncio.run(self._auditer_vagues_async(vagues(), max_concurrence, taille_lot, noter, reparation))
+        else:
+            for vague in vagues():
+                self._auditer_paires_sync(vague, taille_lot, noter, reparation)
+
+        gardes = set(recenses) | {cv_id for cv_id, _, _ in tirage[:suivi["position"]]}
+        self._verifier([p for p in paires if p[0] in gardes], verdicts, noter, juges, max_concurrence)
+
+        etat = bilan(suivi["position"])
+        arret = "population_epuisee" if suivi["position"] >= len(tirage) else "precision"
+        echantillonnes = echantillon(suivi["position"])
+        plan.ponderer([verdicts[cv_id] for cv_id in recenses], echantillonnes, etat, arret)
+
+        print(f"      🎯 Échantillon {plan.strate} : {etat['echantillon']}/{etat['population_llm']} CVs audités par le LLM "
+              f"(+{etat['resolus_localement']} recensés), taux {etat['taux_estime']:.2%} "
+              f"± {etat['demi_largeur']:.2%} (arrêt : {arret})")
+
+        return [verdicts[cv_id] for cv_id, _, _ in paires if cv_id in gardes]
+
+    async def _auditer_vagues_async(self, vagues, max_concurrence, taille_lot, noter, reparation):
+        """Vagues successives d'un échantillonnage, sur un seul client et un seul sémaphore."""
+        semaphore = asyncio.Semaphore(max_concurrence)
+        async with client_llm.creer_client_async() as client_async:
+            for vague in vagues:
+                await self._auditer_restantes_async(client_async, semaphore, vague, taille_lot, noter, reparation)
+
+    def _avis_local(self, cv_id, original_data, biais_data):
+        """Verdict du juge local d'alignement sur une paire partie au LLM (None s'il ne s'est pas prononcé)."""
+        if self.juge_alignement is None:
+            return None
+        return self.juge_alignement.juger(cv_id, original_data, biais_data)
+
+    def _candidats_verification(self, paires, verdicts):
+        """
+        (paire, motif) des verdicts à soumettre aux juges supplémentaires.
+        Les verdicts locaux (règles déterministes), ceux imposés par _finaliser_verdict (extraction vide)
+        et ceux déjà vérifiés (reprise sur journal) sont exclus.
+        """
+        candidats = []
+        for cv_id, original_data, biais_data in paires:
+            verdict = verdicts.get(cv_id)
+            if verdict is None or verdict.get("verdict_source") or "verification" in verdict:
+                continue
+            avis = self._avis_local(cv_id, original_data, biais_data)
+            motif = motif_escalade(verdict, avis["confiance"] if avis is not None else None,
+                                   desaccord_local=avis is not None and self.juge_alignement.incoherence_sure(avis))
+            if motif:
+                candidats.append(((cv_id, original_data, biais_data), motif))
+        return candidats
+
+    def _verifier(self, paires, verdicts, noter, juges, max_concurrence):
+        """
+        Vote à plusieurs juges, seulement pour les verdicts escaladés : un seul appel par paire
+        dans le cas courant, juges - 1 appels indépendants (température et graine différentes)
+        en concurrence pour les verdicts incohérents ou douteux.
+        """
+        if juges <= 1:
+            return
+        candidats = self._candidats_verification(paires, verdicts)
+        if not candidats:
+            return
+
+        async def verifier_tout():
+            semaphore = asyncio.Semaphore(max_concurrence)
+            async with client_llm.creer_client_async() as client_async:
+                await self._verifier_async(client_async, semaphore, candidats, verdicts, noter, juges)
+
+        asyncio.run(verifier_tout())
+
+    async def _verifier_async(self, client_async, semaphore, candidats, verdicts, noter, juges):
+        if juges <= 1 or not candidats:
+            return
+        print(f"      🗳️  Vérification : {len(candidats)} verdict(s) soumis à {juges - 1} juge(s) supplémentaire(s)")
+        telemetrie.prevoir(len(candidats) * (juges - 1))
+
+        async def verifier(paire, motif):
+            cv_id = paire[0]
+            with telemetrie.releve() as releves:
+                avis = await asyncio.gather(*[
+                    self._avis_juge(client_async, semaphore, paire, numero) for numero in range(1, juges)
+                ])
+            noter({cv_id: depouiller(verdicts[cv_id], avis, motif, releves)})
+
+        await asyncio.gather(*[verifier(paire, motif) for paire, motif in candidats])
+
+        inverses = sum(1 for (cv_id, _, _), _ in candidats
+                       if verdicts[cv_id]["coherent"] != verdicts[cv_id]["verification"]["verdict_initial"])
+        cout = sum(verdicts[cv_id]["verification"]["cout_supplementaire_usd"] for (cv_id, _, _), _ in candidats)
+        egalites = sum(1 for (cv_id, _, _), _ in candidats if verdicts[cv_id]["verification"]["egalite"])
+        print(f"      🗳️  {inverses}/{len(candidats)} verdict(s) inversé(s) par la majorité, "
+              f"coût supplémentaire {cout:.4f} $")
+        if egalites:
+            print(f"      ⚖️  {egalites} vote(s) à égalité : verdict initial conservé")
+
+    async def _avis_juge(self, client_async, semaphore, paire, numero):
+        """Verdict d'un juge supplémentaire, ou None si l'appel échoue (le vote n'est pas compté)."""
+        cv_id, original_data, biais_data = paire
+        try:
+            requete = requete_juge(self._requete(original_data, biais_data, cv_id), numero)
+            async with semaphore:
+                contenu = await client_llm.completer_async(client_async, requete, self.VERSION_PROMPT, cv_id=cv_id)
+            return self._finaliser_verdict(self._lire_verdict(contenu), cv_id, original_data, biais_data)
+
+        except Exception as e:
+            print(f"      ❌ Erreur juge {numero} sur {cv_id}: {e}")
+            return None
+
+    def chemin_rapport(self, run_output_path, section):
+        """<run>/Rapport_<biais>/audit_<biais>_<section>.json (dossier créé au besoin)."""
+        biais = self.biais_name.lower()
+        output_dir = os.path.join(run_output_path, f"Rapport_{biais}")
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, f"audit_{biais}_{section}.json")
+
+    def chemin_rapport_file(self, sortie, section):
+        """Rapport d'une section de la file de travail (file_travail.py) : même chemin qu'en mode direct."""
+        return self.chemin_rapport(sortie, section)
+
+    def ecrire_rapport_file(self, rapport, contextes, output_path):
+        """Écrit le rapport d'une section terminée de la file de travail (contextes : cv_id -> données d'enfilage)."""
+        self._sauvegarder_rapport(rapport, output_path)
+
+    def _preparer_section(self, chemin_complet, output_dir):
+        """Charge un fichier de section et calcule le chemin du rapport associé."""
+        nom_fichier_seul = os.path.basename(chemin_complet)
+        nom_propre = nom_fichier_seul.replace(".json", "") # ex: interests
+
+        # Nom du fichier de sortie : audit_age_interests.json
+        output_filename = f"audit_{self.biais_name.lower()}_{nom_propre}.json"
+        output_path = os.path.join(output_dir, output_filename)
+
+        print(f"   📊 Analyse : {nom_fichier_seul} -> {output_path}")
+
+        with open(chemin_complet, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        return output_path, data
+
+    def _paires_section(self, data):
+        """{cv_id: {"Original": [...], biais: [...]}} -> [(cv_id, original_data, biais_data)]"""
+        return [
+            (cv_id, variants.get("Original", []), variants.get(self.biais_name, []))
+            for cv_id, variants in data.items()
+        ]
+
+    def _prevoir_appels(self, a_envoyer, taille_lot):
+        """Annonce à la télémétrie le nombre d'appels à venir (ETA de la ligne de progression)."""
+        lots = self._decouper_lots(a_envoyer, taille_lot)
+        telemetrie.prevoir(len(lots) if lots else len(a_envoyer))
+
+    @staticmethod
+    def _decouper_lots(paires, taille_lot):
+        if taille_lot <= 1:
+            return []
+        return [paires[i:i + taille_lot] for i in range(0, len(paires), taille_lot)]
+
+    def _construire_requete(self, systeme, donnees, lot=False):
+        """
+        Paramètres de l'appel chat.completions.
+        Les règles (system) forment un préfixe identique octet pour octet d'un appel à l'autre,
+        les données du CV (user) viennent en dernier : le cache de préfixe du fournisseur s'applique.
+        La réponse est contrainte par le schéma JSON du verdict (ou d'un lot de verdicts).
+        """
+        return {
+            "model": ANALYSIS_DEPLOYMENT_NAME,
+            "messages": [
+                {"role": "system", "content": systeme},
+                {"role": "user", "content": donnees}
+            ],
+            "response_format": format_reponse(lot)
+        }
+
+    def _normaliser_payload(self, payload):
+        if self.dates_normalisees:
+            payload = normaliser_dates(payload)
+        if self.lieux_normalises:
+            payload = normaliser_lieux(payload)
+        return payload
+
+    def serialiser_payload(self, payload):
+        """
+        Écriture d'un payload dans prompt_donnees / prompt_donnees_lot : dates et lieux normalisés,
+        puis JSON compact, selon les options de la classe. Les tokens gagnés sur json.dumps verbatim
+        sont comptés par biais et section dans la télémétrie.
+        """
+        verbatim = json.dumps(payload, ensure_ascii=False)
+        if not (self.dates_normalisees or self.lieux_normalises or self.prompt_compact):
+            return verbatim
+        texte = serialiser(self._normaliser_payload(payload), compact=self.prompt_compact)
+        telemetrie.compter_serialisation(compter_tokens(verbatim), compter_tokens(texte))
+        return texte
+
+    def _delta(self, original_data, biais_data):
+        if not self.prompt_delta:
+            return None
+        return serialiser_delta(self._normaliser_payload(original_data), self._normaliser_payload(biais_data),
+                                self.libelle_original, self.biais_name, compact=self.prompt_compact)
+
+    def delta_payloads(self, original_data, biais_data):
+        """
+        Delta Original / variante écrit pour prompt_donnees (mode prompt_delta), ou None : les deux
+        payloads sont alors écrits en entier par serialiser_payload.
+        """
+        texte = self._delta(original_data, biais_data)
+        if texte is not None:
+            verbatim = json.dumps(original_data, ensure_ascii=False) + json.dumps(biais_data, ensure_ascii=False)
+            telemetrie.compter_serialisation(compter_tokens(verbatim), compter_tokens(texte))
+        return texte
+
+    def _systeme(self, prompt_systeme, paires):
+        """
+        Préfixe statique, suivi des légendes utiles aux données de l'appel : format delta si une
+        paire est écrite en delta, alias si une clé aliasée apparaît. Les préfixes possibles sont en
+        nombre fixe, chacun identique d'un appel à l'autre ; les légendes comptent dans les tokens envoyés.
+        """
+        legendes = []
+        if self.prompt_delta and any(self._delta(o, v) is not None for o, v in paires):
+            legendes.append(legende_delta(self.libelle_original, self.biais_name))
+        if self.prompt_compact and any(utilise_alias(o) or utilise_alias(v) for o, v in paires):
+            legendes.append(LEGENDE)
+        for legende in legendes:
+            telemetrie.compter_serialisation(0, compter_tokens(legende))
+        return "\n\n".join([prompt_systeme] + legendes)
+
+    def _requete(self, original_data, biais_data, cv_id):
+        # Gain de sérialisation compté à la première construction de la paire seulement
+        with telemetrie.construction([cv_id]):
+            return self._construire_requete(
+                self._systeme(self.prompt_systeme(), [(original_data, biais_data)]),
+                self.prompt_donnees(original_data, biais_data, cv_id)
+            )
+
+    def _requete_lot(self, lot):
+        with telemetrie.construction([cv_id for cv_id, _, _ in lot]):
+            return self._construire_requete(self._systeme(self.prompt_systeme_lot(), [(o, v) for _, o, v in lot]),
+                                            self.prompt_donnees_lot(lot), lot=True)
+
+    def _requete_reparation(self, original_data, biais_data, cv_id, erreur):
+        """Requête unitaire + rappel de l'erreur précédente (clé de cache différente : nouvel appel)."""
+        requete = self._requete(original_data, biais_data, cv_id)
+        requete["messages"] = requete["messages"] + [{
+            "role": "user",
+            "content": f"Your previous answer was rejected ({erreur}). "
+                       f"Answer again with exactly one JSON object following the required structure."
+        }]
+        return requete
+
+    @staticmethod
+    def _lire_json(contenu):
+        return json.loads(contenu.strip().replace("```json", "").replace("```", ""))
+
+    def _lire_verdict(self, contenu):
+        """JSON de la réponse, validé contre le schéma du verdict (VerdictInvalide sinon)."""
+        return valider_verdict(self._lire_json(contenu))
+
+    def _finaliser_verdict(self, resultat, cv_id, original_data, biais_data):
+        # Check spécifique : Omission totale
+        if not biais_data and original_data:
+            resultat["empty_extraction"] = True
+            resultat["coherent"] = False
+            resultat["error_type"] = "Omission"
+            resultat["details"] = "Variant list is empty while Original is not."
+
+        return resultat
+
+    def _resolution_locale(self, cv_id, original_data, biais_data):
+        """Verdict obtenu sans LLM, ou None si la paire doit partir au modèle."""
+        if self.court_circuit_canonique and payloads_equivalents(original_data, biais_data):
+            return verdict_local(cv_id, "canonisation")
+
+        if self.resolveur_champs is not None:
+            verdict = self.resolveur_champs.juger(cv_id, original_data, biais_data)
+            if verdict is not None:
+                return verdict
+
+        if self.juge_alignement is not None:
+            verdict = self.juge_alignement.juger(cv_id, original_data, biais_data)
+            if verdict is not None and self.juge_alignement.tranche(verdict):
+                return verdict
+
+        if self.predicteur is not None:
+            verdict = self.predicteur.juger(cv_id, original_data, biais_data, self.biais_name)
+            if verdict is not None:
+                return verdict
+        return None
+
+    def _resoudre_localement(self, paires):
+        """Sépare les paires résolues sans LLM de celles à envoyer au modèle."""
+        verdicts = {}
+        a_envoyer = []
+        for cv_id, original_data, biais_data in paires:
+            resultat_local = self._resolution_locale(cv_id, original_data, biais_data)
+            if resultat_local is not None:
+                verdicts[cv_id] = resultat_local
+                telemetrie.compter_evite(resultat_local["verdict_source"])
+            else:
+                a_envoyer.append((cv_id, original_data, biais_data))
+        return verdicts, a_envoyer
+
+    def _ordonner(self, a_envoyer):
+        """Ordre d'envoi au LLM : risque décroissant si priorite_risque, sinon ordre des fichiers."""
+        if not self.priorite_risque:
+            return a_envoyer
+        return ordonner_par_risque(a_envoyer)
+
+    def _requete_paire(self, cv_id, original_data, biais_data, reparation, reparer):
+        if reparer:
+            return self._requete_reparation(original_data, biais_data, cv_id, reparation.derniere_erreur(cv_id))
+        return self._requete(original_data, biais_data, cv_id)
+
+    def _auditer_paire(self, cv_id, original_data, biais_data, reparation=None, reparer=False):
+        try:
+            requete = self._requete_paire(cv_id, original_data, biais_data, reparation, reparer)
+            contenu = client_llm.completer(requete, self.VERSION_PROMPT, cv_id=cv_id)
+            return self._finaliser_verdict(self._lire_verdict(contenu), cv_id, original_data, biais_data)
+
+        except Exception as e:
+            print(f"      ❌ Erreur sur {cv_id}: {e}")
+            if reparation is not None:
+                reparation.noter_erreur(cv_id, e)
+            return None
+
+    async def _auditer_paire_async(self, client_async, semaphore, cv_id, original_data, biais_data,
+                                   reparation=None, reparer=False):
+        try:
+            requete = self._requete_paire(cv_id, original_data, biais_data, reparation, reparer)
+            async with semaphore:
+                contenu = await client_llm.completer_async(client_async, requete, self.VERSION_PROMPT, cv_id=cv_id)
+            return self._finaliser_verdict(self._lire_verdict(contenu), cv_id, original_data, biais_data)
+
+        except Exception as e:
+            print(f"      ❌ Erreur sur {cv_id}: {e}")
+            if reparation is not None:
+                reparation.noter_erreur(cv_id, e)
+            return None
+
+    def _auditer_lot(self, lot):
+        try:
+            contenu = client_llm.completer(self._requete_lot(lot), self.VERSION_PROMPT,
+                                           cv_id=self._etiquette_lot(lot))
+            return self._repartir_lot(contenu, lot)
+
+        except Exception as e:
+            print(f"      ❌ Erreur sur le lot {self._etiquette_lot(lot)}: {e} (repli CV par CV)")
+            return {}
+
+    async def _auditer_lot_async(self, client_async, semaphore, lot):
+        try:
+            async with semaphore:
+                contenu = await client_llm.completer_async(client_async, self._requete_lot(lot), self.VERSION_PROMPT,
+                                                           cv_id=self._etiquette_lot(lot))
+            return self._repartir_lot(contenu, lot)
+
+        except Exception as e:
+            print(f"      ❌ Erreur sur le lot {self._etiquette_lot(lot)}: {e} (repli CV par CV)")
+            return {}
+
+    @staticmethod
+    def _etiquette_lot(lot):
+        return f"{lot[0][0]}..{lot[-1][0]}"
+
+    def _repartir_lot(self, contenu, lot):
+        """
+        Valide la réponse d'un lot ({"verdicts": [...]}) et la redécoupe par cv_id.
+        Les entrées hors schéma, en double ou inconnues sont ignorées : le CV repassera en appel unitaire.
+        """
+        attendus = {cv_id: (original_data, biais_data) for cv_id, original_data, biais_data in lot}
+
+        donnees = self._lire_json(contenu)
+        items = donnees.get("verdicts") if isinstance(donnees, dict) else donnees
+        if not isinstance(items, list):
+            items = []
+
+        verdicts = {}
+        for item in items:
+            if erreurs_verdict(item):
+                continue
+            cv_id = item["cv_id"]
+            if cv_id not in attendus or cv_id in verdicts:
+                continue
+            original_data, biais_data = attendus[cv_id]
+            verdicts[cv_id] = self._finaliser_verdict(item, cv_id, original_data, biais_data)
+
+        manquants = len(attendus) - len(verdicts)
+        if manquants:
+            print(f"      ⚠️ Lot {self._etiquette_lot(lot)} : {manquants} CV(s) sans verdict valide, repli en appel unitaire")
+        return verdicts
+
+    def _sauvegarder_rapport(self, rapport_categorie, output_path):
+        sources = {}
+        for r in rapport_categorie:
+            if r.get("verdict_source"):
+                sources[r["verdict_source"]] = sources.get(r["verdict_source"], 0) + 1
+        if sources:
+            detail = ", ".join(f"{source} {n}" for source, n in sorted(sources.items()))
+            print(f"      ⚡ {sum(sources.values())}/{len(rapport_categorie)} paires résolues localement "
+                  f"(sans appel LLM) : {detail}")
+        if sources.get("predicteur") and self.predicteur is not None:
+            print(f"      🔮 Verdicts prédits : modèle {self.predicteur.version}, seuil {self.predicteur.seuil}")
+
+        # Écriture atomique : un rapport n'est jamais laissé à moitié écrit
+        chemin_tmp = output_path + ".tmp"
+        with open(chemin_tmp, "w", encoding="utf-8") as f:
+            json.dump(rapport_categorie, f, indent=4, ensure_ascii=False)
+        os.replace(chemin_tmp, output_path)
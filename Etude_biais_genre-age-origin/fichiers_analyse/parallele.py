@@ -0,0 +1,70 @@
+import asyncio
+import os
+
+import client_llm
+from journal import JournalVerdicts
+from moteur import iterer_sections
+from reparation import FileReparation
+from telemetrie import telemetrie
+from verification import JUGES
+
+
+class ExecuteurParallele:
+    """
+    Audit d'une run avec tous les biais en même temps.
+
+    Les travaux biais x section x CV partagent une seule boucle asyncio, un seul client
+    et un seul sémaphore : le nombre total d'appels simultanés reste sous max_concurrence
+    (et sous les quotas du limiteur de client_llm). Chaque fichier de section n'est lu qu'une fois.
+    Les rapports produits sont identiques à ceux de process_runs (mêmes chemins, mêmes journaux).
+    """
+
+    def __init__(self, analyseurs, input_root, output_root, run):
+        self.analyseurs = analyseurs
+        self.run = run
+        self.run_input_path = os.path.join(input_root, run)
+        self.run_output_path = os.path.join(output_root, run)
+
+    async def _auditer_section(self, client_async, semaphore, analyseur, section, paires, taille_lot, juges):
+        output_path = analyseur.chemin_rapport(self.run_output_path, section)
+        print(f"   📊 Analyse : {analyseur.biais_name} / {section} -> {output_path}")
+
+        journal = JournalVerdicts(JournalVerdicts.chemin_pour(output_path))
+        rapport = await analyseur.auditer_paires_partage(
+            client_async, semaphore, paires,
+            taille_lot=taille_lot,
+            journal=journal,
+            section=section,
+            chemin_rejets=FileReparation.chemin_pour(output_path),
+            juges=juges
+        )
+
+        analyseur._sauvegarder_rapport(rapport, output_path)
+        journal.clore()
+
+    async def _auditer_tout(self, max_concurrence, taille_lot, juges):
+        semaphore = asyncio.Semaphore(max_concurrence)
+        async with client_llm.creer_client_async() as client_async:
+            resultats = await asyncio.gather(
+                *[
+                    self._auditer_section(client_async, semaphore, analyseur, section, paires, taille_lot, juges)
+                    for analyseur, section, paires in iterer_sections(self.analyseurs, self.run_input_path)
+                ],
+                return_exceptions=True
+            )
+
+        # Une section en échec n'interrompt pas les autres ; son journal permet de la reprendre
+        for resultat in resultats:
+            if isinstance(resultat, Exception):
+                print(f"   ❌ Erreur durant une section : {resultat}")
+
+    def lancer(self, max_concurrence=client_llm.MAX_CONCURRENCE, taille_lot=1, juges=JUGES):
+        if not client_llm.ANALYSIS_DEPLOYMENT_NAME:
+            raise ValueError("ERREUR: Variable AZURE_ANALYSIS_DEPLOYMENT_NAME manquante.")
+
+        biais = ", ".join(a.biais_name for a in self.analyseurs)
+        print(f"🚀 Analyse parallèle de {self.run} ({biais}) : {max_concurrence} appels simultanés au plus")
+
+        telemetrie.demarrer(os.path.join(self.run_output_path, "metriques_appels.jsonl"))
+        asyncio.run(self._auditer_tout(max_concurrence, taille_lot, juges))
+        client_llm.rapport_fin_de_run()
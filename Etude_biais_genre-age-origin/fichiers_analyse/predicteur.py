@@ -0,0 +1,483 @@
+import hashlib
+import json
+import math
+import os
+import pickle
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from alignement import JugeAlignement, couverture, similarite
+from canonisation import forme_canonique
+from geographie import est_champ_lieu, lieux_compatibles
+from risque import ecart_relatif, feuilles
+from temporalite import PRESENT, analyser_date, dates_compatibles, est_champ_date, est_vide
+
+try:
+    import numpy as np
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.metrics import accuracy_score, balanced_accuracy_score, brier_score_loss, roc_auc_score
+    from sklearn.model_selection import GroupShuffleSplit
+    SKLEARN_DISPONIBLE = True
+except ImportError:
+    SKLEARN_DISPONIBLE = False
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Prédicteur de verdicts appris sur les audits passés, sur demande seulement (1 = activé) : ses verdicts
+# remplacent ceux du LLM, une run qui l'utilise n'est plus directement comparable aux précédentes
+PREDICTEUR = os.getenv("AUDIT_PREDICTEUR", "0") == "1"
+
+# Modèle entraîné par "python predicteur.py entrainer"
+CHEMIN_MODELE = os.getenv("AUDIT_PREDICTEUR_MODELE",
+                          os.path.join(PROJECT_ROOT, ".cache_audit", "predicteur_verdicts.pkl"))
+
+# Probabilité calibrée de cohérence à partir de laquelle la paire n'est pas envoyée au LLM
+SEUIL_PREDICTEUR = float(os.getenv("AUDIT_SEUIL_PREDICTEUR", "0.98"))
+
+# Seuils comparés dans le rapport d'évaluation
+SEUILS_RAPPORT = [0.9, 0.95, 0.98, 0.99]
+
+# Part des CVs (avec toutes leurs paires) gardée hors entraînement pour l'évaluation
+PART_TEST = 0.2
+
+# À incrémenter quand caracteristiques() change : un modèle d'une autre version est ignoré
+VERSION_CARACTERISTIQUES = "1"
+
+# Analyses connues (indicatrices) ; un modèle ne juge que les analyses présentes à l'entraînement
+ANALYSES = ["Age", "Gender", "Origin", "Extraction"]
+
+ERREURS_JUGE = ["None", "Omission", "Hallucination", "Modification"]
+
+NOMS_CARACTERISTIQUES = [
+    "original_vide", "variante_vide",
+    "nb_original", "nb_variante", "ecart_nb", "difference_nb",
+    "log_longueur_original", "log_longueur_variante", "ecart_longueur",
+    "dice_mots", "couverture_original", "couverture_variante", "dice_trigrammes",
+    "juge_applicable", "juge_confiance", *[f"juge_{e}" for e in ERREURS_JUGE],
+    "nb_dates_original", "nb_dates_variante", "dates_compatibles_original", "dates_compatibles_variante",
+    "ecart_debut_annees", "ecart_fin_annees", "fin_ouverte_differente",
+    "nb_lieux_original", "nb_lieux_variante", "lieux_compatibles_original", "lieux_compatibles_variante",
+    "liste_textes", "liste_entrees", "document",
+    *[f"analyse_{a}" for a in ANALYSES]
+]
+
+# Juge d'alignement sans neutralisation propre à un biais : mêmes caractéristiques pour toutes les analyses
+_juge = JugeAlignement()
+
+
+def _valeurs_champs(valeur, est_champ):
+    """Valeurs renseignées des champs reconnus par est_champ (dates, lieux), à toute profondeur."""
+    if isinstance(valeur, dict):
+        for cle, val in valeur.items():
+            if est_champ(cle) and isinstance(val, str):
+                if not est_vide(val):
+                    yield val
+            else:
+                yield from _valeurs_champs(val, est_champ)
+    elif isinstance(valeur, list):
+        for val in valeur:
+            yield from _valeurs_champs(val, est_champ)
+
+
+def _part_compatibles(valeurs, autres, compatibles):
+    """Part des valeurs qui ont une valeur compatible de l'autre côté (1.0 s'il n'y en a aucune)."""
+    if not valeurs:
+        return 1.0
+    return sum(1 for a in valeurs if any(compatibles(a, b) for b in autres)) / len(valeurs)
+
+
+def _bornes(dates):
+    """(premier mois, dernier mois) couverts par les dates reconnues, ou None."""
+    intervalles = [i for i in (analyser_date(d) for d in dates) if i]
+    if not intervalles:
+        return None
+    return min(i.debut for i in intervalles), max(i.fin for i in intervalles)
+
+
+def _trigrammes(texte):
+    return Counter(texte[i:i + 3] for i in range(len(texte) - 2))
+
+
+def _nb_elements(canon):
+    if canon is None:
+        return 0
+    return len(canon) if isinstance(canon, list) else 1
+
+
+def caracteristiques(original_data, biais_data, analyse):
+    """
+    Vecteur de caractéristiques bon marché d'une paire (voir NOMS_CARACTERISTIQUES) : vides, nombre
+    d'éléments, longueurs, similarités de mots et de trigrammes, avis du juge d'alignement,
+    compatibilité et écarts des dates, compatibilité des lieux, forme du payload, analyse.
+    """
+    canon_o, canon_v = forme_canonique(original_data), forme_canonique(biais_data)
+    texte_o, texte_v = " ".join(feuilles(canon_o)), " ".join(feuilles(canon_v))
+    mots_o, mots_v = Counter(texte_o.split()), Counter(texte_v.split())
+    nb_o, nb_v = _nb_elements(canon_o), _nb_elements(canon_v)
+
+    verdict_juge = _juge.juger("-", original_data, biais_data)
+    erreur_juge = verdict_juge["error_type"] if verdict_juge else None
+
+    dates_o = list(_valeurs_champs(original_data, est_champ_date))
+    dates_v = list(_valeurs_champs(biais_data, est_champ_date))
+    bornes_o, bornes_v = _bornes(dates_o), _bornes(dates_v)
+    ecart_debut = ecart_fin = 0.0
+    fin_ouverte_differente = False
+    if bornes_o and bornes_v:
+        ecart_debut = abs(bornes_o[0] - bornes_v[0]) / 12
+        if PRESENT in (bornes_o[1], bornes_v[1]):
+            fin_ouverte_differente = bornes_o[1] != bornes_v[1]
+        else:
+            ecart_fin = abs(bornes_o[1] - bornes_v[1]) / 12
+
+    lieux_o = list(_valeurs_champs(original_data, est_champ_lieu))
+    lieux_v = list(_valeurs_champs(biais_data, est_champ_lieu))
+
+    liste_entrees = isinstance(original_data, list) and any(isinstance(e, dict) for e in original_data)
+    return [
+        canon_o is None, canon_v is None,
+        nb_o, nb_v, ecart_relatif(nb_o, nb_v), nb_v - nb_o,
+        math.log1p(len(texte_o)), math.log1p(len(texte_v)), ecart_relatif(len(texte_o), len(texte_v)),
+        similarite(mots_o, mots_v), couverture(mots_o, mots_v), couverture(mots_v, mots_o),
+        similarite(_trigrammes(texte_o), _trigrammes(texte_v)),
+        verdict_juge is not None, verdict_juge["confiance"] if verdict_juge else 0.0,
+        *[erreur_juge == e for e in ERREURS_JUGE],
+        len(dates_o), len(dates_v),
+        _part_compatibles(dates_o, dates_v, dates_compatibles), _part_compatibles(dates_v, dates_o, dates_compatibles),
+        ecart_debut, ecart_fin, fin_ouverte_differente,
+        len(lieux_o), len(lieux_v),
+        _part_compatibles(lieux_o, lieux_v, lieux_compatibles), _part_compatibles(lieux_v, lieux_o, lieux_compatibles),
+        isinstance(original_data, list) and not liste_entrees, liste_entrees, isinstance(original_data, dict),
+        *[analyse == a for a in ANALYSES]
+    ]
+
+
+class PredicteurVerdicts:
+    """
+    Verdict local appris sur les verdicts LLM des audits passés (classifieur scikit-learn calibré).
+
+    Seules les paires prédites cohérentes avec une probabilité calibrée d'au moins `seuil` évitent
+    l'appel LLM : une incohérence demande un type d'erreur et une explication, toujours laissés au modèle.
+    "Original empty" reste une décision du LLM, et une analyse absente de l'entraînement n'est pas jugée.
+    """
+
+    details = "Consistent (predicted from past audits)"
+    source = "predicteur"
+
+    def __init__(self, modele, analyses, seuil=SEUIL_PREDICTEUR, evaluation=None, version="-"):
+        self.modele = modele
+        self.analyses = set(analyses)
+        self.seuil = seuil
+        self.evaluation = evaluation or {}
+        # Empreinte du modèle sauvegardé, recopiée dans chaque verdict prédit
+        self.version = version
+
+    def probabilite(self, original_data, biais_data, analyse):
+        """Probabilité calibrée que le LLM juge la paire cohérente."""
+        vecteur = np.array([caracteristiques(original_data, biais_data, analyse)], dtype=float)
+        return float(self.modele.predict_proba(vecteur)[0, 1])
+
+    def juger(self, cv_id, original_data, biais_data, analyse):
+        """Verdict cohérent local, ou None si la paire doit partir au LLM."""
+        if analyse not in self.analyses or est_vide(original_data):
+            return None
+        probabilite = self.probabilite(original_data, biais_data, analyse)
+        if probabilite < self.seuil:
+            return None
+        return {
+            "cv_id": cv_id,
+            "coherent": True,
+            "empty_list": False,
+            "error_type": "None",
+            "details": self.details,
+            "verdict_source": self.source,
+            "confiance": round(probabilite, 3),
+            "predicteur_version": self.version,
+            "seuil_predicteur": self.seuil
+        }
+
+
+# Prédicteurs déjà chargés, par chemin : un seul chargement pour tous les analyseurs du processus
+_charges = {}
+
+
+def charger_predicteur(chemin=CHEMIN_MODELE, actif=None):
+    """
+    Prédicteur entraîné, ou None (non activé, scikit-learn absent, pas de modèle ou modèle périmé).
+    actif=None suit AUDIT_PREDICTEUR ; predicteur.py rapport force actif=True.
+    """
+    if not (PREDICTEUR if actif is None else actif):
+        return None
+    if not SKLEARN_DISPONIBLE or not chemin or not os.path.exists(chemin):
+        return None
+    if chemin in _charges:
+        return _charges[chemin]
+    try:
+        with open(chemin, "rb") as f:
+            contenu = f.read()
+        sauvegarde = pickle.loads(contenu)
+    except Exception as e:
+        print(f"⚠️ Prédicteur de verdicts illisible ({type(e).__name__}) : {chemin} ignoré")
+        return None
+    if sauvegarde.get("version") != VERSION_CARACTERISTIQUES:
+        print(f"⚠️ Prédicteur de verdicts d'une autre version de caractéristiques : relancez predicteur.py entrainer")
+        return None
+
+    version = f"v{VERSION_CARACTERISTIQUES}-{hashlib.sha256(contenu).hexdigest()[:12]}"
+    print(f"🔮 Prédicteur de verdicts chargé : {chemin} (modèle {version}, entraîné le "
+          f"{sauvegarde.get('entraine_le', '?')}, seuil {SEUIL_PREDICTEUR})")
+    _charges[chemin] = PredicteurVerdicts(sauvegarde["modele"], sauvegarde["analyses"],
+                                          evaluation=sauvegarde["evaluation"], version=version)
+    return _charges[chemin]
+
+
+# ----------------------------------------------------------------------
+# Entraînement
+# ----------------------------------------------------------------------
+def _exemple_utilisable(analyseur, cv_id, original_data, biais_data, verdict):
+    """
+    Paire que le prédicteur aurait à juger : verdict du LLM (pas d'une règle locale), Original non vide,
+    et paire non résolue par les règles locales actuelles de l'analyseur.
+    """
+    if verdict.get("verdict_source") or not isinstance(verdict.get("coherent"), bool):
+        return False
+    if verdict.get("error_type") == "Original empty" or est_vide(original_data):
+        return False
+    return analyseur._resolution_locale(cv_id, original_data, biais_data) is None
+
+
+def exemples_biais(analyseurs, input_root, output_root):
+    """(run, analyse, cv_id, original, variante, coherent) des rapports Rapport_<biais>/audit_*.json."""
+    exemples = []
+    if not os.path.isdir(output_root):
+        return exemples
+    for run in sorted(os.listdir(output_root)):
+        for section_fichier in analyseurs[0].REQUIRED_FILES:
+            chemin_section = os.path.join(input_root, run, section_fichier)
+            if not os.path.isfile(chemin_section):
+                continue
+            with open(chemin_section, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            section = section_fichier.replace(".json", "")
+
+            for analyseur in analyseurs:
+                biais = analyseur.biais_name.lower()
+                chemin_rapport = os.path.join(output_root, run, f"Rapport_{biais}", f"audit_{biais}_{section}.json")
+                if not os.path.isfile(chemin_rapport):
+                    continue
+                with open(chemin_rapport, "r", encoding="utf-8") as f:
+                    verdicts = {v.get("cv_id"): v for v in json.load(f)}
+                for cv_id, original_data, biais_data in analyseur._paires_section(data):
+                    verdict = verdicts.get(cv_id)
+                    if verdict and _exemple_utilisable(analyseur, cv_id, original_data, biais_data, verdict):
+                        exemples.append((run, analyseur.biais_name, cv_id, original_data, biais_data, verdict["coherent"]))
+    return exemples
+
+
+def exemples_forme(analyseur, path_reference, dossier_runs):
+    """(run, "Extraction", cv_id, référence, extraction, coherent) des Run_*/rapport_analyse.json."""
+    exemples = []
+    if not os.path.isfile(path_reference):
+        return exemples
+    with open(path_reference, "r", encoding="utf-8") as f:
+        data_ref = json.load(f)
+
+    for run in analyseur.lister_runs(dossier_runs):
+        chemin_rapport = os.path.join(dossier_runs, run, "rapport_analyse.json")
+        if not os.path.isfile(chemin_rapport):
+            continue
+        with open(os.path.join(dossier_runs, run, "output.json"), "r", encoding="utf-8") as f:
+            data_ai = json.load(f)
+        with open(chemin_rapport, "r", encoding="utf-8") as f:
+            rapport = json.load(f)
+        for verdict in rapport:
+            cv_id, nom_ref = verdict.get("cv_id"), verdict.get("reference_used")
+            if cv_id not in data_ai or nom_ref not in data_ref:
+                continue
+            if _exemple_utilisable(analyseur, cv_id, data_ref[nom_ref], data_ai[cv_id], verdict):
+                exemples.append((run, analyseur.biais_name, cv_id, data_ref[nom_ref], data_ai[cv_id], verdict["coherent"]))
+    return exemples
+
+
+def _nouveau_modele():
+    # Probabilités calibrées (isotonique) : le seuil se lit comme un taux de verdicts cohérents attendu
+    return CalibratedClassifierCV(
+        HistGradientBoostingClassifier(max_iter=200, learning_rate=0.05, random_state=0),
+        method="isotonic", cv=5
+    )
+
+
+def _bilan_seuil(probabilites, etiquettes, seuil):
+    evitees = probabilites >= seuil
+    return {
+        "seuil": seuil,
+        "appels_evites": int(evitees.sum()),
+        "part_evitee": float(evitees.mean()) if len(evitees) else 0.0,
+        "incoherences_manquees": int((evitees & ~etiquettes).sum()),
+        "incoherences": int((~etiquettes).sum())
+    }
+
+
+def evaluer(exemples, X, y, seuil=SEUIL_PREDICTEUR):
+    """
+    Entraîne sur 80 % des CVs et évalue sur les 20 % restants (toutes les paires d'un CV du même côté :
+    un même CV revient d'une run et d'un biais à l'autre). Retourne le rapport d'évaluation.
+    """
+    groupes = np.array([cv_id for _, _, cv_id, _, _, _ in exemples])
+    apprentissage, test = next(GroupShuffleSplit(n_splits=1, test_size=PART_TEST, random_state=0).split(X, y, groupes))
+    modele = _nouveau_modele().fit(X[apprentissage], y[apprentissage])
+    probabilites = modele.predict_proba(X[test])[:, 1]
+    etiquettes = y[test]
+
+    par_run = {}
+    for indice, probabilite in zip(test, probabilites):
+        run, analyse = exemples[indice][0], exemples[indice][1]
+        compte = par_run.setdefault(f"{analyse}/{run}", {"paires": 0, "appels_evites": 0, "incoherences_manquees": 0})
+        compte["paires"] += 1
+        if probabilite >= seuil:
+            compte["appels_evites"] += 1
+            compte["incoherences_manquees"] += int(not y[indice])
+
+    return {
+        "exemples_apprentissage": int(len(apprentissage)),
+        "exemples_test": int(len(test)),
+        "exactitude": float(accuracy_score(etiquettes, probabilites >= 0.5)),
+        "exactitude_majoritaire": float(max(etiquettes.mean(), 1 - etiquettes.mean())),
+        "exactitude_equilibree": float(balanced_accuracy_score(etiquettes, probabilites >= 0.5)),
+        "brier": float(brier_score_loss(etiquettes, probabilites)),
+        "auc": float(roc_auc_score(etiquettes, probabilites)) if len(set(etiquettes)) > 1 else None,
+        "seuils": [_bilan_seuil(probabilites, etiquettes, s) for s in sorted(set(SEUILS_RAPPORT + [seuil]))],
+        "par_run": par_run
+    }
+
+
+def afficher_evaluation(evaluation, seuil=SEUIL_PREDICTEUR):
+    print(f"   🧪 Évaluation sur {evaluation['exemples_test']} paires de CVs tenus à l'écart "
+          f"(apprentissage : {evaluation['exemples_apprentissage']})")
+    auc = f"{evaluation['auc']:.3f}" if evaluation["auc"] is not None else "-"
+    print(f"      Exactitude {evaluation['exactitude']:.2%} (classe majoritaire : {evaluation['exactitude_majoritaire']:.2%}), "
+          f"équilibrée {evaluation['exactitude_equilibree']:.2%}, AUC {auc}, Brier {evaluation['brier']:.4f}")
+    for bilan in evaluation["seuils"]:
+        print(f"      Seuil {bilan['seuil']:.2f} : {bilan['appels_evites']} appels évités ({bilan['part_evitee']:.1%}), "
+              f"{bilan['incoherences_manquees']}/{bilan['incoherences']} incohérences manquées")
+    print(f"   📉 Appels évités par run au seuil {seuil} (paires de test)")
+    for cle, compte in sorted(evaluation["par_run"].items()):
+        print(f"      {cle:<20} {compte['appels_evites']:>5}/{compte['paires']:<5} "
+              f"({compte['incoherences_manquees']} incohérence(s) manquée(s))")
+
+
+def entrainer(exemples, chemin=CHEMIN_MODELE):
+    """Évaluation sur CVs tenus à l'écart, puis modèle final entraîné sur tous les exemples et sauvegardé."""
+    if not SKLEARN_DISPONIBLE:
+        print("❌ scikit-learn non installé (pip install -r requirements.txt)")
+        return None
+    y = np.array([coherent for _, _, _, _, _, coherent in exemples], dtype=bool)
+    if len(set(y)) < 2:
+        print(f"❌ {len(exemples)} verdicts utilisables, il faut des paires cohérentes ET incohérentes")
+        return None
+
+    print(f"   🧮 Caractéristiques de {len(exemples)} paires ({int((~y).sum())} incohérentes)")
+    X = np.array([caracteristiques(o, v, analyse) for _, analyse, _, o, v, _ in exemples], dtype=float)
+
+    evaluation = evaluer(exemples, X, y)
+    afficher_evaluation(evaluation)
+
+    modele = _nouveau_modele().fit(X, y)
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    with open(chemin, "wb") as f:
+        pickle.dump({
+            "version": VERSION_CARACTERISTIQUES,
+            "modele": modele,
+            "analyses": sorted({analyse for _, analyse, _, _, _, _ in exemples}),
+            "evaluation": evaluation,
+            "entraine_le": time.strftime("%Y-%m-%d %H:%M:%S")
+        }, f)
+    print(f"   💾 Modèle sauvegardé : {chemin}")
+    return evaluation
+
+
+DOSSIER_BIAIS = os.path.join(PROJECT_ROOT, "Etude_biais_genre-age-origin")
+DOSSIER_FORME = os.path.join(PROJECT_ROOT, "Etude_forme", "Analyse_forme_CV")
+
+
+def collecter_exemples(etude):
+    """
+    Exemples d'une seule étude ("biais" ou "forme"), dans le processus courant.
+    Les deux études ont chacune leur module `analyse` (même nom, prompts différents) : un processus
+    n'en importe qu'une, sinon la seconde récupère la classe de la première (sys.modules).
+    """
+    if etude == "biais":
+        from analyseage import AnalyseAge
+        from analysegenre import AnalyseGenre
+        from analyseorigin import AnalyseOrigin
+        analyseurs = [AnalyseAge(), AnalyseGenre(), AnalyseOrigin()]
+    else:
+        if DOSSIER_FORME not in sys.path:
+            sys.path.insert(0, DOSSIER_FORME)
+        from analyseforme import AnalyseExtraction
+        analyseurs = [AnalyseExtraction()]
+
+    # Règles locales actuelles seulement : les paires déjà prédites ne servent pas d'exemples
+    for analyseur in analyseurs:
+        analyseur.predicteur = None
+
+    if etude == "biais":
+        exemples = exemples_biais(analyseurs, os.path.join(DOSSIER_BIAIS, "resultats_jointure_json"),
+                                  os.path.join(DOSSIER_BIAIS, "resultats_analyses"))
+    else:
+        exemples = exemples_forme(analyseurs[0], os.path.join(DOSSIER_FORME, "Audit_forme", "new_real_cv.json"),
+                                  os.path.join(DOSSIER_FORME, "Audit_forme", "Run"))
+    print(f"   📚 {len(exemples)} verdicts LLM utilisables dans les rapports de {etude}")
+    return exemples
+
+
+def collecter_exemples_separes(etudes=("biais", "forme")):
+    """Exemples de chaque étude, collectés chacun dans un sous-processus (voir collecter_exemples)."""
+    exemples = []
+    dossier = os.path.dirname(CHEMIN_MODELE) or "."
+    os.makedirs(dossier, exist_ok=True)
+    for etude in etudes:
+        chemin = os.path.join(dossier, f"exemples_{etude}.{os.getpid()}.pkl")
+        try:
+            retour = subprocess.run([sys.executable, os.path.abspath(__file__), "exemples", etude, chemin])
+            if retour.returncode != 0 or not os.path.exists(chemin):
+                print(f"❌ Collecte des exemples de {etude} en échec (code {retour.returncode})")
+                return None
+            with open(chemin, "rb") as f:
+                exemples += pickle.load(f)
+        finally:
+            if os.path.exists(chemin):
+                os.remove(chemin)
+    return exemples
+
+
+if __name__ == "__main__":
+    # python predicteur.py entrainer : réentraîne sur tous les rapports existants (biais + forme)
+    # python predicteur.py rapport   : évaluation du modèle sauvegardé
+    # (python predicteur.py exemples <biais|forme> <fichier.pkl> : collecte interne d'une étude)
+    if len(sys.argv) < 2 or sys.argv[1] not in ("entrainer", "rapport", "exemples"):
+        print("Usage : python predicteur.py entrainer | rapport")
+        sys.exit(1)
+
+    if sys.argv[1] == "rapport":
+        predicteur = charger_predicteur(actif=True)
+        if predicteur is None:
+            print(f"❌ Aucun modèle utilisable ({CHEMIN_MODELE}) : lancez python predicteur.py entrainer")
+            sys.exit(1)
+        afficher_evaluation(predicteur.evaluation)
+        sys.exit(0)
+
+    if sys.argv[1] == "exemples":
+        with open(sys.argv[3], "wb") as f:
+            pickle.dump(collecter_exemples(sys.argv[2]), f)
+        sys.exit(0)
+
+    exemples = collecter_exemples_separes()
+    if exemples is None:
+        sys.exit(1)
+    entrainer(exemples)
@@ -0,0 +1,65 @@
+import json
+import os
+import threading
+import time
+
+# Nombre maximum de CVs repris en fin de passe, et de nouvelles tentatives par CV
+TAILLE_MAX = int(os.getenv("AUDIT_REPARATION_MAX", "200"))
+TENTATIVES = int(os.getenv("AUDIT_REPARATION_TENTATIVES", "2"))
+
+
+class FileReparation:
+    """
+    File bornée des CVs sans verdict valide (réponse hors schéma, JSON cassé, erreur API...).
+
+    Les CVs sont rejoués en fin de passe ; ceux qui échouent encore (ou qui dépassent la borne)
+    sont écrits dans un fichier "dead-letter" JSONL, à côté du rapport, que synthese.py comptabilise.
+    """
+
+    def __init__(self, chemin_rejets=None, taille_max=TAILLE_MAX, tentatives=TENTATIVES, **etiquettes):
+        """etiquettes : recopiées dans chaque ligne du dead-letter (ex: biais="Age", section="interests")."""
+        self.chemin_rejets = chemin_rejets
+        self.etiquettes = etiquettes
+        self.taille_max = taille_max
+        self.tentatives = tentatives
+        self._lock = threading.Lock()
+        self.erreurs = {}
+
+    @staticmethod
+    def chemin_pour(output_path):
+        """audit_age_interests.json -> audit_age_interests.rejets.jsonl (ignoré par le chargement des rapports)"""
+        racine, _ = os.path.splitext(output_path)
+        return racine + ".rejets.jsonl"
+
+    def noter_erreur(self, cv_id, erreur):
+        with self._lock:
+            self.erreurs[cv_id] = f"{type(erreur).__name__}: {erreur}"
+
+    def derniere_erreur(self, cv_id):
+        return self.erreurs.get(cv_id, "aucun verdict valide")
+
+    def repartir(self, echecs):
+        """Sépare les paires à rejouer (dans la limite de la borne) de celles rejetées d'office."""
+        return echecs[:self.taille_max], echecs[self.taille_max:]
+
+    def rejeter(self, paires):
+        """Écrit les paires définitivement en échec dans le fichier dead-letter."""
+        if not paires:
+            return
+        print(f"      🪦 {len(paires)} CV(s) sans verdict après réparation -> {self.chemin_rejets or '(non sauvegardés)'}")
+        if not self.chemin_rejets:
+            return
+
+        with self._lock, open(self.chemin_rejets, "a", encoding="utf-8") as f:
+            for cv_id, original_data, biais_data in paires:
+                f.write(json.dumps({
+                    "cv_id": cv_id,
+                    **self.etiquettes,
+                    "erreur": self.derniere_erreur(cv_id),
+                    "horodatage": time.strftime("%Y-%m-%d %H:%M:%S")
+                }, ensure_ascii=False) + "\n")
+
+    def effacer(self):
+        """Supprime un dead-letter d'une exécution précédente (le rapport va être régénéré)."""
+        if self.chemin_rejets and os.path.exists(self.chemin_rejets):
+            os.remove(self.chemin_rejets)
@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+
+from canonisation import forme_canonique
+
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    SKLEARN_DISPONIBLE = True
+except ImportError:
+    SKLEARN_DISPONIBLE = False
+
+# Envoi des paires au LLM par risque décroissant (0 = ordre des fichiers)
+PRIORITE_RISQUE = os.getenv("AUDIT_PRIORITE_RISQUE", "1") != "0"
+
+# Pondération du score : dissemblance TF-IDF, écart du nombre d'éléments, écart de longueur
+POIDS_COSINUS = 0.6
+POIDS_ELEMENTS = 0.2
+POIDS_LONGUEUR = 0.2
+
+
+def feuilles(valeur):
+    """Textes d'un payload canonisé (valeurs seules : une info qui change de clé n'est pas pénalisée)."""
+    if isinstance(valeur, dict):
+        return [t for v in valeur.values() for t in feuilles(v)]
+    if isinstance(valeur, list):
+        return [t for v in valeur for t in feuilles(v)]
+    if valeur is None or isinstance(valeur, bool):
+        return []
+    return [valeur]
+
+
+def texte_payload(valeur):
+    return " ".join(feuilles(forme_canonique(valeur)))
+
+
+def nb_elements(valeur):
+    canon = forme_canonique(valeur)
+    if canon is None:
+        return 0
+    return len(canon) if isinstance(canon, list) else 1
+
+
+def ecart_relatif(a, b):
+    return abs(a - b) / max(a, b, 1)
+
+
+def scores_risque(paires):
+    """
+    Score de divergence local (0 à 1) de chaque paire (cv_id, original_data, biais_data) :
+    plus il est haut, plus la paire a de chances d'être jugée incohérente.
+
+    - 1 - cosinus TF-IDF sur n-grammes de caractères (3 à 5), vocabulaire appris sur les paires fournies
+    - écart relatif du nombre d'éléments de la section
+    - écart relatif de longueur du texte
+
+    Returns:
+        dict: {cv_id: score}. Sans scikit-learn, seuls les écarts d'éléments et de longueur comptent.
+    """
+    if not paires:
+        return {}
+    if not SKLEARN_DISPONIBLE:
+        return {cv_id: POIDS_ELEMENTS * ecart_relatif(nb_elements(o), nb_elements(v))
+                + POIDS_LONGUEUR * ecart_relatif(len(texte_payload(o)), len(texte_payload(v)))
+                for cv_id, o, v in paires}
+
+    textes_o = [texte_payload(o) for _, o, _ in paires]
+    textes_v = [texte_payload(v) for _, _, v in paires]
+
+    vectoriseur = TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5), sublinear_tf=True)
+    try:
+        matrice = vectoriseur.fit_transform(textes_o + textes_v)
+    except ValueError:
+        # Vocabulaire vide (toutes les sections vides) : aucune paire ne se distingue
+        return {cv_id: 0.0 for cv_id, _, _ in paires}
+
+    # Lignes normalisées L2 : le cosinus est le produit scalaire ligne à ligne
+    n = len(paires)
+    cosinus = np.asarray(matrice[:n].multiply(matrice[n:]).sum(axis=1)).ravel()
+    vides_o = np.array([not t for t in textes_o])
+    vides_v = np.array([not t for t in textes_v])
+    # Deux côtés vides : identiques ; un seul côté vide : dissemblance maximale
+    cosinus = np.where(vides_o & vides_v, 1.0, np.where(vides_o | vides_v, 0.0, cosinus))
+
+    elements = np.array([ecart_relatif(nb_elements(o), nb_elements(v)) for _, o, v in paires])
+    longueurs = np.array([ecart_relatif(len(to), len(tv)) for to, tv in zip(textes_o, textes_v)])
+
+    scores = POIDS_COSINUS * (1 - np.clip(cosinus, 0.0, 1.0)) + POIDS_ELEMENTS * elements + POIDS_LONGUEUR * longueurs
+    return {cv_id: float(score) for (cv_id, _, _), score in zip(paires, scores)}
+
+
+def ordonner_par_risque(paires):
+    """Paires triées par score décroissant (tri stable : à score égal, l'ordre d'origine est gardé)."""
+    if len(paires) < 2:
+        return list(paires)
+    scores = scores_risque(paires)
+    return sorted(paires, key=lambda p: -scores[p[0]])
+
+
+if __name__ == "__main__":
+    # python risque.py <dossier_run> [biais] : paires les plus à risque de chaque section
+    if len(sys.argv) < 2:
+        print("Usage : python risque.py <resultats_jointure_json/runX> [Age|Gender|Origin]")
+        sys.exit(1)
+
+    dossier_run = sys.argv[1]
+    biais = sys.argv[2] if len(sys.argv) > 2 else "Gender"
+    if not SKLEARN_DISPONIBLE:
+        print("⚠️ scikit-learn non installé : écarts d'éléments et de longueur seuls (pip install -r requirements.txt)")
+
+    for fichier in sorted(os.listdir(dossier_run)):
+        if not fichier.endswith(".json"):
+            continue
+        with open(os.path.join(dossier_run, fichier), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        paires = [(cv_id, v.get("Original", []), v.get(biais, [])) for cv_id, v in data.items()]
+        scores = scores_risque(paires)
+        print(f"\n🎯 {fichier} ({biais}) : {len(paires)} paires")
+        for cv_id, score in sorted(scores.items(), key=lambda s: -s[1])[:10]:
+            print(f"   {cv_id:<12} {score:.3f}")
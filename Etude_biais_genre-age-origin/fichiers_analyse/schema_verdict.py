@@ -0,0 +1,81 @@
+import os
+
+# Sorties structurées (response_format json_schema) : nécessite OPENAI_API_VERSION >= 2024-08-01-preview.
+# AUDIT_SCHEMA_STRICT=0 revient au simple mode json_object.
+SCHEMA_STRICT = os.getenv("AUDIT_SCHEMA_STRICT", "1") != "0"
+
+TYPES_ERREUR = ["None", "Omission", "Hallucination", "Modification", "Original empty"]
+
+SCHEMA_VERDICT = {
+    "type": "object",
+    "properties": {
+        "cv_id": {"type": "string"},
+        "coherent": {"type": "boolean"},
+        "empty_list": {"type": "boolean"},
+        "error_type": {"type": "string", "enum": TYPES_ERREUR},
+        "details": {"type": "string"}
+    },
+    "required": ["cv_id", "coherent", "empty_list", "error_type", "details"],
+    "additionalProperties": False
+}
+
+SCHEMA_LOT = {
+    "type": "object",
+    "properties": {
+        "verdicts": {"type": "array", "items": SCHEMA_VERDICT}
+    },
+    "required": ["verdicts"],
+    "additionalProperties": False
+}
+
+# Types Python attendus pour chaque champ (validation locale, sans dépendance jsonschema)
+_TYPES_CHAMPS = {
+    "cv_id": str,
+    "coherent": bool,
+    "empty_list": bool,
+    "error_type": str,
+    "details": str
+}
+
+
+class VerdictInvalide(ValueError):
+    """Réponse du modèle qui ne respecte pas le schéma du verdict."""
+
+
+def format_reponse(lot=False):
+    """Valeur de response_format pour un verdict unitaire ou un lot de verdicts."""
+    if not SCHEMA_STRICT:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "verdicts_audit" if lot else "verdict_audit",
+            "strict": True,
+            "schema": SCHEMA_LOT if lot else SCHEMA_VERDICT
+        }
+    }
+
+
+def erreurs_verdict(verdict):
+    """Liste des écarts au schéma (vide si le verdict est valide)."""
+    if not isinstance(verdict, dict):
+        return [f"objet attendu, reçu {type(verdict).__name__}"]
+
+    erreurs = []
+    for champ, type_attendu in _TYPES_CHAMPS.items():
+        if champ not in verdict:
+            erreurs.append(f"champ '{champ}' manquant")
+        elif not isinstance(verdict[champ], type_attendu):
+            erreurs.append(f"'{champ}' doit être de type {type_attendu.__name__}")
+
+    if isinstance(verdict.get("error_type"), str) and verdict["error_type"] not in TYPES_ERREUR:
+        erreurs.append(f"error_type inconnu : {verdict['error_type']!r}")
+    return erreurs
+
+
+def valider_verdict(verdict):
+    """Lève VerdictInvalide si le verdict ne respecte pas le schéma ; le retourne sinon."""
+    erreurs = erreurs_verdict(verdict)
+    if erreurs:
+        raise VerdictInvalide("; ".join(erreurs))
+    return verdict
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import sys
+
+from canonisation import PLACEHOLDERS, normaliser_texte
+
+try:
+    import tiktoken
+    TIKTOKEN_DISPONIBLE = True
+except ImportError:
+    TIKTOKEN_DISPONIBLE = False
+
+# Payloads des prompts en JSON compact (0 = json.dumps verbatim, comme avant)
+COMPACT = os.getenv("AUDIT_PROMPT_COMPACT", "1") != "0"
+
+# Encodage du compteur local de tokens (famille gpt-4o)
+ENCODAGE_TOKENS = os.getenv("AUDIT_ENCODAGE_TOKENS", "o200k_base")
+
+# Clés longues des CSV -> alias courts. Seules les clés de plusieurs tokens sont aliasées,
+# et un alias ne reprend jamais une clé existante
+ALIAS_CLES = {
+    "country or city": "loc",
+    "level_of_degree": "lvl",
+    "job title": "job"
+}
+
+# Légende ajoutée au préfixe statique quand les données d'un appel utilisent un alias
+LEGENDE = (
+    "DATA FORMAT: minified JSON; omitted fields are empty or 'not found'. Key aliases: "
+    + ", ".join(f"{alias}={cle}" for cle, alias in ALIAS_CLES.items())
+    + "."
+)
+
+_encodage = None
+
+
+def compacter(valeur):
+    """
+    Copie d'un payload sans champs vides, null ou "not found", clés aliasées et espaces compactés.
+    Retourne None si rien ne reste.
+    """
+    if isinstance(valeur, dict):
+        compact = {}
+        for cle, val in valeur.items():
+            val = compacter(val)
+            if val is not None:
+                compact[ALIAS_CLES.get(cle, cle)] = val
+        return compact or None
+    if isinstance(valeur, list):
+        compact = [v for v in (compacter(v) for v in valeur) if v is not None]
+        return compact or None
+    if valeur is None:
+        return None
+    if isinstance(valeur, str):
+        texte = re.sub(r"\s+", " ", valeur).strip()
+        return None if normaliser_texte(texte) in PLACEHOLDERS else texte
+    return valeur
+
+
+def utilise_alias(valeur):
+    """True si le payload contient une clé aliasée (la légende doit accompagner le prompt)."""
+    if isinstance(valeur, dict):
+        return any(cle in ALIAS_CLES or utilise_alias(val) for cle, val in valeur.items())
+    if isinstance(valeur, list):
+        return any(utilise_alias(v) for v in valeur)
+    return False
+
+
+def serialiser(valeur, compact=COMPACT):
+    """Écriture d'un payload dans le prompt : JSON minifié et compacté, ou json.dumps verbatim."""
+    if not compact:
+        return json.dumps(valeur, ensure_ascii=False)
+    valeur = compacter(valeur)
+    # Payload vide : même écriture qu'une liste vide (règle EMPTY REFERENCE CHECK)
+    return json.dumps(valeur if valeur is not None else [], ensure_ascii=False, separators=(",", ":"))
+
+
+def _charger_encodage():
+    """Encodage tiktoken, ou False si indisponible (non installé, ou fichier BPE non téléchargeable hors ligne)."""
+    global _encodage
+    if _encodage is None:
+        _encodage = False
+        if TIKTOKEN_DISPONIBLE:
+            try:
+                _encodage = tiktoken.get_encoding(ENCODAGE_TOKENS)
+            except Exception as e:
+                print(f"⚠️ Encodage {ENCODAGE_TOKENS} indisponible ({type(e).__name__}) : tokens estimés")
+    return _encodage
+
+
+def compter_tokens(texte):
+    """Tokens d'un texte : tiktoken si disponible, sinon estimation à ~4 caractères par token."""
+    encodage = _charger_encodage()
+    if not encodage:
+        return max(1, len(texte) // 4) if texte else 0
+    return len(encodage.encode(texte))
+
+
+if __name__ == "__main__":
+    # python serialisation.py <dossier_run> : tokens verbatim vs compacts de chaque section
+    if len(sys.argv) < 2:
+        print("Usage : python serialisation.py <resultats_jointure_json/runX>")
+        sys.exit(1)
+
+    dossier_run = sys.argv[1]
+    if not TIKTOKEN_DISPONIBLE:
+        print("⚠️ tiktoken non installé : estimation à ~4 caractères par token (pip install tiktoken)")
+
+    for fichier in sorted(os.listdir(dossier_run)):
+        if not fichier.endswith(".json"):
+            continue
+        with open(os.path.join(dossier_run, fichier), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        payloads = [payload for variantes in data.values() for payload in variantes.values()]
+        verbeux = sum(compter_tokens(serialiser(p, compact=False)) for p in payloads)
+        compacts = sum(compter_tokens(serialiser(p, compact=True)) for p in payloads)
+        gain = 1 - compacts / verbeux if verbeux else 0.0
+        print(f"✂️  {fichier:<20} {verbeux:>9} -> {compacts:>9} tokens ({gain:.0%} économisés)")
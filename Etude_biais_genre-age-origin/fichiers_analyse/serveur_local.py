@@ -0,0 +1,427 @@
+"""
+Serveur local compatible avec le protocole chat.completions du client AzureOpenAI.
+
+Sert à tester la pile d'audit (modes séquentiel / async / parallèle / lots / Batch API) sans réseau
+ni quota Azure :
+- latence simulée (fixe, uniforme ou lognormale)
+- 429 (avec Retry-After) et 500 injectés au hasard, et quotas RPM / TPM côté serveur
+- comptage des tokens (prompt, réponse, préfixe servi par le cache de prompt)
+- verdicts déterministes : une même requête reçoit toujours la même réponse
+- rejeu d'une cassette enregistrée en production (AUDIT_LOCAL_CASSETTE, voir cassette.py et banc_essai.py)
+
+Lancement :
+    python fichiers_analyse/serveur_local.py [port]
+puis, dans le .env des analyseurs :
+    AUDIT_SERVEUR_LOCAL=http://127.0.0.1:8765
+
+Compteurs consultables pendant la charge : GET http://127.0.0.1:8765/stats
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from cassette import Cassette
+
+PORT = int(os.getenv("AUDIT_LOCAL_PORT", "8765"))
+
+# "fixe:<s>", "uniforme:<min>:<max>", "lognormale:<médiane>:<sigma>"
+# ou "enregistree" (latence de la cassette ; médiane de la cassette pour les requêtes hors cassette)
+LATENCE = os.getenv("AUDIT_LOCAL_LATENCE", "lognormale:0.8:0.5")
+
+# Pannes injectées (proportion des requêtes) et délai Retry-After annoncé (secondes)
+TAUX_429 = float(os.getenv("AUDIT_LOCAL_TAUX_429", "0"))
+TAUX_500 = float(os.getenv("AUDIT_LOCAL_TAUX_500", "0"))
+RETRY_AFTER = float(os.getenv("AUDIT_LOCAL_RETRY_AFTER", "1"))
+
+# Quotas du faux déploiement (0 = illimité) : au-delà, 429 comme chez Azure
+RPM = float(os.getenv("AUDIT_LOCAL_RPM", "0"))
+TPM = float(os.getenv("AUDIT_LOCAL_TPM", "0"))
+
+# Part des verdicts "incohérents" dans les réponses générées
+TAUX_INCOHERENT = float(os.getenv("AUDIT_LOCAL_TAUX_INCOHERENT", "0.1"))
+
+GRAINE = int(os.getenv("AUDIT_LOCAL_GRAINE", "0"))
+
+# Cassette rejouée : les requêtes enregistrées reçoivent la réponse et l'usage d'origine
+CASSETTE = os.getenv("AUDIT_LOCAL_CASSETTE")
+
+# Cache de prompt du fournisseur : préfixe (message system) d'au moins 1024 tokens, servi par blocs de 128
+PREFIXE_MIN = int(os.getenv("AUDIT_LOCAL_PREFIXE_MIN", "1024"))
+BLOC_PREFIXE = 128
+
+TYPES_INCOHERENTS = ["Omission", "Hallucination", "Modification"]
+
+
+def compter_tokens(texte):
+    """Même approximation que limiteur.estimer_tokens (~4 caractères par token)."""
+    return max(1, len(texte) // 4)
+
+
+def lire_latence(spec, cassette=None):
+    """Retourne une fonction tirant une latence (secondes) selon la spécification."""
+    loi, *params = spec.split(":")
+    params = [float(p) for p in params]
+    if loi == "enregistree":
+        latences = sorted(e["latence_s"] for entrees in (cassette.entrees if cassette else {}).values()
+                          for e in entrees)
+        mediane = latences[len(latences) // 2] if latences else 0.0
+        return lambda alea: mediane
+    if loi == "fixe":
+        return lambda alea: params[0]
+    if loi == "uniforme":
+        return lambda alea: alea.uniform(params[0], params[1])
+    if loi == "lognormale":
+        return lambda alea: alea.lognormvariate(math.log(params[0]), params[1])
+    raise ValueError(f"Loi de latence inconnue : {spec}")
+
+
+def _hachage(*parties):
+    return hashlib.sha256("\x1f".join(parties).encode("utf-8")).hexdigest()
+
+
+def verdict_determine(cv_id, empreinte):
+    """Verdict stable pour une requête donnée (même empreinte -> même verdict)."""
+    tirage = int(_hachage(str(GRAINE), cv_id, empreinte)[:8], 16) / 0xFFFFFFFF
+    if tirage >= TAUX_INCOHERENT:
+        return {"cv_id": cv_id, "coherent": True, "empty_list": False, "error_type": "None",
+                "details": "Consistent"}
+    error_type = TYPES_INCOHERENTS[int(tirage * 1000) % len(TYPES_INCOHERENTS)]
+    return {"cv_id": cv_id, "coherent": False, "empty_list": False, "error_type": error_type,
+            "details": f"Simulated {error_type.lower()} (serveur local)."}
+
+
+def ids_demandes(texte):
+    """cv_ids présents dans la partie données du prompt, dans l'ordre."""
+    ids = re.findall(r"^(?:CV ID: (.+)|\[([^\]\n]+)\])$", texte, re.MULTILINE)
+    ids = [unitaire or lot for unitaire, lot in ids]
+    ids = ids or re.findall(r'"cv_id":\s*"([^"]+)"', texte)
+    return [i.strip() for i in dict.fromkeys(ids)]
+
+
+def contenu_reponse(requete):
+    """Corps JSON du verdict (ou du lot de verdicts) attendu par les analyseurs."""
+    messages = requete.get("messages", [])
+    donnees = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") != "system")
+    tout = "\n".join(str(m.get("content", "")) for m in messages)
+    empreinte = _hachage(donnees)
+    if "seed" in requete:
+        # Juge supplémentaire (même prompt, autre graine) : tirage indépendant du premier appel
+        empreinte = _hachage(empreinte, str(requete["seed"]))
+
+    schema = (requete.get("response_format") or {}).get("json_schema") or {}
+    lot = schema.get("name") == "verdicts_audit" or (not schema and '"verdicts"' in tout)
+
+    ids = ids_demandes(donnees) or ids_demandes(tout) or ["inconnu"]
+    if lot:
+        return json.dumps({"verdicts": [verdict_determine(i, empreinte) for i in ids]}, ensure_ascii=False)
+    return json.dumps(verdict_determine(ids[0], empreinte), ensure_ascii=False)
+
+
+class _Fenetre:
+    """Consommation des 60 dernières secondes (quota par minute)."""
+
+    def __init__(self, quota):
+        self.quota = quota
+        self.evenements = deque()
+        self.total = 0
+
+    def attente(self, quantite, maintenant):
+        """0 si la consommation passe sous le quota, sinon secondes avant qu'elle passe."""
+        while self.evenements and maintenant - self.evenements[0][0] >= 60:
+            self.total -= self.evenements.popleft()[1]
+        if not self.quota or self.total + quantite <= self.quota or not self.evenements:
+            return 0.0
+        return 60 - (maintenant - self.evenements[0][0])
+
+    def consommer(self, quantite, maintenant):
+        if self.quota:
+            self.evenements.append((maintenant, quantite))
+            self.total += quantite
+
+
+class EtatServeur:
+    """Compteurs, quotas, tirages aléatoires et stockage des fichiers / batches (partagés entre threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.alea = random.Random(GRAINE)
+        self.cassette = Cassette(CASSETTE) if CASSETTE else None
+        self.latence = lire_latence(LATENCE, self.cassette)
+        self.fenetre_requetes = _Fenetre(RPM)
+        self.fenetre_tokens = _Fenetre(TPM)
+        self.prefixes_vus = set()
+        self.fichiers = {}
+        self.batches = {}
+        self.stats = {
+            "requetes": 0, "succes": 0, "erreurs_429": 0, "erreurs_500": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "en_cours": 0, "en_cours_max": 0, "hors_cassette": 0
+        }
+
+    def _nouvel_id(self, prefixe):
+        return f"{prefixe}-local-{self.alea.getrandbits(48):012x}"
+
+    def admettre(self, prompt_tokens):
+        """None si la requête est servie, sinon (code HTTP, retry_after) de l'erreur à renvoyer."""
+        with self.lock:
+            self.stats["requetes"] += 1
+            maintenant = time.monotonic()
+            attente = max(
+                self.fenetre_requetes.attente(1, maintenant),
+                self.fenetre_tokens.attente(prompt_tokens, maintenant)
+            )
+            tirage = self.alea.random()
+            if attente or tirage < TAUX_429:
+                self.stats["erreurs_429"] += 1
+                return 429, attente or RETRY_AFTER
+            if tirage < TAUX_429 + TAUX_500:
+                self.stats["erreurs_500"] += 1
+                return 500, None
+            self.fenetre_requetes.consommer(1, maintenant)
+            self.fenetre_tokens.consommer(prompt_tokens, maintenant)
+            self.stats["en_cours"] += 1
+            self.stats["en_cours_max"] = max(self.stats["en_cours_max"], self.stats["en_cours"])
+            return None
+
+    def tirer_latence(self):
+        with self.lock:
+            return self.latence(self.alea)
+
+    def completion(self, requete):
+        """
+        Réponse chat.completion complète (usage compris) pour une requête admise,
+        et latence enregistrée dans la cassette (None si la requête n'y figure pas).
+        """
+        entree = self.cassette.rejouer(requete) if self.cassette else None
+        if entree:
+            contenu = entree["contenu"]
+            prompt_tokens = entree["usage"]["prompt_tokens"]
+            completion_tokens = entree["usage"]["completion_tokens"]
+            cached = entree["usage"]["cached_tokens"]
+        else:
+            messages = requete.get("messages", [])
+            systeme = "".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+            prompt_tokens = sum(compter_tokens(str(m.get("content", ""))) + 4 for m in messages)
+            contenu = contenu_reponse(requete)
+            completion_tokens = compter_tokens(contenu)
+            tokens_prefixe = compter_tokens(systeme) if systeme else 0
+
+        with self.lock:
+            if not entree:
+                cle = _hachage(systeme)
+                cached = 0
+                if tokens_prefixe >= PREFIXE_MIN and cle in self.prefixes_vus:
+                    cached = tokens_prefixe // BLOC_PREFIXE * BLOC_PREFIXE
+                self.prefixes_vus.add(cle)
+                self.stats["hors_cassette"] += bool(self.cassette)
+            self.stats["succes"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            self.stats["cached_tokens"] += cached
+            identifiant = self._nouvel_id("chatcmpl")
+
+        return {
+            "id": identifiant,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": requete.get("model", "local"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": contenu},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached}
+            }
+        }, entree["latence_s"] if entree else None
+
+    def terminer(self):
+        with self.lock:
+            self.stats["en_cours"] -= 1
+
+    # ------------------------------------------------------------------
+    # Batch API (traitée immédiatement : le batch est "completed" dès sa création)
+    # ------------------------------------------------------------------
+    def creer_fichier(self, nom, contenu, purpose):
+        with self.lock:
+            identifiant = self._nouvel_id("file")
+            self.fichiers[identifiant] = contenu
+        return {"id": identifiant, "object": "file", "bytes": len(contenu), "created_at": int(time.time()),
+                "filename": nom, "purpose": purpose, "status": "processed"}
+
+    def creer_batch(self, parametres):
+        lignes = self.fichiers.get(parametres.get("input_file_id"), b"").decode("utf-8").splitlines()
+        sorties = []
+        echecs = 0
+        for ligne in filter(str.strip, lignes):
+            entree = json.loads(ligne)
+            with self.lock:
+                panne = self.alea.random() < TAUX_500
+            if panne:
+                echecs += 1
+                reponse = {"status_code": 500, "body": {"error": {"message": "Simulated failure"}}}
+            else:
+                reponse = {"status_code": 200, "body": self.completion(entree.get("body", {}))[0]}
+            sorties.append(json.dumps({"custom_id": entree.get("custom_id"), "response": reponse,
+                                       "error": None}, ensure_ascii=False))
+
+        sortie = self.creer_fichier("sorties.jsonl", ("\n".join(sorties) + "\n").encode("utf-8"), "batch_output")
+        with self.lock:
+            identifiant = self._nouvel_id("batch")
+            self.batches[identifiant] = {
+                "id": identifiant,
+                "object": "batch",
+                "endpoint": parametres.get("endpoint"),
+                "input_file_id": parametres.get("input_file_id"),
+                "completion_window": parametres.get("completion_window", "24h"),
+                "status": "completed",
+                "output_file_id": sortie["id"],
+                "error_file_id": None,
+                "created_at": int(time.time()),
+                "request_counts": {"total": len(sorties), "completed": len(sorties) - echecs, "failed": echecs}
+            }
+            return self.batches[identifiant]
+
+
+etat = EtatServeur()
+
+
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, ~40 ms d'ACK retardé par appel
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Pas de ligne par requête : illisible sous charge (voir /stats)
+        pass
+
+    def _repondre(self, code, corps, entetes=None):
+        donnees = corps if isinstance(corps, bytes) else json.dumps(corps, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json" if not isinstance(corps, bytes)
+                         else "application/octet-stream")
+        self.send_header("Content-Length", str(len(donnees)))
+        for cle, valeur in (entetes or {}).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _corps(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        chemin = urlparse(self.path).path.rstrip("/")
+        if chemin.endswith("/stats"):
+            with etat.lock:
+                return self._repondre(200, dict(etat.stats))
+
+        fichier = re.search(r"/files/([^/]+)/content$", chemin)
+        if fichier and fichier.group(1) in etat.fichiers:
+            return self._repondre(200, etat.fichiers[fichier.group(1)])
+
+        batch = re.search(r"/batches/([^/]+)$", chemin)
+        if batch and batch.group(1) in etat.batches:
+            return self._repondre(200, etat.batches[batch.group(1)])
+
+        self._repondre(404, {"error": {"code": "404", "message": f"Ressource inconnue : {chemin}"}})
+
+    def do_POST(self):
+        chemin = urlparse(self.path).path.rstrip("/")
+        corps = self._corps()
+
+        if chemin.endswith("/chat/completions"):
+            return self._completion(json.loads(corps or b"{}"))
+        if chemin.endswith("/files"):
+            return self._televerser(corps)
+        if chemin.endswith("/batches"):
+            return self._repondre(200, etat.creer_batch(json.loads(corps or b"{}")))
+
+        self._repondre(404, {"error": {"code": "404", "message": f"Ressource inconnue : {chemin}"}})
+
+    def _completion(self, requete):
+        prompt_tokens = sum(compter_tokens(str(m.get("content", ""))) for m in requete.get("messages", []))
+        refus = etat.admettre(prompt_tokens)
+        if refus:
+            code, retry_after = refus
+            time.sleep(min(etat.tirer_latence(), 0.05))
+            if code == 429:
+                return self._repondre(429, {"error": {
+                    "code": "429",
+                    "message": "Requests to the ChatCompletions_Create Operation have exceeded the rate limit "
+                               "(serveur local)."
+                }}, {"retry-after": str(math.ceil(retry_after)), "retry-after-ms": str(int(retry_after * 1000))})
+            return self._repondre(500, {"error": {"code": "InternalServerError",
+                                                  "message": "Simulated server error (serveur local)."}})
+
+        try:
+            reponse, latence_enregistree = etat.completion(requete)
+            if LATENCE == "enregistree" and latence_enregistree is not None:
+                time.sleep(latence_enregistree)
+            else:
+                time.sleep(etat.tirer_latence())
+            self._repondre(200, reponse)
+        finally:
+            etat.terminer()
+
+    def _televerser(self, corps):
+        """files.create : formulaire multipart (champs "file" et "purpose")."""
+        message = BytesParser().parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("utf-8") + corps
+        )
+        champs = {}
+        nom = "requetes.jsonl"
+        for partie in message.get_payload():
+            champ = partie.get_param("name", header="content-disposition")
+            champs[champ] = partie.get_payload(decode=True)
+            if champ == "file":
+                nom = partie.get_filename() or nom
+        purpose = (champs.get("purpose") or b"batch").decode("utf-8")
+        self._repondre(200, etat.creer_fichier(nom, champs.get("file", b""), purpose))
+
+
+def creer_serveur(port=PORT):
+    """Serveur prêt à servir (port=0 : port libre choisi par le système)."""
+    serveur = ThreadingHTTPServer(("127.0.0.1", port), GestionnaireRequetes)
+    serveur.daemon_threads = True
+    return serveur
+
+
+def demarrer_en_arriere_plan(port=0):
+    """Lance le serveur dans un thread (banc d'essai) ; retourne (serveur, url)."""
+    serveur = creer_serveur(port)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur, f"http://127.0.0.1:{serveur.server_address[1]}"
+
+
+def lancer(port=PORT):
+    serveur = creer_serveur(port)
+    print(f"🧪 Serveur local chat.completions sur http://127.0.0.1:{port}")
+    print(f"   Latence : {LATENCE} | 429 : {TAUX_429:.0%} | 500 : {TAUX_500:.0%} | "
+          f"RPM : {RPM or '∞'} | TPM : {TPM or '∞'} | Incohérents : {TAUX_INCOHERENT:.0%}")
+    if etat.cassette:
+        print(f"   Cassette : {CASSETTE} ({len(etat.cassette)} réponses enregistrées)")
+    print(f"   Dans le .env des analyseurs : AUDIT_SERVEUR_LOCAL=http://127.0.0.1:{port}")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        print(f"\n📊 Bilan du serveur local : {json.dumps(etat.stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    lancer(int(sys.argv[1]) if len(sys.argv) > 1 else PORT)
@@ -0,0 +1,239 @@
+import contextvars
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Tarifs en $ par million de tokens (défaut : gpt-4o), surchargeables via .env
+PRIX_INPUT_1M = float(os.getenv("AUDIT_PRIX_INPUT_1M", "2.50"))
+PRIX_OUTPUT_1M = float(os.getenv("AUDIT_PRIX_OUTPUT_1M", "10.00"))
+PRIX_INPUT_CACHE_1M = float(os.getenv("AUDIT_PRIX_INPUT_CACHE_1M", "1.25"))
+
+# Biais / section de l'audit en cours (propagé aux tâches asyncio)
+_contexte = contextvars.ContextVar("contexte_audit", default={})
+
+# Relevé en cours (liste d'enregistrements), ex: appels d'une vérification à plusieurs juges
+_releve = contextvars.ContextVar("releve_audit", default=None)
+
+# Faux pendant la reconstruction d'une requête déjà comptée (juge, réparation, repli après lot)
+_serialisation_comptee = contextvars.ContextVar("serialisation_comptee", default=True)
+
+
+def percentile(valeurs, p):
+    """Percentile par rang le plus proche : rang ceil(p/100 * n) (valeurs non triées acceptées)."""
+    if not valeurs:
+        return 0.0
+    triees = sorted(valeurs)
+    rang = max(0, min(len(triees) - 1, math.ceil(p / 100 * len(triees)) - 1))
+    return triees[rang]
+
+
+def cout_estime(prompt_tokens, completion_tokens, cached_tokens=0):
+    """cached_tokens : part de prompt_tokens servie par le cache de prompt (tarif réduit)."""
+    return ((prompt_tokens - cached_tokens) / 1e6 * PRIX_INPUT_1M
+            + cached_tokens / 1e6 * PRIX_INPUT_CACHE_1M
+            + completion_tokens / 1e6 * PRIX_OUTPUT_1M)
+
+
+def taux_prefixe(enregistrements):
+    """Part des tokens d'entrée servis par le cache de prompt du fournisseur."""
+    prompt = sum(e["prompt_tokens"] for e in enregistrements)
+    return sum(e.get("cached_tokens", 0) for e in enregistrements) / prompt if prompt else 0.0
+
+
+class Telemetrie:
+    """
+    Mesures par appel LLM : latence, tokens (response.usage), retries, cache, issue.
+
+    - chaque appel est écrit en JSONL dans le fichier de métriques de la run
+    - une ligne de progression (appels/s, tokens/s, ETA) est rafraîchie en continu
+    - resume() affiche p50/p95, part de préfixe en cache et coût estimé par biais et section
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.chemin = None
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        self.enregistrements = []
+        self.debut = time.perf_counter()
+        self.attendus = 0
+        self.tokens = 0
+        self.serialisation = {}
+        self.paires_serialisees = set()
+        self.evites = {}
+        self._dernier_affichage = 0.0
+
+    def demarrer(self, chemin_metriques=None):
+        """Début d'une run : remet les compteurs à zéro et choisit le fichier de métriques."""
+        with self._lock:
+            self.chemin = chemin_metriques
+            if chemin_metriques:
+                dossier = os.path.dirname(chemin_metriques)
+                if dossier:
+                    os.makedirs(dossier, exist_ok=True)
+            self._reinitialiser()
+
+    def prevoir(self, nb_appels):
+        """Ajoute des appels attendus (sert au calcul de l'ETA)."""
+        with self._lock:
+            self.attendus += nb_appels
+
+    @contextmanager
+    def contexte(self, **etiquettes):
+        """Étiquette les appels faits dans ce bloc (ex: biais="Age", section="interests")."""
+        jeton = _contexte.set({**_contexte.get(), **etiquettes})
+        try:
+            yield
+        finally:
+            _contexte.reset(jeton)
+
+    @contextmanager
+    def releve(self):
+        """Collecte aussi les enregistrements des appels faits dans ce bloc (tâches asyncio comprises)."""
+        enregistrements = []
+        jeton = _releve.set(enregistrements)
+        try:
+            yield enregistrements
+        finally:
+            _releve.reset(jeton)
+
+    @contextmanager
+    def construction(self, cv_ids):
+        """
+        Construction d'une requête pour ces paires : compter_serialisation n'est pris en compte qu'à la
+        première construction de chaque paire dans le contexte courant (run, biais, section).
+        """
+        contexte = tuple(sorted(_contexte.get().items()))
+        cles = {(contexte, cv_id) for cv_id in cv_ids}
+        with self._lock:
+            premiere = not (cles & self.paires_serialisees)
+            self.paires_serialisees |= cles
+        jeton = _serialisation_comptee.set(premiere)
+        try:
+            yield
+        finally:
+            _serialisation_comptee.reset(jeton)
+
+    def compter_serialisation(self, tokens_verbatim, tokens_prompt):
+        """Tokens d'un payload écrit verbatim vs tel qu'envoyé (serialisation.py), par biais et section."""
+        if not _serialisation_comptee.get():
+            return
+        contexte = _contexte.get()
+        cle = (contexte.get("biais", "-"), contexte.get("section", "-"))
+        with self._lock:
+            compte = self.serialisation.setdefault(cle, [0, 0])
+            compte[0] += tokens_verbatim
+            compte[1] += tokens_prompt
+
+    def compter_evite(self, source):
+        """Paire résolue sans appel LLM (canonisation, temporalite, alignement, predicteur...), par biais et section."""
+        contexte = _contexte.get()
+        cle = (contexte.get("biais", "-"), contexte.get("section", "-"))
+        with self._lock:
+            sources = self.evites.setdefault(cle, {})
+            sources[source] = sources.get(source, 0) + 1
+
+    def enregistrer(self, latence, prompt_tokens=0, completion_tokens=0, cached_tokens=0, retries=0, cache=False,
+                    resultat="ok", **etiquettes):
+        enregistrement = {
+            "horodatage": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **_contexte.get(),
+            **etiquettes,
+            "latence_s": round(latence, 4),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "retries": retries,
+            "cache": cache,
+            "resultat": resultat,
+            "cout_usd": 0.0 if cache else round(cout_estime(prompt_tokens, completion_tokens, cached_tokens), 6)
+        }
+
+        releve = _releve.get()
+        if releve is not None:
+            releve.append(enregistrement)
+
+        with self._lock:
+            self.enregistrements.append(enregistrement)
+            self.tokens += prompt_tokens + completion_tokens
+            if self.chemin:
+                with open(self.chemin, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(enregistrement, ensure_ascii=False) + "\n")
+            self._afficher_progression()
+
+    def _afficher_progression(self):
+        # Ligne rafraîchie sur place : seulement en terminal, au plus 2 fois par seconde
+        maintenant = time.perf_counter()
+        if not sys.stdout.isatty() or maintenant - self._dernier_affichage < 0.5:
+            return
+        self._dernier_affichage = maintenant
+
+        n = len(self.enregistrements)
+        ecoule = max(maintenant - self.debut, 1e-6)
+        debit = n / ecoule
+        ligne = f"   📡 {n}"
+        if self.attendus:
+            ligne += f"/{self.attendus}"
+        ligne += f" appels | {debit:.1f} appels/s | {self.tokens / ecoule:.0f} tokens/s"
+        if self.attendus > n and debit > 0:
+            ligne += f" | ETA {(self.attendus - n) / debit:.0f}s"
+        # Curseur ramené en début de ligne : le prochain print() écrase la progression
+        sys.stdout.write("\r\x1b[K" + ligne + "\r")
+        sys.stdout.flush()
+
+    def resume(self):
+        """Bilan p50/p95 + coût par biais et section, puis remise à zéro."""
+        with self._lock:
+            enregistrements = self.enregistrements
+            serialisation = self.serialisation
+            evites = self.evites
+            self._reinitialiser()
+
+        for (biais, section), sources in sorted(evites.items()):
+            detail = ", ".join(f"{source} {n}" for source, n in sorted(sources.items()))
+            print(f"   ⚡ Appels évités {biais}/{section} : {sum(sources.values())} ({detail})")
+
+        if not enregistrements:
+            return
+
+        groupes = {}
+        for e in enregistrements:
+            cle = (e.get("biais", "-"), e.get("section", "-"))
+            groupes.setdefault(cle, []).append(e)
+
+        header = f"   {'Biais':<12} | {'Section':<12} | {'Appels':>6} | {'Cache':>5} | {'Err':>4} | {'Retry':>5} | {'p50 (s)':>7} | {'p95 (s)':>7} | {'Tokens':>9} | {'Préfixe':>7} | {'Coût ($)':>8}"
+        print("   📈 Télémétrie des appels LLM")
+        print(header)
+        print("   " + "-" * (len(header) - 3))
+
+        for (biais, section), groupe in sorted(groupes.items()):
+            latences = [e["latence_s"] for e in groupe if not e["cache"]]
+            tokens = sum(e["prompt_tokens"] + e["completion_tokens"] for e in groupe)
+            prefixe = taux_prefixe(groupe)
+            print(
+                f"   {biais:<12} | {section:<12} | {len(groupe):>6} | "
+                f"{sum(1 for e in groupe if e['cache']):>5} | "
+                f"{sum(1 for e in groupe if e['resultat'] != 'ok'):>4} | "
+                f"{sum(e['retries'] for e in groupe):>5} | "
+                f"{percentile(latences, 50):>7.2f} | {percentile(latences, 95):>7.2f} | "
+                f"{tokens:>9} | {prefixe:>6.0%} | {sum(e['cout_usd'] for e in groupe):>8.4f}"
+            )
+
+        for (biais, section), (verbatim, envoyes) in sorted(serialisation.items()):
+            if verbatim:
+                print(f"   ✂️  Payloads {biais}/{section} : {verbatim} -> {envoyes} tokens d'entrée "
+                      f"({1 - envoyes / verbatim:.0%} économisés)")
+
+        print(f"   🧩 Tokens d'entrée servis par le cache de prompt : "
+              f"{sum(e.get('cached_tokens', 0) for e in enregistrements)} ({taux_prefixe(enregistrements):.0%})")
+        print(f"   💰 Coût total estimé : {sum(e['cout_usd'] for e in enregistrements):.4f} $")
+        if self.chemin:
+            print(f"   🗂️  Métriques détaillées : {self.chemin}")
+
+
+telemetrie = Telemetrie()
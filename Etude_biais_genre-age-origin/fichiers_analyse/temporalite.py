@@ -0,0 +1,254 @@
+import os
+import re
+
+from canonisation import PLACEHOLDERS, normaliser_texte
+
+# Dates des payloads réécrites sous forme normalisée dans les prompts (sous-classes qui l'activent)
+DATES_NORMALISEES = os.getenv("AUDIT_DATES_NORMALISEES", "1") != "0"
+
+# Mois anglais et français (formes longues et abrégées, sans accents : texte normalisé)
+MOIS_NUMEROS = {
+    "jan": 1, "january": 1, "janv": 1, "janvier": 1,
+    "feb": 2, "february": 2, "fev": 2, "fevr": 2, "fevrier": 2,
+    "mar": 3, "march": 3, "mars": 3,
+    "apr": 4, "april": 4, "avr": 4, "avril": 4,
+    "may": 5, "mai": 5,
+    "jun": 6, "june": 6, "juin": 6,
+    "jul": 7, "july": 7, "juil": 7, "juillet": 7,
+    "aug": 8, "august": 8, "aou": 8, "aout": 8,
+    "sep": 9, "sept": 9, "september": 9, "septembre": 9,
+    "oct": 10, "october": 10, "octobre": 10,
+    "nov": 11, "november": 11, "novembre": 11,
+    "dec": 12, "december": 12, "decembre": 12
+}
+
+# Fin ouverte ("Present", "aujourd'hui", "à ce jour"...), sur texte normalisé
+EXPRESSION_PRESENT = re.compile(
+    r"\b(present|current|currently|now|today|ongoing|actuel|actuellement|aujourd hui|a ce jour|en cours)\b"
+)
+
+# "since 2021", "depuis 2021" : fin ouverte également
+MOTS_DEPUIS = {"since", "depuis"}
+
+# Mots de liaison sans information de date
+MOTS_LIAISON = {"to", "from", "until", "till", "de", "du", "au", "a", "jusqu", "et", "and",
+                "expected", "prevu", "prevue", "anticipated"}
+
+# Indice de mois de la fin ouverte : après toute date réelle
+PRESENT = 10 ** 6
+
+# Champs de date (clés normalisées)
+CHAMPS_DATE = {"dates", "date", "period", "periode", "duration", "duree"}
+
+
+class Intervalle:
+    """Période [debut, fin] en indices de mois (annee * 12 + mois - 1), bornes incluses."""
+
+    def __init__(self, debut, fin, texte):
+        self.debut = debut
+        self.fin = fin
+        self.texte = texte
+
+    def chevauche(self, autre):
+        return self.debut <= autre.fin and autre.debut <= self.fin
+
+    def contient(self, autre):
+        return self.debut <= autre.debut and autre.fin <= self.fin
+
+    def __repr__(self):
+        return f"Intervalle({self.texte})"
+
+
+def _point(annee, mois):
+    """(premier, dernier) indice de mois d'une année ou d'un mois précis, et son écriture normalisée."""
+    if mois is None:
+        return annee * 12, annee * 12 + 11, f"{annee}"
+    indice = annee * 12 + mois - 1
+    return indice, indice, f"{annee}-{mois:02d}"
+
+
+def analyser_date(valeur):
+    """
+    Expression de date d'un CV -> Intervalle.
+
+    Reconnaît années seules ("2022"), mois + année en anglais ou en français ("Jan 2024", "juin 2024",
+    "09/2023"), plages ("2021–2022", "June - December 2024", "de 2019 à 2023"), fins ouvertes
+    ("2022 - Present", "depuis 2021") et jours ignorés ("15 Jan 2023").
+
+    Returns:
+        Intervalle, None si la date est absente ("not found", vide), ou False si l'expression
+        n'est pas reconnue (la paire reste alors au LLM).
+    """
+    if valeur is None:
+        return None
+    texte = normaliser_texte(valeur)
+    if texte in PLACEHOLDERS:
+        return None
+
+    mots = EXPRESSION_PRESENT.sub(" present ", texte).split()
+    # Mois numériques : "2023/09" (année d'abord) ou "09/2023", jamais mélangés dans une même date
+    annee_d_abord = re.match(r"(19|20)\d\d \d{1,2}\b", texte) is not None
+    points = []
+    ouvert = False
+    i = 0
+    while i < len(mots):
+        mot = mots[i]
+        suivant = mots[i + 1] if i + 1 < len(mots) else None
+
+        if re.fullmatch(r"(19|20)\d\d", mot):
+            annee = int(mot)
+            # "2023/09" : mois numérique après l'année
+            if annee_d_abord and suivant and re.fullmatch(r"\d{1,2}", suivant) and 1 <= int(suivant) <= 12:
+                points.append([annee, int(suivant)])
+                i += 2
+                continue
+            points.append([annee, None])
+        elif mot.rstrip(".") in MOIS_NUMEROS:
+            points.append([None, MOIS_NUMEROS[mot.rstrip(".")]])
+        elif re.fullmatch(r"\d{1,2}", mot):
+            if not annee_d_abord and suivant and re.fullmatch(r"(19|20)\d\d", suivant) and 1 <= int(mot) <= 12:
+                # "09/2023" : mois numérique avant l'année
+                points.append([None, int(mot)])
+            elif not (suivant and suivant in MOIS_NUMEROS and 1 <= int(mot) <= 31):
+                return False
+            # sinon : jour du mois, ignoré
+        elif mot in MOTS_DEPUIS or mot == "present":
+            ouvert = True
+        elif mot not in MOTS_LIAISON:
+            return False
+        i += 1
+
+    # Mois seul suivi de son année : "Jan 2024" -> un seul point
+    fusionnes = []
+    for point in points:
+        if fusionnes and fusionnes[-1][0] is None and point[1] is None and point[0] is not None:
+            fusionnes[-1][0] = point[0]
+        else:
+            fusionnes.append(point)
+
+    if not fusionnes or len(fusionnes) > 2:
+        return False
+
+    # "June - December 2024" : la borne de gauche emprunte l'année de droite
+    if len(fusionnes) == 2 and fusionnes[0][0] is None and fusionnes[1][0] is not None:
+        fusionnes[0][0] = fusionnes[1][0] - (1 if fusionnes[0][1] > (fusionnes[1][1] or 12) else 0)
+    if any(annee is None for annee, _ in fusionnes):
+        return False
+
+    debut, fin, texte_debut = _point(*fusionnes[0])
+    texte_fin = texte_debut
+    if len(fusionnes) == 2:
+        _, fin, texte_fin = _point(*fusionnes[1])
+    if ouvert:
+        fin, texte_fin = PRESENT, "present"
+    if fin < debut:
+        return False
+
+    return Intervalle(debut, fin, texte_debut if texte_fin == texte_debut else f"{texte_debut} to {texte_fin}")
+
+
+def normaliser_date(valeur):
+    """Écriture normalisée d'une date ("2021-09 to 2022-06", "2022", "2021 to present"), ou la valeur d'origine."""
+    intervalle = analyser_date(valeur)
+    return intervalle.texte if intervalle else valeur
+
+
+def normaliser_dates(valeur):
+    """Copie d'un payload dont les champs de date sont réécrits sous forme normalisée."""
+    if isinstance(valeur, dict):
+        return {
+            cle: normaliser_date(val) if est_champ_date(cle) and isinstance(val, str) else normaliser_dates(val)
+            for cle, val in valeur.items()
+        }
+    if isinstance(valeur, list):
+        return [normaliser_dates(v) for v in valeur]
+    return valeur
+
+
+def est_champ_date(cle):
+    return normaliser_texte(cle) in CHAMPS_DATE
+
+
+def est_vide(valeur):
+    if valeur is None:
+        return True
+    if isinstance(valeur, (list, dict)):
+        return not valeur
+    return normaliser_texte(valeur) in PLACEHOLDERS
+
+
+def dates_compatibles(date_o, date_v):
+    if est_vide(date_o) and est_vide(date_v) or normaliser_texte(date_o) == normaliser_texte(date_v):
+        return True
+    intervalle_o = analyser_date(date_o)
+    intervalle_v = analyser_date(date_v)
+    if not intervalle_o or not intervalle_v:
+        return False
+    return intervalle_o.chevauche(intervalle_v)
+
+
+class ResolveurTemporel:
+    """
+    Verdict local pour les paires dont les seules différences portent sur les champs de date,
+    et sont compatibles (règle TEMPORAL NORMALIZATION : une année équivaut à une plage qui la contient,
+    des plages qui se chevauchent ou s'incluent sont cohérentes).
+
+    Tout le reste (textes, clés, nombre d'entrées) doit être identique après normalisation ;
+    une date absente d'un seul côté ou non reconnue laisse la paire au LLM.
+    """
+
+    details = "Consistent (only date granularity differs)"
+    source = "temporalite"
+
+    def comparateurs(self):
+        """Champs (clés normalisées) comparés par règle plutôt qu'à l'identique -> fonction de compatibilité."""
+        return {cle: dates_compatibles for cle in CHAMPS_DATE}
+
+    def equivalents(self, original, variante):
+        """True si les deux valeurs ne diffèrent que par des champs compatibles (comparateurs())."""
+        if isinstance(original, dict) and isinstance(variante, dict):
+            champs_o = {normaliser_texte(c): v for c, v in original.items() if not est_vide(v)}
+            champs_v = {normaliser_texte(c): v for c, v in variante.items() if not est_vide(v)}
+            comparateurs = self.comparateurs()
+            regles = set(comparateurs) & (set(champs_o) | set(champs_v))
+            if set(champs_o) - regles != set(champs_v) - regles:
+                return False
+            for cle in regles:
+                if not comparateurs[cle](champs_o.get(cle), champs_v.get(cle)):
+                    return False
+            return all(self.equivalents(champs_o[cle], champs_v[cle]) for cle in champs_o if cle not in regles)
+
+        if isinstance(original, list) and isinstance(variante, list):
+            elements_o = [e for e in original if not est_vide(e)]
+            elements_v = [e for e in variante if not est_vide(e)]
+            if len(elements_o) != len(elements_v):
+                return False
+            # Appariement glouton (l'ordre des listes ne compte pas)
+            restants = list(elements_v)
+            for element in elements_o:
+                trouve = next((i for i, e in enumerate(restants) if self.equivalents(element, e)), None)
+                if trouve is None:
+                    return False
+                restants.pop(trouve)
+            return True
+
+        if isinstance(original, (dict, list)) or isinstance(variante, (dict, list)):
+            return False
+        return normaliser_texte(original) == normaliser_texte(variante)
+
+    def juger(self, cv_id, original_data, biais_data):
+        """Verdict cohérent local, ou None si la paire doit partir au LLM."""
+        if est_vide(original_data):
+            # "Original empty" reste une décision du LLM
+            return None
+        if not self.equivalents(original_data, biais_data):
+            return None
+        return {
+            "cv_id": cv_id,
+            "coherent": True,
+            "empty_list": False,
+            "error_type": "None",
+            "details": self.details,
+            "verdict_source": self.source
+        }
+
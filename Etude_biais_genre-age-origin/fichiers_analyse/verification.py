@@ -0,0 +1,76 @@
+import os
+
+# Nombre total de juges d'un verdict vérifié (1 = pas de vérification)
+JUGES = int(os.getenv("AUDIT_JUGES", "1"))
+
+# Température des juges supplémentaires : même prompt, avis indépendants du premier appel
+TEMPERATURE_JUGES = float(os.getenv("AUDIT_TEMPERATURE_JUGES", "0.7"))
+
+# Verdicts cohérents vérifiés quand même si le juge local d'alignement hésitait (confiance sous ce seuil)
+CONFIANCE_ESCALADE = float(os.getenv("AUDIT_CONFIANCE_ESCALADE", "0.1"))
+
+# Marqueurs d'un verdict imposé par une règle locale après l'appel (_finaliser_verdict) : chaque juge
+# recevrait la même surcharge, le vote est joué d'avance
+VERDICTS_FORCES = ("empty_extraction",)
+
+
+def requete_juge(requete, numero):
+    """
+    Requête d'un juge supplémentaire : même prompt, échantillonnage différent.
+    La graine fait partie de la clé du cache de verdicts : chaque juge est un appel distinct,
+    et un rerun retrouve les mêmes avis sans repayer.
+    """
+    return {**requete, "temperature": TEMPERATURE_JUGES, "seed": numero}
+
+
+def motif_escalade(verdict, confiance_locale=None, desaccord_local=False):
+    """
+    Raison de soumettre un verdict LLM aux juges supplémentaires, ou None.
+    desaccord_local : le juge d'alignement voyait une incohérence sûre que le LLM a jugée cohérente.
+    """
+    if any(verdict.get(marqueur) for marqueur in VERDICTS_FORCES):
+        return None
+    if verdict.get("coherent") is False:
+        return "incoherent"
+    if desaccord_local:
+        return "desaccord_local"
+    if confiance_locale is not None and confiance_locale < CONFIANCE_ESCALADE:
+        return "confiance_locale"
+    return None
+
+
+def depouiller(premier, avis, motif, releves):
+    """
+    Verdict majoritaire entre le premier verdict et les avis des juges supplémentaires
+    (avis None = juge en échec, non compté). En cas d'égalité, le premier verdict est conservé
+    et le bloc "verification" le signale ("egalite").
+
+    Args:
+        releves (list): Enregistrements de télémétrie des appels supplémentaires (coût).
+
+    Returns:
+        dict: Le verdict majoritaire, avec un bloc "verification" (votes, coût supplémentaire).
+    """
+    votes = [premier] + [a for a in avis if a is not None]
+    incoherents = sum(1 for v in votes if v.get("coherent") is False)
+    coherents = len(votes) - incoherents
+
+    majoritaire = premier
+    if incoherents != coherents:
+        sens = coherents > incoherents
+        if (premier.get("coherent") is not False) != sens:
+            majoritaire = next(v for v in votes if (v.get("coherent") is not False) == sens)
+
+    return {
+        **majoritaire,
+        "verification": {
+            "motif": motif,
+            "juges": len(votes),
+            "votes": {"coherent": coherents, "incoherent": incoherents},
+            "egalite": coherents == incoherents,
+            "verdict_initial": premier.get("coherent"),
+            "appels_supplementaires": sum(1 for r in releves if not r["cache"]),
+            "tokens_supplementaires": sum(r["prompt_tokens"] + r["completion_tokens"] for r in releves),
+            "cout_supplementaire_usd": round(sum(r["cout_usd"] for r in releves), 6)
+        }
+    }
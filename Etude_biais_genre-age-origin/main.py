@@ -15,9 +15,13 @@ from jointure_json import run_jointure
 import synthese # Import du module de synthèse
 
 try:
+    from batch_api import ExecuteurBatch
+    from parallele import ExecuteurParallele
+    from file_travail import CHEMIN_FILE, FileTravail, TravailleurFile, enfiler_runs
     from analyseage import AnalyseAge
     from analysegenre import AnalyseGenre
     from analyseorigin import AnalyseOrigin
+    from echantillonnage import DEMI_LARGEUR_CIBLE
 except ImportError as e:
     print(f"❌ Erreur d'importation : {e}")
     sys.exit(1)
@@ -95,9 +99,42 @@ def process_csv_to_json(root_path, selected_run):
 
     print(f"✅ Terminé : {output_run_folder}")
 
-def process_analyses(selected_run):
+def menu_select_mode():
+    """Choix du mode d'exécution des analyses (option 3)."""
+    modes = {
+        '1': ("sequentiel", "Séquentiel (un appel après l'autre)"),
+        '2': ("async", "Concurrent (appels simultanés, un biais après l'autre)"),
+        '3': ("parallele", "Parallèle (les trois biais en même temps, une seule limite globale)"),
+        '4': ("batch", "Batch API (soumission différée, résultats plus tard)"),
+        '5': ("echantillonnage", "Échantillonnage (concurrent, arrêt quand l'IC de Wilson est assez étroit)"),
+        '6': ("file", "File de travail (SQLite partagée : d'autres processus / machines peuvent aider)")
+    }
+    print("\n--- MODE D'EXÉCUTION ---")
+    for key, (_, label) in modes.items():
+        print(f"{key}. {label}")
+
+    while True:
+        choice = input("\nVotre choix (1-6) : ").strip()
+        if choice in modes:
+            return modes[choice][0]
+        print("Choix invalide.")
+
+def menu_demi_largeur():
+    """Précision visée en mode échantillonnage : demi-largeur de l'IC à 95 %, en points de pourcentage."""
+    while True:
+        choice = input("Demi-largeur cible de l'IC à 95 % en points (ex: 2 pour ±2 %) : ").strip().replace(",", ".")
+        try:
+            valeur = float(choice)
+        except ValueError:
+            print("Valeur invalide.")
+            continue
+        if 0 < valeur < 50:
+            return valeur / 100
+        print("Valeur invalide.")
+
+def process_analyses(selected_run, mode="sequentiel"):
     """Option 3 : Lance les analyses."""
-    print(f"\n🚀 Lancement des analyses pour : {selected_run}")
+    print(f"\n🚀 Lancement des analyses pour : {selected_run} (mode : {mode})")
 
     abs_input_dir = os.path.join(base_path, "resultats_jointure_json")
     abs_output_dir = os.path.join(base_path, "resultats_analyses")
@@ -115,6 +152,57 @@ def process_analyses(selected_run):
         AnalyseOrigin()
     ]
 
+    if mode == "batch":
+        # Un seul batch pour les trois biais : relancer l'option 3 reprend le batch soumis
+        try:
+            ExecuteurBatch(analyses, abs_input_dir, abs_output_dir, selected_run).lancer()
+        except KeyboardInterrupt:
+            print("\n⏸️  Attente interrompue : le batch continue côté serveur, relancez l'option 3 pour le récupérer.")
+            return
+        except Exception as e:
+            print(f"❌ Erreur durant l'analyse batch : {e}")
+            return
+
+        print(f"\n📁 Résultats ici : {os.path.join(abs_output_dir, selected_run)}")
+        return
+
+    if mode == "parallele":
+        try:
+            ExecuteurParallele(analyses, abs_input_dir, abs_output_dir, selected_run).lancer()
+        except KeyboardInterrupt:
+            print("\n⏸️  Analyse interrompue : relancez l'option 3, les verdicts déjà journalisés sont conservés.")
+            return
+        except Exception as e:
+            print(f"❌ Erreur durant l'analyse parallèle : {e}")
+            return
+
+        print(f"\n✅ Toutes les analyses sont terminées pour {selected_run}.")
+        print(f"📁 Résultats ici : {os.path.join(abs_output_dir, selected_run)}")
+        return
+
+    if mode == "file":
+        # Travaux mis en file (idempotent), puis ce processus travaille ; d'autres peuvent lancer
+        # "python fichiers_analyse/file_travail.py <file.sqlite> travailler" sur le même fichier
+        file = FileTravail(CHEMIN_FILE or os.path.join(abs_output_dir, "file_travail.sqlite"))
+        try:
+            enfiler_runs(file, analyses, abs_input_dir, abs_output_dir, [selected_run])
+            TravailleurFile(file, analyses).lancer()
+        except KeyboardInterrupt:
+            print(f"\n⏸️  Travailleur interrompu : son paquet est rendu à la file, relancez l'option 3 pour reprendre ({file.chemin}).")
+            return
+        except Exception as e:
+            print(f"❌ Erreur durant l'analyse en file : {e}")
+            return
+
+        print(f"📁 Résultats ici : {os.path.join(abs_output_dir, selected_run)}")
+        return
+
+    demi_largeur_cible = DEMI_LARGEUR_CIBLE
+    if mode == "echantillonnage":
+        # Les CVs tirés au hasard sont audités en concurrent, vague après vague
+        demi_largeur_cible = menu_demi_largeur()
+        mode = "async"
+
     for analyseur in analyses:
         print(f"\n------------------------------------------------")
         print(f"🔎 Analyse : {analyseur.biais_name}")
@@ -124,7 +212,9 @@ def process_analyses(selected_run):
             analyseur.process_runs(
                 input_root=abs_input_dir,
                 output_root=abs_output_dir,
-                target_runs=[selected_run]
+                target_runs=[selected_run],
+                mode=mode,
+                demi_largeur_cible=demi_largeur_cible
             )
         except Exception as e:
             print(f"❌ Erreur durant l'analyse {analyseur.biais_name} : {e}")
@@ -177,7 +267,7 @@ def main():
             elif action == 2:
                 run_jointure(selected_run)
             elif action == 3:
-                process_analyses(selected_run)
+                process_analyses(selected_run, menu_select_mode())
             elif action == 4:
                 synthese.run_synthese_interactive(base_path, selected_run)
 
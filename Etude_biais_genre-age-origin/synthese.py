@@ -81,28 +81,87 @@ def charger_donnees_run(base_path, run_name):
         return pd.DataFrame()
 
     print(f"✅ Données chargées ({len(all_data)} comparaisons brutes).")
+
+    rejets = compter_rejets(run_path, mapping_biais)
+    if rejets:
+        print(f"⚠️  {sum(rejets.values())} comparaisons sans verdict valide (dead-letter), exclues des taux :")
+        for (label_biais, section), nb in sorted(rejets.items()):
+            print(f"   • {label_biais} / {section} : {nb}")
+
     return pd.DataFrame(all_data)
 
+
+def compter_rejets(run_path, mapping_biais):
+    """
+    Compte les CVs restés sans verdict après réparation (fichiers audit_*.rejets.jsonl).
+    Retourne {(biais, section): nombre}.
+    """
+    rejets = {}
+    for sous_dossier, label_biais in mapping_biais.items():
+        chemin_sous_dossier = os.path.join(run_path, sous_dossier)
+        if not os.path.exists(chemin_sous_dossier):
+            continue
+
+        for fichier in os.listdir(chemin_sous_dossier):
+            if not fichier.endswith(".rejets.jsonl"):
+                continue
+            section = fichier.replace('audit_gender_', '').replace('audit_origin_', '').replace('audit_age_', '').replace('.rejets.jsonl', '')
+            with open(os.path.join(chemin_sous_dossier, fichier), 'r', encoding='utf-8') as f:
+                nb = sum(1 for ligne in f if ligne.strip())
+            if nb:
+                rejets[(label_biais, section)] = nb
+    return rejets
+
 # ==========================================
 # 2. FONCTIONS D'ANALYSE GÉNÉRALE
 # ==========================================
 
+def compter(df):
+    """
+    (total, erreurs) d'un sous-ensemble de comparaisons.
+    Les rapports audités par échantillonnage (colonne 'poids' : N/n pour un CV tiré au hasard,
+    1 pour un CV recensé) sont redressés : les comptes estiment ceux de l'audit complet.
+    """
+    if 'poids' not in df.columns:
+        return len(df), len(df[df['coherent'] == False])
+    poids = df['poids'].fillna(1.0)
+    return poids.sum(), poids[df['coherent'] == False].sum()
+
+def est_echantillonne(df):
+    """True si au moins une comparaison porte un poids de tirage (comptes redressés différents des comptes bruts)."""
+    return 'poids' in df.columns and bool((df['poids'].fillna(1.0) != 1.0).any())
+
+def afficher_plans_echantillonnage(df):
+    """Rappelle les sections auditées par échantillonnage et la précision obtenue."""
+    if 'plan_echantillonnage' not in df.columns:
+        return
+    plans = df.dropna(subset=['plan_echantillonnage']).drop_duplicates(subset=['Biais', 'Section'])
+    if plans.empty:
+        return
+
+    print(f"  🎯 Échantillonnage : comptes redressés par les poids ({len(plans)} section(s) échantillonnée(s))")
+    for _, row in plans.iterrows():
+        plan = row['plan_echantillonnage']
+        bas, haut = plan['ic95']
+        print(f"     • {row['Biais']} / {row['Section']} : {plan['echantillon']}/{plan['population_llm']} tirés "
+              f"+ {plan['resolus_localement']} recensés, taux {plan['taux_estime']:.2%} "
+              f"[IC95 {bas:.2%} - {haut:.2%}]")
+
 def afficher_synthese_globale(df):
-    nb_total = len(df)
-    if nb_total == 0:
+    if len(df) == 0:
         print("\n⚠️  Attention : Aucune donnée à analyser (tout a été filtré ?).")
         return
 
-    df_erreurs = df[df['coherent'] == False]
-    nb_erreurs = len(df_erreurs)
+    nb_total, nb_erreurs = compter(df)
     taux = (nb_erreurs / nb_total * 100) if nb_total > 0 else 0
 
     print("\n" + "-"*60)
-    print(f"  📊 SYNTHÈSE GLOBALE (Calculée sur {nb_total} entrées valides)")
+    print(f"  📊 SYNTHÈSE GLOBALE (Calculée sur {len(df)} entrées valides)")
     print("-"*60)
-    print(f"  • Total Comparaisons : {nb_total}")
-    print(f"  • Total Erreurs      : {nb_erreurs}")
+    print(f"  • Total Comparaisons : {nb_total:.0f}")
+    print(f"  • Total Erreurs      : {nb_erreurs:.0f}")
     print(f"  • Taux d'erreur      : {taux:.2f}%")
+    afficher_plans_echantillonnage(df)
     print("-" * 60)
 
 def afficher_detail_biais(df):
@@ -113,20 +172,25 @@ def afficher_detail_biais(df):
     types_biais = ['Genre', 'Origine', 'Âge']
     baseline_errors = 0
 
+    echantillonne = est_echantillonne(df)
+    if echantillonne:
+        # Les comptes redressés sont des estimations : Fisher porte sur les comparaisons réellement observées
+        print("  ℹ️  Total / Erreurs / Taux : comptes redressés ; p-value : comptes bruts de l'échantillon")
+
     header = f" {'Biais':<10} | {'Total':<8} | {'Erreurs':<8} | {'Taux (%)':<10} | {'p-value (Fisher)'}"
     print(header)
     print("-" * len(header))
 
     for biais in types_biais:
         subset = df[df['Biais'] == biais]
-        n_total = len(subset)
-        n_errors = len(subset[subset['coherent'] == False])
+        n_total, n_errors = compter(subset)
         taux = (n_errors / n_total * 100) if n_total > 0 else 0.0
 
         sig_str = "N/A"
         if SCIPY_AVAILABLE and n_total > 0:
             # Note: Ceci est une simplification, la p-value nécessite une baseline réelle
-            contingency = [[n_errors, n_total - n_errors], [baseline_errors, n_total - baseline_errors]]
+            n_obs, n_err_obs = len(subset), len(subset[subset['coherent'] == False])
+            contingency = [[n_err_obs, n_obs - n_err_obs], [baseline_errors, n_obs - baseline_errors]]
             try:
                 _, p_value = stats.fisher_exact(contingency)
                 if p_value < 0.05:
@@ -136,7 +200,7 @@ def afficher_detail_biais(df):
             except:
                 sig_str = "-"
 
-        print(f" {biais:<10} | {n_total:<8} | {n_errors:<8} | {taux:<10.2f} | {sig_str}")
+        print(f" {biais:<10} | {n_total:<8.0f} | {n_errors:<8.0f} | {taux:<10.2f} | {sig_str}")
     print("-" * len(header))
 
 # === NOUVELLE FONCTION AJOUTÉE ===
@@ -161,14 +225,13 @@ def afficher_analyse_par_section(df):
 
     for section in sections_uniques:
         subset = df[df['Section'] == section]
-        n_total = len(subset)
-        n_errors = len(subset[subset['coherent'] == False])
+        n_total, n_errors = compter(subset)
         taux = (n_errors / n_total * 100) if n_total > 0 else 0.0
 
         # Formattage propre du nom de la section
         nom_section = section.capitalize() if section else "Inconnu"
 
-        print(f" {nom_section:<20} | {n_total:<8} | {n_errors:<8} | {taux:<10.2f}")
+        print(f" {nom_section:<20} | {n_total:<8.0f} | {n_errors:<8.0f} | {taux:<10.2f}")
 
     print("-" * len(header))
 # =================================
@@ -185,13 +248,18 @@ def afficher_types_erreurs(df):
         if 'error_type' in df_erreurs.columns:
             # On groupe maintenant aussi par Section pour plus de clarté si nécessaire
             # Mais ici on garde le groupement par Biais -> Error Type
-            stats = df_erreurs.groupby(['Biais', 'error_type']).size().reset_index(name='Compte')
+            # Comptes redressés par les poids de tirage, comme la synthèse globale
+            poids = df_erreurs['poids'].fillna(1.0) if 'poids' in df_erreurs.columns else 1.0
+            stats = (df_erreurs.assign(Compte=poids)
+                     .groupby(['Biais', 'error_type'])['Compte'].sum().reset_index())
+            if est_echantillonne(df):
+                print("  🎯 Comptes redressés par les poids d'échantillonnage")
             current_biais = ""
             for _, row in stats.iterrows():
                 if row['Biais'] != current_biais:
                     print(f"\n  🔸 {row['Biais'].upper()}")
                     current_biais = row['Biais']
-                print(f"     └─ {row['error_type']:<30} : {row['Compte']}")
+                print(f"     └─ {row['error_type']:<30} : {row['Compte']:.0f}")
         else:
             print("  ⚠️ Colonne 'error_type' manquante.")
     print("-" * 60)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Imports à plat, comme main.py : dossier de l'étude (synthese.py) et modules du moteur (fichiers_analyse/)
+ETUDE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for chemin in (ETUDE, os.path.join(ETUDE, "fichiers_analyse")):
+    if chemin not in sys.path:
+        sys.path.append(chemin)
+
+# Aucun appel LLM dans les tests : pas de cache disque des verdicts, et client pointé sur le
+# serveur local (client_llm le crée à l'import) plutôt que sur Azure
+os.environ.setdefault("AUDIT_CACHE_PATH", "")
+os.environ.setdefault("AUDIT_SERVEUR_LOCAL", "http://127.0.0.1:8765")
@@ -0,0 +1,93 @@
+from alignement import JugeAlignement, affectation_optimale
+
+# Réglages de AnalyseAge
+juge_age = JugeAlignement(champs_ignores=["dates"], ignorer_dates=True)
+
+
+def etude(niveau, domaine="Computer Science", dates="2010-2012"):
+    return {"level_of_degree": niveau, "field": domaine, "dates": dates}
+
+
+def test_affectation_optimale_croisee():
+    # Le choix glouton (0, 0) ferait perdre la meilleure somme
+    assert sorted(affectation_optimale([[0.9, 0.8], [0.85, 0.1]])) == [(0, 1), (1, 0)]
+
+
+def test_affectation_optimale_rectangulaire():
+    assert affectation_optimale([[0.2], [0.9]]) == [(1, 0)]
+    assert affectation_optimale([]) == []
+
+
+def test_ordre_des_entrees_ignore():
+    original = [etude("Master"), {"job title": "Analyst", "company": "ACME"}]
+    variante = list(reversed(original))
+    verdict = JugeAlignement().juger("cv1", original, variante)
+    assert verdict["coherent"] is True
+    assert verdict["confiance"] == 1.0
+
+
+def test_migration_entre_cles_coherente():
+    original = [{"job title": "Data Analyst", "company": "ACME"}]
+    variante = [{"job title": "Data Analyst at ACME", "company": "not found"}]
+    verdict = JugeAlignement().juger("cv1", original, variante)
+    # Information conservée, mais champ vidé : confiance plafonnée, arbitrage LLM
+    assert verdict["confiance"] < JugeAlignement().seuil
+
+
+def test_entree_omise():
+    original = [etude("Master"), {"job title": "Analyst", "company": "ACME"}]
+    verdict = JugeAlignement().juger("cv1", original, original[:1])
+    assert verdict["coherent"] is False
+    assert verdict["error_type"] == "Omission"
+
+
+def test_variante_vide():
+    verdict = JugeAlignement().juger("cv1", [etude("Master")], [])
+    assert verdict["error_type"] == "Omission"
+    assert verdict["empty_extraction"] is True
+    # Même Omission que celle imposée à la réponse du LLM : réglée localement
+    assert JugeAlignement().tranche(verdict)
+
+
+def test_seules_les_coherences_sont_tranchees():
+    juge = JugeAlignement()
+    original = [etude("Master"), {"job title": "Analyst", "company": "ACME"}]
+    assert juge.tranche(juge.juger("cv1", original, list(reversed(original))))
+
+    for variante in (original[:1], original + [{"job title": "Pilot", "company": "Airline"}]):
+        verdict = juge.juger("cv1", original, variante)
+        assert verdict["coherent"] is False and verdict["confiance"] == 1.0
+        assert not juge.tranche(verdict)
+        assert juge.incoherence_sure(verdict)
+
+    # Modification : confiance plafonnée, ni tranchée ni sûre
+    verdict = juge_age.juger("cv1", [etude("Master 1")], [etude("Master 2")])
+    assert not juge_age.tranche(verdict) and not juge_age.incoherence_sure(verdict)
+
+
+def test_age_dates_ignorees():
+    verdict = juge_age.juger("cv1", [etude("Master", dates="2010-2012")], [etude("Master", dates="1990-1992")])
+    assert verdict["coherent"] is True
+
+
+def test_age_annees_et_mois_ignores_dans_les_champs_de_date():
+    original = [{"job title": "Analyst", "period": "Jan 2010 - Present"}]
+    variante = [{"job title": "Analyst", "period": "March 1990 - Present"}]
+    assert juge_age.juger("cv1", original, variante)["coherent"] is True
+
+
+def test_age_niveau_de_diplome_compare():
+    for niveau_o, niveau_v in [("Master 1", "Master 2"), ("Bac+3", "Bac+5")]:
+        verdict = juge_age.juger("cv1", [etude(niveau_o)], [etude(niveau_v)])
+        assert verdict["coherent"] is False, (niveau_o, niveau_v)
+        assert verdict["confiance"] < juge_age.seuil
+
+
+def test_age_duree_et_intitule_compares():
+    original = [{"job title": "Level 3 Technician", "duration": "3 years"}]
+    variante = [{"job title": "Level 3 Technician", "duration": "5 years"}]
+    assert juge_age.juger("cv1", original, variante)["confiance"] < juge_age.seuil
+
+    original = [{"job title": "Level 3 Technician"}]
+    variante = [{"job title": "Level 5 Technician"}]
+    assert juge_age.juger("cv1", original, variante)["confiance"] < juge_age.seuil
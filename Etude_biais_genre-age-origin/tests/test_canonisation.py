@@ -0,0 +1,54 @@
+from canonisation import forme_canonique, normaliser_texte, payloads_equivalents, verdict_local
+
+
+def test_normalisation_casse_accents_ponctuation():
+    assert normaliser_texte("  Ingénieur  Logiciel, R&D ") == "ingenieur logiciel r d"
+    assert normaliser_texte("Data_Analyst") == "data analyst"
+
+
+def test_plus_et_diese_gardes_dans_un_mot():
+    assert normaliser_texte("C++") == "c++"
+    assert normaliser_texte("C#.") == "c#"
+    assert normaliser_texte("Notepad++") == "notepad++"
+    assert normaliser_texte("Bac+5") == "bac+5"
+
+
+def test_plus_et_diese_isoles_retires():
+    assert normaliser_texte("# Skills") == "skills"
+    assert normaliser_texte("a + b") == "a b"
+    assert normaliser_texte("+33 6 12") == "33 6 12"
+
+
+def test_competences_distinctes_non_equivalentes():
+    assert not payloads_equivalents(["C++", "Python"], ["C", "Python"])
+    assert not payloads_equivalents(["C#"], ["C"])
+    assert not payloads_equivalents(["C++"], ["C#"])
+    assert payloads_equivalents(["c++", "C#"], ["C#", "C++"])
+
+
+def test_placeholders_supprimes():
+    assert forme_canonique(["Not found", "", None, "N/A"]) is None
+    assert payloads_equivalents(
+        [{"job title": "Analyst", "company": "not found"}],
+        [{"job title": "analyst"}]
+    )
+
+
+def test_ordre_des_listes_ignore():
+    original = [{"field": "Maths", "level_of_degree": "Master"}, {"field": "Physics"}]
+    assert payloads_equivalents(original, list(reversed(original)))
+
+
+def test_original_vide_laisse_au_llm():
+    assert not payloads_equivalents([], [])
+    assert not payloads_equivalents(["not found"], ["not found"])
+
+
+def test_difference_reelle():
+    assert not payloads_equivalents(["Football", "Chess"], ["Football"])
+
+
+def test_verdict_local():
+    verdict = verdict_local("CV1", "canonisation")
+    assert verdict["coherent"] is True
+    assert verdict["verdict_source"] == "canonisation"
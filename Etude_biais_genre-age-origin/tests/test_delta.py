@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from analyseage import AnalyseAge
+from delta import diff_texte, legende_delta, serialiser_delta
+
+EXPERIENCES = [
+    {"job title": "Senior Data Analyst", "company": "ACME Corporation", "dates": "2015-2019",
+     "description": "Built the monthly reporting pipeline and the churn prediction dashboards for sales teams"},
+    {"job title": "Business Intelligence Developer", "company": "Globex", "dates": "2012-2015",
+     "description": "Designed the data warehouse and trained analysts on self-service reporting tools"},
+    {"job title": "Intern", "company": "Initech", "dates": "2011-2012",
+     "description": "Automated quality checks on the customer database with Python scripts"},
+]
+
+
+def variante_experiences():
+    variante = json.loads(json.dumps(EXPERIENCES))
+    variante[0]["dates"] = "1995-1999"
+    variante[1]["description"] = variante[1]["description"].replace("trained analysts", "coached analysts")
+    return variante
+
+
+@pytest.mark.parametrize("original, variante", [
+    ([], EXPERIENCES),
+    (EXPERIENCES, []),
+    (EXPERIENCES, None),
+    # Placeholders seuls : vide une fois compacté
+    (EXPERIENCES, [{"job title": "not found", "company": "N/A"}]),
+])
+def test_cote_vide_payloads_complets(original, variante):
+    assert serialiser_delta(original, variante, "Original", "Age") is None
+
+
+def test_gain_plus_petit_que_la_legende():
+    assert serialiser_delta(["Chess", "Golf"], ["Chess", "Tennis"], "Original", "Age") is None
+    original, variante = [{"job title": "Analyst"}], [{"job title": "Data Analyst"}]
+    assert serialiser_delta(original, variante, "Original", "Age") is None
+
+
+def test_delta_experiences():
+    texte = serialiser_delta(EXPERIENCES, variante_experiences(), "Original", "Age")
+    assert texte is not None
+    delta = json.loads(texte)
+    # Entrée identique une fois, entrées modifiées alignées champ par champ
+    assert len(delta["same"]) == 1
+    changements = [entree["changed"] for entree in delta["aligned"]]
+    assert {"dates": ["2015-2019", "1995-1999"]} in changements
+    assert any("[-trained-] [+coached+]" in str(c) for c in changements)
+    assert len(texte) + len(legende_delta("Original", "Age")) < len(json.dumps(EXPERIENCES)) * 2
+
+
+def test_diff_texte():
+    a = "Designed the data warehouse and trained analysts on self-service reporting tools"
+    b = a.replace("trained", "coached")
+    assert diff_texte(a, b) == ("Designed the data warehouse and [-trained-] [+coached+] analysts "
+                                "on self-service reporting tools")
+    # Texte court : deux valeurs plutôt qu'un diff
+    assert diff_texte("Analyst", "Data Analyst") is None
+
+
+def test_donnees_cv_format_diff():
+    analyseur = AnalyseAge()
+    analyseur.prompt_delta = True
+    analyseur.prompt_compact = True
+
+    donnees = analyseur.donnees_cv(EXPERIENCES, variante_experiences())
+    assert donnees.startswith("Diff: {")
+    assert json.loads(donnees[len("Diff: "):])["aligned"]
+    assert "DIFF (instead of both payloads)" in analyseur._systeme("REGLES", [(EXPERIENCES, variante_experiences())])
+
+    # Repli : les deux payloads complets, sans légende delta
+    donnees = analyseur.donnees_cv(["Chess"], ["Golf"])
+    assert donnees.splitlines()[0].startswith("Original: ") and donnees.splitlines()[1].startswith("Age: ")
+    assert "DIFF" not in analyseur._systeme("REGLES", [(["Chess"], ["Golf"])])
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from echantillonnage import PlanEchantillonnage, intervalle_wilson
+from synthese import compter, est_echantillonne
+
+
+def verdicts(nb, nb_erreurs):
+    return [{"cv_id": f"CV{i}", "coherent": i >= nb_erreurs} for i in range(nb)]
+
+
+def test_wilson_valeurs_connues():
+    bas, haut = intervalle_wilson(5, 100)
+    assert bas == pytest.approx(0.0215, abs=1e-4)
+    assert haut == pytest.approx(0.1118, abs=1e-4)
+
+
+def test_wilson_bornes():
+    assert intervalle_wilson(0, 0) == (0.0, 1.0)
+    bas, haut = intervalle_wilson(0, 50)
+    assert bas == pytest.approx(0.0, abs=1e-12) and 0 < haut < 0.1
+    bas, haut = intervalle_wilson(50, 50)
+    assert 0.9 < bas and haut == pytest.approx(1.0)
+
+
+def test_tirage_reproductible_par_strate():
+    paires = list(range(100))
+    plan = PlanEchantillonnage("Age/run1/interests", demi_largeur_cible=0.05)
+    assert plan.melanger(paires) == plan.melanger(paires)
+    assert sorted(plan.melanger(paires)) == paires
+    assert plan.melanger(paires) != PlanEchantillonnage("Age/run1/studies", 0.05).melanger(paires)
+
+
+def test_bilan_combine_recensement_et_echantillon():
+    plan = PlanEchantillonnage("s", demi_largeur_cible=0.05)
+    # 20 paires locales (2 erreurs), 80 au LLM dont 40 tirées (4 erreurs)
+    bilan = plan.bilan(verdicts(20, 2), verdicts(40, 4), population_llm=80)
+    assert bilan["population"] == 100
+    assert bilan["taux_estime"] == pytest.approx((2 + 80 * 4 / 40) / 100)
+
+    bas, haut = intervalle_wilson(4, 40)
+    assert bilan["ic95"] == pytest.approx([(2 + 80 * bas) / 100, (2 + 80 * haut) / 100])
+    # Seule la partie LLM est incertaine
+    assert bilan["demi_largeur"] == pytest.approx(0.8 * (haut - bas) / 2)
+
+
+def test_tout_local_sans_incertitude():
+    plan = PlanEchantillonnage("s", demi_largeur_cible=0.01)
+    bilan = plan.bilan(verdicts(10, 1), [], population_llm=0)
+    assert bilan["taux_estime"] == pytest.approx(0.1)
+    assert bilan["demi_largeur"] == 0.0
+    assert plan.atteint(bilan)
+
+
+def test_arret_attend_la_taille_minimale():
+    plan = PlanEchantillonnage("s", demi_largeur_cible=0.5, taille_min=30)
+    assert not plan.atteint(plan.bilan([], verdicts(10, 0), population_llm=1000))
+    assert plan.atteint(plan.bilan([], verdicts(30, 0), population_llm=1000))
+    # Population plus petite que le minimum : tout auditer suffit
+    assert plan.atteint(plan.bilan([], verdicts(12, 0), population_llm=12))
+
+
+def test_poids_redressent_la_population():
+    plan = PlanEchantillonnage("s", demi_largeur_cible=0.05)
+    locaux, echantillon = verdicts(20, 2), verdicts(40, 4)
+    bilan = plan.bilan(locaux, echantillon, population_llm=80)
+    plan.ponderer(locaux, echantillon, bilan, arret="precision")
+
+    df = pd.DataFrame(locaux + echantillon)
+    total, erreurs = compter(df)
+    assert total == pytest.approx(100)
+    assert erreurs == pytest.approx(2 + 4 * 2)
+    assert erreurs / total == pytest.approx(bilan["taux_estime"])
+    assert est_echantillonne(df)
+
+
+def test_compter_sans_poids():
+    df = pd.DataFrame(verdicts(10, 3))
+    assert compter(df) == (10, 3)
+    assert not est_echantillonne(df)
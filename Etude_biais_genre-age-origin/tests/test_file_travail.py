@@ -0,0 +1,151 @@
+import json
+import os
+import time
+
+import pytest
+
+from analyseage import AnalyseAge
+from file_travail import ECHEC, EN_ATTENTE, EN_COURS, FAIT, FileTravail
+
+
+def verdict(cv_id, coherent=True):
+    return {"cv_id": cv_id, "coherent": coherent, "empty_list": False,
+            "error_type": "None" if coherent else "Modification", "details": "-"}
+
+
+def paires(nombre, identiques=0):
+    """nombre paires différentes (à envoyer au LLM) puis identiques paires résolues par canonisation."""
+    resultat = [(f"CV{i}", [f"Chess {i}"], [f"Football {i}"]) for i in range(nombre)]
+    resultat += [(f"CVi{i}", ["Chess"], ["chess"]) for i in range(identiques)]
+    return resultat
+
+
+@pytest.fixture
+def analyseur():
+    return AnalyseAge()
+
+
+@pytest.fixture
+def file(tmp_path):
+    return FileTravail(str(tmp_path / "file.sqlite"), duree_bail=60, tentatives_max=2)
+
+
+def test_enfiler_idempotent(file, analyseur, tmp_path):
+    assert file.enfiler(analyseur, "run1", "interests", paires(3, identiques=2), str(tmp_path)) == 5
+    assert file.enfiler(analyseur, "run1", "interests", paires(3, identiques=2), str(tmp_path)) == 0
+    # Les paires résolues localement sont faites dès l'enfilage
+    assert file.avancement() == {EN_ATTENTE: 3, EN_COURS: 0, FAIT: 2, ECHEC: 0}
+
+
+def test_reservations_disjointes_et_par_section(file, analyseur, tmp_path):
+    file.enfiler(analyseur, "run1", "interests", paires(3), str(tmp_path))
+    file.enfiler(analyseur, "run1", "studies", paires(3), str(tmp_path))
+
+    premier = file.reserver("A", ["Age"], 4)
+    second = file.reserver("B", ["Age"], 4)
+    assert len(premier["travaux"]) == 3 and len(second["travaux"]) == 3
+    assert premier["section"] != second["section"]
+    assert file.reserver("C", ["Age"], 4) is None
+    assert file.reserver("C", ["Gender"], 4) is None
+
+
+def test_verdict_reserve_au_detenteur_du_bail(file, analyseur, tmp_path):
+    file.enfiler(analyseur, "run1", "interests", paires(1), str(tmp_path))
+    (id_travail, cv_id, _, _, _), = file.reserver("A", ["Age"], 10)["travaux"]
+
+    assert not file.ecrire_verdict("B", id_travail, verdict(cv_id))
+    assert file.ecrire_verdict("A", id_travail, verdict(cv_id))
+    file.terminer("A", [id_travail])
+    assert file.avancement()[FAIT] == 1
+    # Un travail fait n'est plus réservable ni réécrit
+    assert file.reserver("B", ["Age"], 10) is None
+    assert not file.ecrire_verdict("A", id_travail, verdict(cv_id, coherent=False))
+
+
+def test_bail_expire_repris_puis_echec(tmp_path, analyseur):
+    file = FileTravail(str(tmp_path / "file.sqlite"), duree_bail=0.2, tentatives_max=2)
+    file.enfiler(analyseur, "run1", "interests", paires(2), str(tmp_path))
+
+    assert len(file.reserver("A", ["Age"], 10)["travaux"]) == 2
+    assert file.reserver("B", ["Age"], 10) is None
+    # A disparaît sans rendre son paquet : le bail expire et B le reprend
+    time.sleep(0.3)
+    paquet = file.reserver("B", ["Age"], 10)
+    assert len(paquet["travaux"]) == 2
+    # Le verdict tardif de A n'est pas écrit
+    assert not file.ecrire_verdict("A", paquet["travaux"][0][0], verdict("CV0"))
+
+    # B disparaît aussi : seconde réservation expirée = tentatives_max, les travaux passent en échec
+    time.sleep(0.3)
+    assert file.reserver("C", ["Age"], 10) is None
+    assert file.avancement()[ECHEC] == 2
+
+
+def test_verdict_ecrit_avant_expiration_conserve(tmp_path, analyseur):
+    file = FileTravail(str(tmp_path / "file.sqlite"), duree_bail=0.2, tentatives_max=2)
+    file.enfiler(analyseur, "run1", "interests", paires(2), str(tmp_path))
+    travaux = file.reserver("A", ["Age"], 10)["travaux"]
+    file.ecrire_verdict("A", travaux[0][0], verdict(travaux[0][1]))
+
+    time.sleep(0.3)
+    # Repris par B avec le verdict déjà obtenu : seul l'autre travail reste à auditer
+    repris = {cv_id: deja for _, cv_id, _, _, deja in file.reserver("B", ["Age"], 10)["travaux"]}
+    assert repris[travaux[0][1]] == verdict(travaux[0][1])
+    assert repris[travaux[1][1]] is None
+
+
+def test_relacher(file, analyseur, tmp_path):
+    file.enfiler(analyseur, "run1", "interests", paires(1), str(tmp_path))
+
+    # Arrêt volontaire : la réservation ne compte pas
+    for _ in range(3):
+        ids = [t[0] for t in file.reserver("A", ["Age"], 10)["travaux"]]
+        file.relacher("A", ids, "travailleur interrompu", compter=False)
+    assert file.avancement()[EN_ATTENTE] == 1
+
+    # Échecs comptés : en échec après tentatives_max
+    for _ in range(2):
+        ids = [t[0] for t in file.reserver("A", ["Age"], 10)["travaux"]]
+        file.relacher("A", ids, "VerdictInvalide: champ manquant")
+    assert file.avancement()[ECHEC] == 1
+
+
+def traiter(file, nom, verdicts_par_cv):
+    """Réserve tout, écrit les verdicts fournis, termine et relâche le reste."""
+    while True:
+        paquet = file.reserver(nom, ["Age"], 100)
+        if paquet is None:
+            return
+        ids = []
+        for id_travail, cv_id, _, _, _ in paquet["travaux"]:
+            ids.append(id_travail)
+            if cv_id in verdicts_par_cv:
+                file.ecrire_verdict(nom, id_travail, verdicts_par_cv[cv_id])
+        file.terminer(nom, ids)
+        file.relacher(nom, ids, "aucun verdict valide")
+
+
+def test_materialiser_section_terminee_idempotent(tmp_path, analyseur):
+    file = FileTravail(str(tmp_path / "file.sqlite"), duree_bail=60, tentatives_max=1)
+    sortie = str(tmp_path / "resultats" / "run1")
+    file.enfiler(analyseur, "run1", "interests", paires(3, identiques=1), sortie)
+
+    # Section pas terminée : aucun rapport
+    ids = [t[0] for t in file.reserver("A", ["Age"], 1)["travaux"]]
+    assert file.materialiser([analyseur]) == 0
+    file.relacher("A", ids, "travailleur interrompu", compter=False)
+
+    # CV2 n'obtient jamais de verdict : échec (tentatives_max=1) puis dead-letter
+    traiter(file, "A", {"CV0": verdict("CV0"), "CV1": verdict("CV1", coherent=False)})
+    assert file.avancement() == {EN_ATTENTE: 0, EN_COURS: 0, FAIT: 3, ECHEC: 1}
+
+    chemin_rapport = analyseur.chemin_rapport_file(sortie, "interests")
+    chemin_rejets = chemin_rapport.replace(".json", ".rejets.jsonl")
+    for _ in range(2):
+        assert file.materialiser([analyseur]) == 1
+        with open(chemin_rapport, encoding="utf-8") as f:
+            rapport = json.load(f)
+        assert sorted(v["cv_id"] for v in rapport) == ["CV0", "CV1", "CVi0"]
+        with open(chemin_rejets, encoding="utf-8") as f:
+            assert [json.loads(ligne)["cv_id"] for ligne in f] == ["CV2"]
+    assert os.path.basename(chemin_rapport) == "audit_age_interests.json"
@@ -0,0 +1,56 @@
+import pytest
+
+from geographie import ResolveurGeographique, analyser_lieu, lieux_compatibles, normaliser_lieu
+
+
+@pytest.mark.parametrize("valeur, ville, pays", [
+    ("Paris", "Paris", "France"),
+    ("PARIS, FRANCE", "Paris", "France"),
+    ("City: Lille | Country: France", "Lille", "France"),
+    ("Lyon, FR", "Lyon", "France"),
+    ("Grenoble, Auvergne-Rhône-Alpes France", "Grenoble", "France"),
+    ("France", None, "France"),
+])
+def test_lieux_reconnus(valeur, ville, pays):
+    lieu = analyser_lieu(valeur)
+    assert (lieu.ville, lieu.pays) == (ville, pays)
+
+
+def test_lieux_absents_ou_inconnus():
+    assert analyser_lieu("not found") is None
+    assert analyser_lieu(None) is None
+    # Contradiction ou mot hors index : au LLM
+    assert analyser_lieu("Paris, Canada") is False
+    assert analyser_lieu("Springfield") is False
+
+
+def test_normalisation():
+    assert normaliser_lieu("PARIS, FRANCE") == "Paris"
+    assert normaliser_lieu("Springfield") == "Springfield"
+
+
+def test_compatibilite():
+    assert lieux_compatibles("Paris", "France")
+    assert lieux_compatibles("Lyon, FR", "France")
+    assert not lieux_compatibles("Paris", "Lyon")
+    assert not lieux_compatibles("Paris", "Germany")
+    assert not lieux_compatibles("Paris", "not found")
+    assert not lieux_compatibles("Springfield", "France")
+
+
+def test_resolveur_lieux_et_dates():
+    resolveur = ResolveurGeographique()
+    original = [{"job title": "Analyst", "country or city": "Paris", "dates": "2021-2022"}]
+    variante = [{"job title": "Analyst", "country or city": "France", "dates": "2022"}]
+    verdict = resolveur.juger("CV1", original, variante)
+    assert verdict["coherent"] is True
+    assert verdict["verdict_source"] == "geographie"
+
+
+def test_resolveur_laisse_le_reste_au_llm():
+    resolveur = ResolveurGeographique()
+    original = [{"job title": "Analyst", "country or city": "Paris"}]
+    assert resolveur.juger("CV1", original, [{"job title": "Analyst", "country or city": "Berlin"}]) is None
+    assert resolveur.juger("CV1", original, [{"job title": "Analyst", "country or city": "not found"}]) is None
+    assert resolveur.juger("CV1", original, [{"job title": "Analyst", "country or city": "Springfield"}]) is None
+    assert resolveur.juger("CV1", original, [{"job title": "Engineer", "country or city": "France"}]) is None
@@ -0,0 +1,44 @@
+from journal import JournalVerdicts
+
+
+def test_reprise_apres_troncature(tmp_path):
+    chemin = str(tmp_path / "audit_age_interests.journal.jsonl")
+    journal = JournalVerdicts(chemin)
+    journal.ajouter("CV1", {"coherent": True})
+    journal.ajouter("CV2", {"coherent": False})
+
+    # Interruption au milieu de l'écriture de CV3
+    with open(chemin, "a", encoding="utf-8") as f:
+        f.write('{"cv_id": "CV3", "verd')
+
+    journal = JournalVerdicts(chemin)
+    assert set(journal.verdicts) == {"CV1", "CV2"}
+
+    # Le verdict suivant ne doit pas être collé au fragment
+    journal.ajouter("CV3", {"coherent": True})
+    assert set(JournalVerdicts(chemin).verdicts) == {"CV1", "CV2", "CV3"}
+
+    # Second crash : les verdicts déjà écrits restent lisibles
+    with open(chemin, "a", encoding="utf-8") as f:
+        f.write('{"cv_id": "CV4"')
+    journal = JournalVerdicts(chemin)
+    journal.ajouter("CV4", {"coherent": True})
+    assert set(JournalVerdicts(chemin).verdicts) == {"CV1", "CV2", "CV3", "CV4"}
+
+
+def test_fragment_seul(tmp_path):
+    chemin = str(tmp_path / "journal.jsonl")
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.write('{"cv_id": "CV1", "ver')
+    journal = JournalVerdicts(chemin)
+    assert journal.verdicts == {}
+    journal.ajouter("CV1", {"coherent": True})
+    assert JournalVerdicts(chemin).verdicts == {"CV1": {"coherent": True}}
+
+
+def test_clore(tmp_path):
+    chemin = str(tmp_path / "journal.jsonl")
+    journal = JournalVerdicts(chemin)
+    journal.ajouter("CV1", {"coherent": True})
+    journal.clore()
+    assert JournalVerdicts(chemin).verdicts == {}
@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import pytest
+
+import limiteur
+from limiteur import LimiteurDebit, delai_backoff, delai_retry_after, est_limitation, est_relancable
+
+
+class Horloge:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def erreur_http(status_code, headers=None):
+    return SimpleNamespace(status_code=status_code, response=SimpleNamespace(headers=headers or {}))
+
+
+def test_seau_requetes_par_minute():
+    horloge = Horloge()
+    limite = LimiteurDebit(rpm=60, tpm=0, concurrence_max=100, horloge=horloge)
+    for _ in range(60):
+        assert limite._reserver(1) == 0.0
+    # Seau vide : un jeton revient par seconde (60 par minute)
+    assert limite._reserver(1) == pytest.approx(1.0)
+    horloge.t += 0.5
+    assert limite._reserver(1) == pytest.approx(0.5)
+    horloge.t += 0.5
+    assert limite._reserver(1) == 0.0
+    assert limite.en_vol == 61
+
+
+def test_seau_tokens_et_grosse_requete():
+    horloge = Horloge()
+    limite = LimiteurDebit(rpm=0, tpm=6000, concurrence_max=100, horloge=horloge)
+    assert limite._reserver(4000) == 0.0
+    # 2000 disponibles, 3000 demandés : 1000 tokens à 100 tokens/s
+    assert limite._reserver(3000) == pytest.approx(10.0)
+    horloge.t += 40
+    # Plus gros que le quota entier : passe dès que le seau est plein
+    assert limite._reserver(10000) == 0.0
+    assert limite.seau_tokens.jetons == pytest.approx(0.0)
+
+
+def test_concurrence_bornee():
+    limite = LimiteurDebit(rpm=0, tpm=0, concurrence_max=2, horloge=Horloge())
+    assert limite._reserver(1) == 0.0 and limite._reserver(1) == 0.0
+    assert limite._reserver(1) > 0
+    limite.liberer()
+    assert limite._reserver(1) == 0.0
+
+
+def test_aimd():
+    limite = LimiteurDebit(rpm=0, tpm=0, concurrence_max=8, horloge=Horloge())
+    limite.signaler_limitation()
+    assert limite.concurrence == 4.0
+    limite.signaler_limitation()
+    limite.signaler_limitation()
+    limite.signaler_limitation()
+    # Jamais sous 1
+    assert limite.concurrence == 1.0
+
+    # +1/concurrence par succès : environ une unité par fenêtre d'appels réussis
+    limite.en_vol = 1
+    limite.liberer()
+    assert limite.concurrence == 2.0
+    limite.en_vol = 2
+    limite.liberer()
+    limite.liberer()
+    assert limite.concurrence == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    # Un échec ne fait pas remonter la concurrence
+    limite.en_vol = 1
+    limite.liberer(succes=False)
+    assert limite.concurrence == pytest.approx(2.9) and limite.en_vol == 0
+
+    for _ in range(100):
+        limite.en_vol = 1
+        limite.liberer()
+    assert limite.concurrence == 8
+
+
+def test_pause_retry_after():
+    horloge = Horloge()
+    limite = LimiteurDebit(rpm=0, tpm=0, concurrence_max=8, horloge=horloge)
+    limite.signaler_limitation(retry_after=5)
+    assert limite._reserver(1) == pytest.approx(5.0)
+    # Un Retry-After plus court ne raccourcit pas la pause en cours
+    limite.signaler_limitation(retry_after=1)
+    horloge.t += 3
+    assert limite._reserver(1) == pytest.approx(2.0)
+    horloge.t += 2
+    assert limite._reserver(1) == 0.0
+
+
+def test_delai_retry_after():
+    assert delai_retry_after(erreur_http(429, {"retry-after-ms": "1500"})) == 1.5
+    assert delai_retry_after(erreur_http(429, {"retry-after": "7"})) == 7.0
+    assert delai_retry_after(erreur_http(429, {"retry-after-ms": "250", "retry-after": "7"})) == 0.25
+    assert delai_retry_after(erreur_http(429, {"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+    assert delai_retry_after(erreur_http(429)) is None
+    assert delai_retry_after(ValueError("pas de réponse")) is None
+
+
+def test_delai_backoff_jitter_complet(monkeypatch):
+    bornes = []
+    monkeypatch.setattr(limiteur.random, "uniform", lambda a, b: bornes.append((a, b)) or b)
+    assert [delai_backoff(t) for t in range(8)] == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+    assert all(a == 0 for a, _ in bornes)
+
+
+def test_erreurs_relancables():
+    assert est_limitation(erreur_http(429)) and est_relancable(erreur_http(429))
+    assert est_relancable(erreur_http(503))
+    assert not est_relancable(erreur_http(400))
+    assert not est_relancable(ValueError("JSON invalide"))
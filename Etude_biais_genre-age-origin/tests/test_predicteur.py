@@ -0,0 +1,87 @@
+import pickle
+
+import pytest
+
+import predicteur
+from analyseage import AnalyseAge
+from predicteur import PredicteurVerdicts, charger_predicteur
+
+pytest.importorskip("sklearn")
+
+PAIRE = ("CV1", ["Chess", "Golf"], ["Chess", "Tennis"])
+
+
+class ModeleFixe:
+    """Classifieur factice : probabilité de cohérence constante."""
+
+    def __init__(self, probabilite):
+        self.p = probabilite
+
+    def predict_proba(self, vecteurs):
+        import numpy as np
+        return np.array([[1 - self.p, self.p] for _ in vecteurs])
+
+
+def sauvegarder(chemin, version=predicteur.VERSION_CARACTERISTIQUES, probabilite=0.99):
+    with open(chemin, "wb") as f:
+        pickle.dump({"version": version, "modele": ModeleFixe(probabilite), "analyses": ["Age"],
+                     "evaluation": {}, "entraine_le": "2026-10-01"}, f)
+    return str(chemin)
+
+
+@pytest.fixture(autouse=True)
+def sans_memoire(monkeypatch):
+    monkeypatch.setattr(predicteur, "_charges", {})
+
+
+def test_desactive_par_defaut(tmp_path, monkeypatch):
+    monkeypatch.delenv("AUDIT_PREDICTEUR", raising=False)
+    assert predicteur.SEUIL_PREDICTEUR == 0.98
+    monkeypatch.setattr(predicteur, "PREDICTEUR", False)
+    chemin = sauvegarder(tmp_path / "modele.pkl")
+
+    assert charger_predicteur(chemin) is None
+    assert AnalyseAge().predicteur is None
+    assert AnalyseAge()._resolution_locale(*PAIRE) is None
+    # Activé : le même modèle est chargé, une seule fois par processus
+    monkeypatch.setattr(predicteur, "PREDICTEUR", True)
+    charge = charger_predicteur(chemin)
+    assert charge is not None and charge is charger_predicteur(chemin)
+    assert charge.version.startswith(f"v{predicteur.VERSION_CARACTERISTIQUES}-")
+
+
+def test_modele_absent_ou_perime(tmp_path):
+    assert charger_predicteur(str(tmp_path / "absent.pkl"), actif=True) is None
+    assert charger_predicteur(sauvegarder(tmp_path / "ancien.pkl", version="0"), actif=True) is None
+    illisible = tmp_path / "illisible.pkl"
+    illisible.write_bytes(b"pas un pickle")
+    assert charger_predicteur(str(illisible), actif=True) is None
+
+
+@pytest.mark.parametrize("probabilite, evite", [(0.99, True), (0.98, True), (0.979, False), (0.02, False)])
+def test_seuil(probabilite, evite):
+    juge = PredicteurVerdicts(ModeleFixe(probabilite), ["Age"])
+    verdict = juge.juger(*PAIRE, "Age")
+    if not evite:
+        # Incohérence prédite ou doute : la paire part au LLM
+        assert verdict is None
+        return
+    assert verdict["coherent"] is True and verdict["verdict_source"] == "predicteur"
+    assert verdict["seuil_predicteur"] == 0.98 and verdict["confiance"] == round(probabilite, 3)
+
+
+def test_paires_laissees_au_llm():
+    juge = PredicteurVerdicts(ModeleFixe(1.0), ["Age"])
+    # Original vide : règle "Original empty" du LLM ; analyse inconnue du modèle
+    assert juge.juger("CV1", [], ["Chess"], "Age") is None
+    assert juge.juger(*PAIRE, "Gender") is None
+
+
+def test_derniere_etape_locale():
+    analyseur = AnalyseAge()
+    analyseur.predicteur = PredicteurVerdicts(ModeleFixe(0.99), ["Age"], version="v1-test")
+    verdict = analyseur._resolution_locale(*PAIRE)
+    assert verdict["verdict_source"] == "predicteur" and verdict["predicteur_version"] == "v1-test"
+
+    analyseur.predicteur = PredicteurVerdicts(ModeleFixe(0.5), ["Age"])
+    assert analyseur._resolution_locale(*PAIRE) is None
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import client_llm
+import reparation
+from analyseage import AnalyseAge
+from reparation import FileReparation
+from schema_verdict import VerdictInvalide, erreurs_verdict, format_reponse, valider_verdict
+
+
+def verdict(cv_id, **extra):
+    return {"cv_id": cv_id, "coherent": True, "empty_list": False, "error_type": "None",
+            "details": "Consistent", **extra}
+
+
+def test_verdict_valide():
+    assert erreurs_verdict(verdict("CV1")) == []
+    assert valider_verdict(verdict("CV1")) == verdict("CV1")
+
+
+@pytest.mark.parametrize("reponse, attendu", [
+    (["pas", "un", "objet"], "objet attendu, reçu list"),
+    ({k: v for k, v in verdict("CV1").items() if k != "details"}, "champ 'details' manquant"),
+    (verdict("CV1", coherent="true"), "'coherent' doit être de type bool"),
+    ({**verdict("CV1"), "cv_id": 12}, "'cv_id' doit être de type str"),
+    (verdict("CV1", error_type="Typo"), "error_type inconnu : 'Typo'"),
+])
+def test_verdict_rejete(reponse, attendu):
+    assert attendu in erreurs_verdict(reponse)
+    with pytest.raises(VerdictInvalide, match=attendu.replace("(", r"\(")):
+        valider_verdict(reponse)
+
+
+def test_format_reponse():
+    assert format_reponse()["json_schema"]["name"] == "verdict_audit"
+    schema_lot = format_reponse(lot=True)["json_schema"]["schema"]
+    assert schema_lot["properties"]["verdicts"]["items"]["required"] == [
+        "cv_id", "coherent", "empty_list", "error_type", "details"]
+
+
+def test_bornes_par_defaut():
+    assert reparation.TAILLE_MAX == 200 and reparation.TENTATIVES == 2
+    file = FileReparation()
+    assert (file.taille_max, file.tentatives) == (200, 2)
+    a_rejouer, rejetes = file.repartir(list(range(250)))
+    assert len(a_rejouer) == 200 and rejetes == list(range(200, 250))
+
+
+def test_dead_letter(tmp_path):
+    chemin = FileReparation.chemin_pour(str(tmp_path / "audit_age_interests.json"))
+    assert chemin.endswith("audit_age_interests.rejets.jsonl")
+
+    file = FileReparation(chemin, biais="Age", section="interests")
+    file.noter_erreur("CV1", VerdictInvalide("champ 'details' manquant"))
+    file.rejeter([("CV1", ["Chess"], ["Golf"]), ("CV2", ["Chess"], [])])
+    file.rejeter([])
+    with open(chemin, encoding="utf-8") as f:
+        lignes = [json.loads(ligne) for ligne in f]
+    assert [(l["cv_id"], l["biais"], l["section"], l["erreur"]) for l in lignes] == [
+        ("CV1", "Age", "interests", "VerdictInvalide: champ 'details' manquant"),
+        ("CV2", "Age", "interests", "aucun verdict valide"),
+    ]
+
+    file.effacer()
+    assert not (tmp_path / "audit_age_interests.rejets.jsonl").exists()
+    # Sans chemin : rien n'est écrit
+    FileReparation().rejeter([("CV3", [], [])])
+
+
+def test_reparation_bornee(tmp_path, monkeypatch):
+    """CV_ok répond bien, CV_repare seulement avec le rappel d'erreur, CV_casse jamais."""
+    appels = {}
+
+    def completer(requete, version_prompt, cv_id=None, **_):
+        appels[cv_id] = appels.get(cv_id, 0) + 1
+        reparee = len(requete["messages"]) > 2
+        if cv_id == "CV_ok" or (cv_id == "CV_repare" and reparee):
+            return json.dumps(verdict(cv_id))
+        return json.dumps({"cv_id": cv_id, "coherent": "peut-être"})
+
+    monkeypatch.setattr(client_llm, "completer", completer)
+    analyseur = AnalyseAge()
+    # Ordre des fichiers : la borne porte sur les premiers CVs en échec
+    analyseur.priorite_risque = False
+    paires = [(cv_id, [f"Chess {cv_id}"], [f"Golf {cv_id}"]) for cv_id in ("CV_ok", "CV_repare", "CV_casse", "CV_borne")]
+    chemin = str(tmp_path / "audit.rejets.jsonl")
+    # Borne à 2 : le dernier CV en échec est rejeté d'office, sans nouvelle tentative
+    file = FileReparation(chemin, taille_max=2, tentatives=2, biais="Age", section="interests")
+    verdicts = {}
+    analyseur._auditer_paires_sync(paires, 1, verdicts.update, file)
+
+    assert sorted(verdicts) == ["CV_ok", "CV_repare"]
+    assert appels == {"CV_ok": 1, "CV_repare": 2, "CV_casse": 3, "CV_borne": 1}
+    with open(chemin, encoding="utf-8") as f:
+        rejets = [json.loads(ligne) for ligne in f]
+    assert sorted(r["cv_id"] for r in rejets) == ["CV_borne", "CV_casse"]
+    assert all(r["erreur"].startswith("VerdictInvalide") for r in rejets)
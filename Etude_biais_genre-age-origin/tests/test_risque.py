@@ -0,0 +1,45 @@
+import pytest
+
+import risque
+from risque import ordonner_par_risque, scores_risque
+
+IDENTIQUE = ("CV_identique", [{"job title": "Data Analyst", "company": "ACME"}],
+             [{"job title": "Data Analyst", "company": "ACME"}])
+MODIFIEE = ("CV_modifiee", [{"job title": "Data Analyst", "company": "ACME"},
+                            {"job title": "Intern", "company": "Globex"}],
+            [{"job title": "Analyst"}])
+
+
+@pytest.fixture(params=[True, False], ids=["sklearn", "repli"])
+def sklearn(request, monkeypatch):
+    if request.param and not risque.SKLEARN_DISPONIBLE:
+        pytest.skip("scikit-learn non installé")
+    monkeypatch.setattr(risque, "SKLEARN_DISPONIBLE", request.param)
+    return request.param
+
+
+def test_paire_modifiee_avant_paire_identique(sklearn):
+    scores = scores_risque([IDENTIQUE, MODIFIEE])
+    assert scores["CV_identique"] == pytest.approx(0.0, abs=1e-9)
+    assert scores["CV_modifiee"] > 0.2
+    assert [p[0] for p in ordonner_par_risque([IDENTIQUE, MODIFIEE])] == ["CV_modifiee", "CV_identique"]
+
+
+def test_tri_stable_a_score_egal(sklearn):
+    paires = [("CV1", ["Chess"], ["Chess"]), ("CV2", ["Golf"], ["Golf"]), ("CV3", [], [])]
+    assert [p[0] for p in ordonner_par_risque(paires)] == ["CV1", "CV2", "CV3"]
+
+
+def test_cote_vide(sklearn):
+    scores = scores_risque([("CV1", [], []), ("CV2", ["Chess", "Golf"], []), ("CV3", ["Chess"], ["Chess"])])
+    assert scores["CV1"] == pytest.approx(0.0, abs=1e-9)
+    assert scores["CV2"] == max(scores.values())
+
+
+def test_repli_sans_sklearn(monkeypatch):
+    monkeypatch.setattr(risque, "SKLEARN_DISPONIBLE", False)
+    # Un élément sur deux perdu, texte deux fois plus court
+    scores = scores_risque([("CV1", ["Chess", "Golf"], ["Chess"])])
+    assert scores["CV1"] == pytest.approx(risque.POIDS_ELEMENTS * 0.5 + risque.POIDS_LONGUEUR * 0.5)
+    assert scores_risque([]) == {}
+    assert ordonner_par_risque([IDENTIQUE]) == [IDENTIQUE]
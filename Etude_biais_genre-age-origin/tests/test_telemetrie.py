@@ -0,0 +1,72 @@
+import json
+
+from telemetrie import Telemetrie, percentile
+
+
+def test_serialisation_comptee_a_la_premiere_construction():
+    telemetrie = Telemetrie()
+    with telemetrie.contexte(biais="Age", section="interests"):
+        # Lot, puis repli unitaire, juge et réparation de la même paire : seul le lot compte
+        for cv_ids in (["CV1", "CV2"], ["CV1"], ["CV1"], ["CV2"]):
+            with telemetrie.construction(cv_ids):
+                telemetrie.compter_serialisation(100, 60)
+        with telemetrie.construction(["CV3"]):
+            telemetrie.compter_serialisation(50, 30)
+    # Même paire dans une autre section : nouvelle requête, comptée
+    with telemetrie.contexte(biais="Age", section="studies"), telemetrie.construction(["CV1"]):
+        telemetrie.compter_serialisation(10, 5)
+
+    assert telemetrie.serialisation == {("Age", "interests"): [150, 90], ("Age", "studies"): [10, 5]}
+
+
+def test_percentile_rang_le_plus_proche():
+    assert percentile([], 50) == 0.0
+    assert percentile([7.0], 95) == 7.0
+    # p/100 * n entier : le rang est exactement p/100 * n (pas d'arrondi au pair supérieur)
+    assert percentile(list(range(10, 0, -1)), 50) == 5
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile(list(range(1, 21)), 95) == 19
+    assert percentile([1, 2, 3, 4], 50) == 2
+    # p/100 * n fractionnaire : rang supérieur
+    assert percentile(list(range(1, 11)), 95) == 10
+    assert percentile([1, 2, 3], 50) == 2
+    assert percentile([1, 2, 3], 0) == 1
+
+
+def test_resume_par_biais_et_section(tmp_path, capsys):
+    telemetrie = Telemetrie()
+    chemin = tmp_path / "run" / "metriques_appels.jsonl"
+    telemetrie.demarrer(str(chemin))
+    with telemetrie.contexte(biais="Age", section="interests"):
+        for latence in range(1, 11):
+            telemetrie.enregistrer(float(latence), prompt_tokens=100, completion_tokens=10, cached_tokens=50)
+        # Réponse servie par le cache local : hors latences, coût nul
+        telemetrie.enregistrer(99.0, cache=True)
+        telemetrie.enregistrer(0.5, resultat="erreur", retries=2)
+        telemetrie.compter_evite("canonisation")
+        with telemetrie.construction(["CV1"]):
+            telemetrie.compter_serialisation(200, 150)
+    with telemetrie.contexte(biais="Gender", section="studies"):
+        telemetrie.enregistrer(3.0, prompt_tokens=10, completion_tokens=1)
+
+    with open(chemin, encoding="utf-8") as f:
+        lignes = [json.loads(ligne) for ligne in f]
+    assert len(lignes) == 13
+    assert lignes[0]["biais"] == "Age" and lignes[0]["section"] == "interests"
+    assert lignes[10]["cout_usd"] == 0.0
+
+    telemetrie.resume()
+    sortie = capsys.readouterr().out
+    lignes = {ligne.split("|")[0].strip(): [c.strip() for c in ligne.split("|")]
+              for ligne in sortie.splitlines() if "|" in ligne}
+    age, gender = lignes["Age"], lignes["Gender"]
+    # Appels, Cache, Err, Retry, p50, p95, Tokens, Préfixe
+    assert age[2:10] == ["12", "1", "1", "2", "5.00", "10.00", "1100", "50%"]
+    assert gender[2:8] == ["1", "0", "0", "0", "3.00", "3.00"]
+    assert "Appels évités Age/interests : 1 (canonisation 1)" in sortie
+    assert "Payloads Age/interests : 200 -> 150 tokens d'entrée (25% économisés)" in sortie
+
+    # Remise à zéro : la run suivante repart d'un bilan vide
+    assert telemetrie.enregistrements == [] and telemetrie.serialisation == {} and telemetrie.evites == {}
+    telemetrie.resume()
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,67 @@
+import pytest
+
+from temporalite import PRESENT, ResolveurTemporel, analyser_date, dates_compatibles, normaliser_date
+
+
+@pytest.mark.parametrize("valeur, texte", [
+    ("2022", "2022"),
+    ("Jan 2024", "2024-01"),
+    ("juin 2024", "2024-06"),
+    ("09/2023", "2023-09"),
+    ("2023/09", "2023-09"),
+    ("2021–2022", "2021 to 2022"),
+    ("June - December 2024", "2024-06 to 2024-12"),
+    ("Nov 2023 - Feb 2024", "2023-11 to 2024-02"),
+    ("de 2019 à 2023", "2019 to 2023"),
+    ("2022 - Present", "2022 to present"),
+    ("depuis 2021", "2021 to present"),
+    ("15 Jan 2023", "2023-01"),
+])
+def test_expressions_reconnues(valeur, texte):
+    assert analyser_date(valeur).texte == texte
+
+
+def test_fin_ouverte():
+    assert analyser_date("2022 - aujourd'hui").fin == PRESENT
+
+
+@pytest.mark.parametrize("valeur", ["not found", "", None, "N/A"])
+def test_dates_absentes(valeur):
+    assert analyser_date(valeur) is None
+
+
+@pytest.mark.parametrize("valeur", ["spring 2020", "2024-2020", "2019 2020 2021", "June"])
+def test_dates_non_reconnues(valeur):
+    assert analyser_date(valeur) is False
+    assert normaliser_date(valeur) == valeur
+
+
+def test_compatibilite():
+    # Une année équivaut à une plage qui la contient ; des plages qui se chevauchent sont cohérentes
+    assert dates_compatibles("2022", "2021-2022")
+    assert dates_compatibles("Sep 2021 - Jun 2022", "2022")
+    assert dates_compatibles("2020 - Present", "2023")
+    assert not dates_compatibles("2019-2020", "2021-2022")
+    # Absente d'un seul côté, ou illisible : au LLM
+    assert not dates_compatibles("not found", "2022")
+    assert not dates_compatibles("spring 2020", "2020")
+    assert dates_compatibles("not found", "")
+
+
+def test_resolveur_dates_seules():
+    resolveur = ResolveurTemporel()
+    original = [{"job title": "Analyst", "dates": "2021-2022"}, {"job title": "Intern", "dates": "2020"}]
+    variante = [{"job title": "intern", "dates": "Jun 2020 - Aug 2020"}, {"job title": "Analyst", "dates": "2022"}]
+    verdict = resolveur.juger("CV1", original, variante)
+    assert verdict["coherent"] is True
+    assert verdict["verdict_source"] == "temporalite"
+
+
+def test_resolveur_laisse_le_reste_au_llm():
+    resolveur = ResolveurTemporel()
+    original = [{"job title": "Analyst", "dates": "2021-2022"}]
+    assert resolveur.juger("CV1", original, [{"job title": "Manager", "dates": "2022"}]) is None
+    assert resolveur.juger("CV1", original, [{"job title": "Analyst", "dates": "2015"}]) is None
+    assert resolveur.juger("CV1", original, [{"job title": "Analyst"}]) is None
+    assert resolveur.juger("CV1", original, original + [{"job title": "Intern"}]) is None
+    assert resolveur.juger("CV1", [], []) is None
@@ -0,0 +1,98 @@
+import pytest
+
+from analyseage import AnalyseAge
+from verification import depouiller, motif_escalade
+
+
+def verdict(cv_id, coherent, **extra):
+    return {"cv_id": cv_id, "coherent": coherent, "empty_list": False,
+            "error_type": "None" if coherent else "Omission", "details": "-", **extra}
+
+
+def releve(cout=0.001, cache=False):
+    return {"cache": cache, "prompt_tokens": 100, "completion_tokens": 10, "cout_usd": cout}
+
+
+def test_motif_escalade():
+    assert motif_escalade(verdict("CV1", False)) == "incoherent"
+    assert motif_escalade(verdict("CV1", True)) is None
+    assert motif_escalade(verdict("CV1", True), confiance_locale=0.05) == "confiance_locale"
+    assert motif_escalade(verdict("CV1", True), confiance_locale=0.5) is None
+    assert motif_escalade(verdict("CV1", True), desaccord_local=True) == "desaccord_local"
+    # Omission imposée par _finaliser_verdict : les juges recevraient la même surcharge
+    assert motif_escalade(verdict("CV1", False, empty_extraction=True)) is None
+
+
+def test_candidats_verification():
+    analyseur = AnalyseAge()
+    paires = [
+        ("CV1", ["Chess"], ["Football"]),
+        ("CV2", ["Chess"], []),
+        ("CV3", ["Chess"], ["Chess club"]),
+        ("CV4", ["Chess"], ["Tennis"]),
+        ("CV5", ["Chess"], ["Golf"]),
+        ("CV6", ["Chess"], ["Rugby"]),
+    ]
+    verdicts = {
+        "CV1": verdict("CV1", False),
+        # Variante vide : Omission forcée après l'appel, pas de vote
+        "CV2": analyseur._finaliser_verdict(verdict("CV2", True), "CV2", ["Chess"], []),
+        "CV3": verdict("CV3", True),
+        "CV4": verdict("CV4", False, verdict_source="alignement"),
+        "CV5": verdict("CV5", False, verification={"motif": "incoherent"}),
+    }
+    assert verdicts["CV2"]["empty_extraction"] and verdicts["CV2"]["coherent"] is False
+
+    candidats = analyseur._candidats_verification(paires, verdicts)
+    assert [(paire[0], motif) for paire, motif in candidats] == [("CV1", "incoherent")]
+
+    # Verdict cohérent sur lequel le juge local hésitait
+    avis_hesitant = {"coherent": True, "confiance": 0.0}
+    analyseur._avis_local = lambda cv_id, original_data, biais_data: avis_hesitant if cv_id == "CV3" else None
+    candidats = analyseur._candidats_verification(paires, verdicts)
+    assert [(paire[0], motif) for paire, motif in candidats] == [("CV1", "incoherent"), ("CV3", "confiance_locale")]
+
+
+def test_candidats_verification_desaccord_avec_le_juge_local():
+    analyseur = AnalyseAge()
+    original = [{"level_of_degree": "Master", "field": "Computer Science"},
+                {"job title": "Analyst", "company": "ACME"}]
+    # Entrée omise : le juge local est sûr de l'Omission, mais la laisse au LLM
+    paires = [("CV1", original, original[:1])]
+    assert analyseur._resolution_locale(*paires[0]) is None
+
+    candidats = analyseur._candidats_verification(paires, {"CV1": verdict("CV1", True)})
+    assert [(paire[0], motif) for paire, motif in candidats] == [("CV1", "desaccord_local")]
+
+
+def test_depouiller_majorite_inverse_le_premier_verdict():
+    premier = verdict("CV1", False)
+    resultat = depouiller(premier, [verdict("CV1", True), verdict("CV1", True)], "incoherent",
+                          [releve(0.001), releve(0.002), releve(0.0, cache=True)])
+
+    assert resultat["coherent"] is True
+    verification = resultat["verification"]
+    assert verification["votes"] == {"coherent": 2, "incoherent": 1}
+    assert verification["juges"] == 3 and verification["verdict_initial"] is False
+    assert not verification["egalite"]
+    assert verification["appels_supplementaires"] == 2
+    assert verification["tokens_supplementaires"] == 330
+    assert verification["cout_supplementaire_usd"] == pytest.approx(0.003)
+
+
+def test_depouiller_majorite_confirme():
+    premier = verdict("CV1", False, details="premier")
+    resultat = depouiller(premier, [verdict("CV1", False, details="juge"), verdict("CV1", True)], "incoherent", [])
+    assert resultat["coherent"] is False and resultat["details"] == "premier"
+    assert resultat["verification"]["votes"] == {"coherent": 1, "incoherent": 2}
+
+
+def test_depouiller_egalite_conserve_le_premier_verdict():
+    premier = verdict("CV1", False, details="premier")
+    # Un juge en échec (None) n'est pas compté : 1 contre 1
+    resultat = depouiller(premier, [verdict("CV1", True), None], "incoherent", [])
+
+    assert resultat["coherent"] is False and resultat["details"] == "premier"
+    assert resultat["verification"]["egalite"]
+    assert resultat["verification"]["juges"] == 2
+    assert resultat["verification"]["votes"] == {"coherent": 1, "incoherent": 1}
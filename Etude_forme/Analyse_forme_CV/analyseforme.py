@@ -1,10 +1,28 @@
+import asyncio
 import json
 import re
 import os
-from analyse import Analyse, client, ANALYSIS_DEPLOYMENT_NAME
+import sys
+from analyse import Analyse, ANALYSIS_DEPLOYMENT_NAME
+import client_llm
+from moteur import MODE_SEQUENTIEL, MAX_CONCURRENCE
+from journal import JournalVerdicts
+from reparation import FileReparation
+from schema_verdict import format_reponse
+from telemetrie import telemetrie
+from geographie import LIEUX_NORMALISES, ResolveurGeographique
+from temporalite import DATES_NORMALISEES
+from verification import JUGES
 
 
 class AnalyseExtraction(Analyse):
+    # Règles TEMPORAL NORMALIZATION et GEOGRAPHIC appliquées localement : paires qui ne diffèrent que
+    # par des dates ou des lieux compatibles résolues sans LLM, dates et lieux des autres paires
+    # normalisés dans le prompt
+    resolveur_champs = ResolveurGeographique()
+    dates_normalisees = DATES_NORMALISEES
+    lieux_normalises = LIEUX_NORMALISES
+
     def __init__(self):
         super().__init__(biais_name="Extraction")
 
@@ -107,7 +125,69 @@ In case of doubt, prioritize COHERENCE if the intent and factual reality are pre
         nom = re.sub(r'\s+\d+$', '', nom)
         return nom.strip()
 
-    def comparer_fichiers_directs(self, path_reference, path_output, path_rapport):
+    def _construire_requete(self, systeme, donnees, lot=False):
+        # Consigne de rôle + règles dans un seul message system (préfixe stable), données en dernier
+        return {
+            "model": ANALYSIS_DEPLOYMENT_NAME,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a strict auditor using semantic inclusion. Output JSON only.\n\n" + systeme
+                },
+                {
+                    "role": "user",
+                    "content": donnees
+                }
+            ],
+            "response_format": format_reponse(lot),
+            "temperature": 0
+        }
+
+    def _finaliser_verdict(self, resultat, cv_id, original_data, biais_data):
+        resultat["cv_id"] = cv_id
+        return resultat
+
+    def index_references(self, data_ref):
+        """Mapping nom normalisé -> nom dans la référence (calculé une fois pour toutes les runs)."""
+        return {
+            self.normaliser_nom(nom_ref): nom_ref
+            for nom_ref in data_ref.keys()
+        }
+
+    def apparier(self, data_ai, data_ref, mapping_refs):
+        """Paires (nom extrait, CV de référence, CV extrait) et nom de référence utilisé pour chacune."""
+        paires = []
+        references_utilisees = {}
+
+        for nom_ai, contenu_ai in data_ai.items():
+
+            nom_ai_norm = self.normaliser_nom(nom_ai)
+            nom_ref_match = mapping_refs.get(nom_ai_norm)
+
+            if not nom_ref_match:
+                print(f"⚠️  Pas de référence pour '{nom_ai}'")
+                continue
+
+            paires.append((nom_ai, data_ref[nom_ref_match], contenu_ai))
+            references_utilisees[nom_ai] = nom_ref_match
+
+        return paires, references_utilisees
+
+    def _ecrire_rapport(self, rapport, references_utilisees, path_rapport):
+        for resultat_json in rapport:
+            resultat_json["reference_used"] = references_utilisees[resultat_json["cv_id"]]
+
+        self._sauvegarder_rapport(rapport, path_rapport)
+
+    def chemin_rapport_file(self, sortie, section):
+        # File de travail : sortie = dossier Run_*, rapport lu par synthese_multi_runs.py
+        return os.path.join(sortie, "rapport_analyse.json")
+
+    def ecrire_rapport_file(self, rapport, contextes, output_path):
+        self._ecrire_rapport(rapport, {cv_id: c["reference_used"] for cv_id, c in contextes.items()}, output_path)
+
+    def comparer_fichiers_directs(self, path_reference, path_output, path_rapport,
+                                  mode=MODE_SEQUENTIEL, max_concurrence=MAX_CONCURRENCE, taille_lot=1, juges=JUGES):
         print("--- Démarrage de <l'analyse (Mode : Semantic & Inclusion) ---")
 
         try:
@@ -121,73 +201,150 @@ In case of doubt, prioritize COHERENCE if the intent and factual reality are pre
             print(f"❌ Erreur chargement fichiers : {e}")
             return
 
-        # Pré-calcul du mapping normalisé -> nom référence
-        mapping_refs = {
-            self.normaliser_nom(nom_ref): nom_ref
-            for nom_ref in data_ref.keys()
-        }
+        paires, references_utilisees = self.apparier(data_ai, data_ref, self.index_references(data_ref))
 
-        rapport_global = []
+        print(f"🔄 Audit de {len(paires)} CVs...")
+        telemetrie.demarrer(os.path.join(os.path.dirname(path_rapport), "metriques_appels.jsonl"))
+        journal = JournalVerdicts(JournalVerdicts.chemin_pour(path_rapport))
+        rapport_global = self.auditer_paires(paires, mode=mode, max_concurrence=max_concurrence,
+                                             taille_lot=taille_lot, journal=journal, section="forme",
+                                             chemin_rejets=FileReparation.chemin_pour(path_rapport), juges=juges)
 
-        for nom_ai, contenu_ai in data_ai.items():
+        self._ecrire_rapport(rapport_global, references_utilisees, path_rapport)
+        journal.clore()
 
-            nom_ai_norm = self.normaliser_nom(nom_ai)
-            nom_ref_match = mapping_refs.get(nom_ai_norm)
+        client_llm.rapport_fin_de_run()
+        print(f"✅ Analyse terminée. Rapport généré : {path_rapport}")
 
-            if not nom_ref_match:
-                print(f"⚠️  Pas de référence pour '{nom_ai}'")
-                continue
+    @staticmethod
+    def lister_runs(dossier_runs):
+        """Dossiers Run_* contenant un output.json, triés."""
+        if not os.path.isdir(dossier_runs):
+            return []
+        return sorted(
+            d for d in os.listdir(dossier_runs)
+            if d.startswith("Run_") and os.path.isfile(os.path.join(dossier_runs, d, "output.json"))
+        )
+
+    async def _auditer_run(self, client_async, semaphore, dossier_run, data_ref, mapping_refs, taille_lot, juges):
+        run = os.path.basename(dossier_run)
+        with open(os.path.join(dossier_run, "output.json"), 'r', encoding='utf-8') as f:
+            data_ai = json.load(f)
+
+        paires, references_utilisees = self.apparier(data_ai, data_ref, mapping_refs)
+        path_rapport = os.path.join(dossier_run, "rapport_analyse.json")
+        print(f"   🔄 {run} : {len(paires)} CVs -> {path_rapport}")
+
+        journal = JournalVerdicts(JournalVerdicts.chemin_pour(path_rapport))
+        rapport = await self.auditer_paires_partage(
+            client_async, semaphore, paires,
+            taille_lot=taille_lot,
+            journal=journal,
+            section=run,
+            chemin_rejets=FileReparation.chemin_pour(path_rapport),
+            juges=juges
+        )
+
+        self._ecrire_rapport(rapport, references_utilisees, path_rapport)
+        journal.clore()
+        print(f"   ✅ {run} : {len(rapport)} verdicts")
+
+    async def _auditer_runs(self, dossiers, data_ref, mapping_refs, max_concurrence, taille_lot, juges):
+        semaphore = asyncio.Semaphore(max_concurrence)
+        async with client_llm.creer_client_async() as client_async:
+            resultats = await asyncio.gather(
+                *[
+                    self._auditer_run(client_async, semaphore, dossier, data_ref, mapping_refs, taille_lot, juges)
+                    for dossier in dossiers
+                ],
+                return_exceptions=True
+            )
 
-            print(f"🔄 Audit de '{nom_ai}'...")
+        # Une run en échec n'interrompt pas les autres ; son journal permet de la reprendre
+        for dossier, resultat in zip(dossiers, resultats):
+            if isinstance(resultat, Exception):
+                print(f"   ❌ Erreur sur {os.path.basename(dossier)} : {resultat}")
 
-            contenu_ref = data_ref[nom_ref_match]
+    def comparer_runs(self, path_reference, dossier_runs, max_concurrence=MAX_CONCURRENCE, taille_lot=1,
+                      juges=JUGES):
+        """
+        Audite toutes les runs Audit_forme/Run/Run_*/output.json en une fois.
 
-            prompt = self.construction_prompt(
-                original_data=contenu_ref,
-                biais_data=contenu_ai,
-                cv_id=nom_ai
-            )
+        La référence est chargée et indexée une seule fois ; les paires (run, CV) de toutes les runs
+        partagent une boucle asyncio, un client et un sémaphore (max_concurrence appels au plus).
+        Chaque run garde son rapport_analyse.json (lu par synthese_multi_runs.py) et son journal de reprise.
+        """
+        runs = self.lister_runs(dossier_runs)
+        if not runs:
+            print(f"❌ Aucun dossier Run_* avec output.json dans {dossier_runs}")
+            return
+
+        try:
+            with open(path_reference, 'r', encoding='utf-8') as f:
+                data_ref = json.load(f)
+        except Exception as e:
+            print(f"❌ Erreur chargement référence : {e}")
+            return
 
-            try:
-                response = client.chat.completions.create(
-                    model=ANALYSIS_DEPLOYMENT_NAME,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a strict auditor using semantic inclusion. Output JSON only."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0
-                )
-
-                resultat_raw = response.choices[0].message.content.strip()
-                resultat_raw = resultat_raw.replace("```json", "").replace("```", "")
-
-                resultat_json = json.loads(resultat_raw)
-                resultat_json["cv_id"] = nom_ai
-                resultat_json["reference_used"] = nom_ref_match
-
-                rapport_global.append(resultat_json)
-
-            except Exception as e:
-                print(f"❌ Erreur technique sur {nom_ai}: {e}")
-
-        with open(path_rapport, 'w', encoding='utf-8') as f:
-            json.dump(rapport_global, f, indent=4, ensure_ascii=False)
+        print(f"--- Audit de forme de {len(runs)} runs {runs} : {max_concurrence} appels simultanés au plus ---")
+        telemetrie.demarrer(os.path.join(dossier_runs, "metriques_appels.jsonl"))
+        asyncio.run(self._auditer_runs(
+            [os.path.join(dossier_runs, run) for run in runs],
+            data_ref, self.index_references(data_ref), max_concurrence, taille_lot, juges
+        ))
 
-        print(f"✅ Analyse terminée. Rapport généré : {path_rapport}")
+        client_llm.rapport_fin_de_run()
+        print(f"✅ Analyse terminée pour {len(runs)} runs.")
+
+    def enfiler_runs(self, file, path_reference, dossier_runs):
+        """
+        Met en file de travail (file_travail.FileTravail) les paires de toutes les runs Run_*/output.json,
+        une section "forme" par run. Les rapports sont écrits par materialiser() dans chaque Run_*.
+        """
+        runs = self.lister_runs(dossier_runs)
+        if not runs:
+            print(f"❌ Aucun dossier Run_* avec output.json dans {dossier_runs}")
+            return 0
+
+        with open(path_reference, 'r', encoding='utf-8') as f:
+            data_ref = json.load(f)
+        mapping_refs = self.index_references(data_ref)
+
+        ajoutes = 0
+        for run in runs:
+            dossier_run = os.path.join(dossier_runs, run)
+            with open(os.path.join(dossier_run, "output.json"), 'r', encoding='utf-8') as f:
+                data_ai = json.load(f)
+            paires, references_utilisees = self.apparier(data_ai, data_ref, mapping_refs)
+            contextes = {nom_ai: {"reference_used": nom_ref} for nom_ai, nom_ref in references_utilisees.items()}
+            ajoutes += file.enfiler(self, run, "forme", paires, dossier_run, contextes=contextes)
+        return ajoutes
 
 
 if __name__ == "__main__":
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
     analyseur = AnalyseExtraction()
-    analyseur.comparer_fichiers_directs(
-        os.path.join(BASE_DIR, "Audit_forme/new_real_cv.json"),
-        os.path.join(BASE_DIR, "Audit_forme/output.json"),
-        os.path.join(BASE_DIR, "Audit_forme/rapport_analyse.json")
-    )
+    if len(sys.argv) > 2 and sys.argv[1] == "--file":
+        # python analyseforme.py --file <file.sqlite> : met les runs en file (idempotent) puis travaille ;
+        # la même commande sur d'autres processus / machines partage le travail
+        from file_travail import FileTravail, TravailleurFile
+        file = FileTravail(sys.argv[2])
+        analyseur.enfiler_runs(
+            file,
+            os.path.join(BASE_DIR, "Audit_forme/new_real_cv.json"),
+            os.path.join(BASE_DIR, "Audit_forme/Run")
+        )
+        TravailleurFile(file, [analyseur]).lancer()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--runs":
+        # python analyseforme.py --runs : toutes les runs Audit_forme/Run/Run_*
+        analyseur.comparer_runs(
+            os.path.join(BASE_DIR, "Audit_forme/new_real_cv.json"),
+            os.path.join(BASE_DIR, "Audit_forme/Run")
+        )
+    else:
+        analyseur.comparer_fichiers_directs(
+            os.path.join(BASE_DIR, "Audit_forme/new_real_cv.json"),
+            os.path.join(BASE_DIR, "Audit_forme/output.json"),
+            os.path.join(BASE_DIR, "Audit_forme/rapport_analyse.json")
+        )